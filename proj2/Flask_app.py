@@ -2,24 +2,55 @@ import os
 import re
 import sys
 import argparse
+import time
+import threading
 import math
 import json
 import calendar
+import hashlib
 from enum import Enum
+from functools import lru_cache
+from itertools import groupby
 from io import BytesIO
 from flask import jsonify
 from sqlite3 import IntegrityError
 import sqlite3
-from datetime import timedelta, date, datetime
+from datetime import timedelta, date, datetime, timezone
 from pdf_receipt import generate_order_receipt_pdf
 from werkzeug.security import check_password_hash, generate_password_hash
-from flask import Flask, render_template, url_for, redirect, request, session, send_file, abort
+from flask import Flask, render_template, make_response, url_for, redirect, request, session, send_file, abort, g
 
 # Use ONLY these helpers for DB access
-from sqlQueries import create_connection, close_connection, fetch_one, fetch_all, execute_query
-from collections import Counter, defaultdict
+from sqlQueries import fetch_one, fetch_all, execute_read, execute_write, count_all_tickets, ConnectionPool, DEFAULT_PRAGMAS
+from collections import OrderedDict, defaultdict, namedtuple
 from menu_generation import MenuGenerator
 
+# orjson is optional; fall back to the stdlib json module when it is not installed
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+
+    def _json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(obj) -> str:
+        # Compact like orjson, so stored order details don't carry separator whitespace
+        return json.dumps(obj, separators=(",", ":"))
+
+def _json_response(payload, status: int = 200):
+    """
+    Build a JSON response with _json_dumps (orjson when installed) instead of jsonify.
+    Args:
+        payload (dict | list): JSON-serializable body.
+        status (int): HTTP status code.
+    Returns:
+        Response: application/json response.
+    """
+    return app.response_class(_json_dumps(payload), status=status, mimetype="application/json")
+
 # ----------MANAGE ORDER STATUS--------------
 class OrderStatus(Enum):
     ORDERED =  'Ordered'
@@ -32,11 +63,186 @@ class OrderStatus(Enum):
     def get_uppercase(self):
         return self.value.upper()
 
+# One of today's planned meals on the home page (meal: 1|2|3, item: menu item dict)
+TodayEntry = namedtuple("TodayEntry", ["meal", "item"])
+
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your_secret_key_here'
 
 db_file = os.path.join(os.path.dirname(__file__), 'CSC510_DB.db')
 
+# Applied once when the pool opens a connection: the sqlQueries defaults (busy_timeout, ...)
+# plus a bounded WAL file between checkpoints (once migrations/enable_wal_mode.py has run)
+_DB_PRAGMAS = DEFAULT_PRAGMAS + (
+    ("wal_autocheckpoint", 1000),
+)
+
+# Idle connections kept per database file (per worker process)
+_DB_POOL_SIZE = 8
+
+# Prepared statements kept per pooled connection. The statement cache is keyed by
+# SQL text, so it only helps queries whose text is fixed; it must hold every
+# distinct statement the routes issue (plus the IN-list buckets) to avoid churn.
+_DB_STATEMENT_CACHE = 256
+
+# db path -> ConnectionPool; keyed by path because db_file can be repointed (tests)
+_db_pools = {}
+
+# (table, column) the routes read or write -> migration that adds it, in the README's run order
+_REQUIRED_COLUMNS = (
+    ("Ticket", "ticket_id", "add_ticket_table.py"),
+    ("User", "is_admin", "add_admin_column.py"),
+    ("Order", "placed_at", "add_order_summary_columns.py"),
+    ("Order", "total_cents", "add_order_summary_columns.py"),
+    ("Restaurant", "address_full", "add_restaurant_address_column.py"),
+    ("Order", "placed_hour", "add_order_insights_columns.py"),
+    ("Order", "placed_weekday", "add_order_insights_columns.py"),
+    ("Order", "delivery_type", "add_order_insights_columns.py"),
+)
+
+def _check_schema(conn, path: str):
+    """
+    Fail fast when a database predates migrations the routes depend on.
+    Args:
+        conn (sqlite3.Connection): Connection to the database being checked.
+        path (str): Path to the database file (for the error message).
+    Returns:
+        None
+    Raises:
+        RuntimeError: Listing the migration scripts to run, in order.
+    """
+    # table_xinfo also lists generated columns
+    present = set(fetch_all(conn, """
+        SELECT m.name, p.name FROM sqlite_master m JOIN pragma_table_xinfo(m.name) p
+        WHERE m.type = 'table'
+    """))
+    missing = list(dict.fromkeys(
+        script for table, column, script in _REQUIRED_COLUMNS if (table, column) not in present
+    ))
+    if missing:
+        raise RuntimeError(
+            f"Database {path} is missing schema changes; run these migrations from proj2/ first: "
+            + ", ".join(f"python migrations/{script}" for script in missing)
+        )
+
+def _get_pool(path: str) -> ConnectionPool:
+    """
+    Return the connection pool for a database file, creating it (and checking the
+    schema) on first use.
+    Args:
+        path (str): Path to the SQLite database file.
+    Returns:
+        ConnectionPool: The shared pool for that file.
+    Raises:
+        RuntimeError: If the database is missing required migrations.
+    """
+    pool = _db_pools.get(path)
+    if pool is None:
+        pool = ConnectionPool(path, size=_DB_POOL_SIZE, pragmas=_DB_PRAGMAS,
+                              cached_statements=_DB_STATEMENT_CACHE)
+        with pool.acquire() as conn:
+            if conn is not None:
+                _check_schema(conn, path)
+        pool = _db_pools.setdefault(path, pool)
+    return pool
+
+# Password hashing: scrypt verifies faster than PBKDF2 at comparable strength.
+# Older hashes are upgraded to this method on the next successful login.
+_PASSWORD_HASH_METHOD = "scrypt:32768:8:1"
+
+# Precompiled patterns for hot paths
+_EMAIL_RE = re.compile(r"^[^@]+@[^@]+\.[^@]+$")
+_NONDIGIT_RE = re.compile(r"\D+")
+
+# ---------------------- Database ----------------------
+
+def get_db():
+    """
+    Return the SQLite connection for the current request, borrowing it from the
+    process-wide pool on first use. The connection lives on `flask.g` so every
+    query in a request shares one connection (and its warm page cache); it goes
+    back to the pool in `close_db`. Rows come back as `sqlite3.Row`, so columns
+    can be read by name or by index.
+    Returns:
+        sqlite3.Connection | None: The request-scoped connection, or None if opening failed.
+    """
+    conn = g.get('db_conn')
+    if conn is None:
+        pool = _get_pool(db_file)
+        conn = pool.get()
+        if conn is not None:
+            conn.row_factory = sqlite3.Row
+        g.db_conn = conn
+        g.db_pool = pool
+    return conn
+
+@app.teardown_appcontext
+def close_db(exc):
+    """
+    Return the request-scoped connection (if any) to its pool when the app context ends.
+    Args:
+        exc (BaseException | None): The exception that ended the context, if any.
+    Returns:
+        None
+    """
+    conn = g.pop('db_conn', None)
+    pool = g.pop('db_pool', None)
+    if pool is not None:
+        pool.release(conn)
+
+# Bumped on every write to "User" so cached rows from _load_user_cached go stale
+_user_generation = 0
+
+# The generation only sees this process's writes, so cached user rows also expire
+# after this long; other workers' writes show up within it
+_USER_CACHE_TTL_SECONDS = 10
+
+def _bump_user_generation():
+    """
+    Invalidate every cached user row (call after any write to the "User" table).
+    Returns:
+        None
+    """
+    global _user_generation
+    _user_generation += 1
+
+@lru_cache(maxsize=512)
+def _load_user_cached(db_path: str, email: str, generation: int, ttl_bucket: int):
+    """
+    Look up a user's id and generated menu, memoized per (db_path, email, generation, ttl_bucket).
+    Callers pass the current `_user_generation` so a bump invalidates old entries, and the
+    current _USER_CACHE_TTL_SECONDS window so entries expire even without a local bump.
+    Args:
+        db_path (str): Database file the row was read from (keeps test DBs apart).
+        email (str): The user's login email.
+        generation (int): Snapshot of `_user_generation`.
+        ttl_bucket (int): Index of the current _USER_CACHE_TTL_SECONDS window.
+    Returns:
+        sqlite3.Row | None: Row with usr_id and generated_menu, or None if no such user.
+    """
+    return fetch_one(get_db(), 'SELECT usr_id, generated_menu FROM "User" WHERE email = ?', (email,))
+
+def _current_user_row():
+    """
+    Return the cached (usr_id, generated_menu) row for the logged-in session email.
+    Returns:
+        sqlite3.Row | None: The cached user row, or None if the user no longer exists.
+    """
+    ttl_bucket = int(time.monotonic() // _USER_CACHE_TTL_SECONDS)
+    return _load_user_cached(db_file, session.get("Email"), _user_generation, ttl_bucket)
+
+def _session_usr_id():
+    """
+    Resolve the logged-in user's usr_id, preferring the session over the cached row.
+    Returns:
+        int | None: The user's id, or None if the session email has no matching user.
+    """
+    usr_id = session.get('usr_id')
+    if usr_id:
+        return usr_id
+    row = _current_user_row()
+    return row["usr_id"] if row else None
+
 # ---------------------- Helpers ----------------------
 
 def _money(x: float) -> float:
@@ -79,25 +285,131 @@ def _dollars_to_cents(dollars) -> int:
     except Exception:
         return 0
 
-def _execute_transaction(conn, queries_and_params: list) -> bool:
+# Order pricing, in integer cents (tax rate in basis points)
+_TAX_RATE_BP = 725
+_DELIVERY_FEE_CENTS = 399
+_SERVICE_FEE_CENTS = 149
+
+
+def _order_charges(subtotal_cents: int, delivery_type: str, tip_dollars: float):
+    """
+    Compute an order's charges with integer-cent arithmetic.
+    Args:
+        subtotal_cents (int): Sum of the order's line totals in cents.
+        delivery_type (str): 'delivery' or 'pickup' (pickup has no delivery fee).
+        tip_dollars (float): Tip already rounded to cents.
+    Returns:
+        tuple: (charges: dict of dollar amounts for the order details, total_cents: int)
+    """
+    tax_cents = (subtotal_cents * _TAX_RATE_BP + 5000) // 10000  # round half up
+    delivery_fee_cents = _DELIVERY_FEE_CENTS if delivery_type == "delivery" else 0
+    tip_cents = int(round(tip_dollars * 100))
+    total_cents = subtotal_cents + tax_cents + delivery_fee_cents + _SERVICE_FEE_CENTS + tip_cents
+    charges = {
+        "subtotal": subtotal_cents / 100,
+        "tax": tax_cents / 100,
+        "delivery_fee": delivery_fee_cents / 100,
+        "service_fee": _SERVICE_FEE_CENTS / 100,
+        "tip": tip_cents / 100,
+        "total": total_cents / 100,
+    }
+    return charges, total_cents
+
+# IN-list sizes; padding to a bucket keeps the SQL text stable so the
+# connection's prepared-statement cache can reuse it
+_IN_BUCKETS = (1, 4, 16, 64)
+
+
+def _in_placeholders(values):
+    """
+    Build a bucket-sized IN (...) placeholder list and matching NULL-padded params.
+    Args:
+        values (Iterable): The values to bind.
+    Returns:
+        tuple: (placeholders: str, params: tuple). NULL never matches IN, so padding is inert.
+    """
+    params = tuple(values)
+    n = len(params)
+    size = next((b for b in _IN_BUCKETS if b >= n), -(-n // _IN_BUCKETS[-1]) * _IN_BUCKETS[-1])
+    return ",".join("?" * size), params + (None,) * (size - n)
+
+
+# Local tzinfo objects keyed by UTC offset (seconds); built once per offset
+_LOCAL_TZ = {}
+
+
+def _local_now() -> datetime:
+    """
+    Current local time as an aware datetime without a per-call astimezone() lookup.
+    Keyed on the current UTC offset so DST changes still pick the right zone.
+    Returns:
+        datetime: Timezone-aware local time.
+    """
+    offset = time.localtime().tm_gmtoff
+    tz = _LOCAL_TZ.get(offset)
+    if tz is None:
+        tz = _LOCAL_TZ[offset] = timezone(timedelta(seconds=offset))
+    return datetime.now(tz)
+
+
+def _execute_transaction(conn, queries_and_params: list):
     """
     Execute multiple queries in a single, atomic transaction.
     Args:
         conn (sqlite3.Connection): Active database connection.
         queries_and_params (list): List of (query: str, params: tuple) pairs.
     Returns:
-        bool: True on success, False on failure (with automatic rollback).
+        sqlite3.Cursor | None: Cursor of the last statement on success (e.g., for
+            `lastrowid`), None on failure (with automatic rollback).
     """
     try:
         cur = conn.cursor()
+        # Pooled connections run in autocommit mode, so open the transaction explicitly.
+        # IMMEDIATE takes the write lock up front (waiting via busy_timeout) rather than
+        # failing with SQLITE_BUSY when a deferred read transaction tries to upgrade.
+        if not conn.in_transaction:
+            cur.execute("BEGIN IMMEDIATE")
         for query, params in queries_and_params:
             cur.execute(query, params)
         conn.commit()
-        return True
+        return cur
     except Exception as e:
         print(f"Transaction failed, rolling back: {e}")
         conn.rollback()
-        return False
+        return None
+
+def _parse_entry(frag):
+    """
+    Parse the entry between the last '[' of a fragment and its closing ']'.
+    Args:
+        frag (str): Text preceding a ']' in a generated-menu string.
+    Returns:
+        tuple | None: (date_str, itm_id, meal) or None when the entry is malformed.
+    """
+    start = frag.rfind('[')
+    if start < 0:
+        return None
+    parts = frag[start + 1:].split(',')
+    if len(parts) not in (2, 3):
+        return None
+
+    d = parts[0].strip()
+    if not (len(d) == 10 and d[4] == '-' and d[7] == '-'
+            and d[:4].isdecimal() and d[5:7].isdecimal() and d[8:].isdecimal()):
+        return None
+
+    mid = parts[1].strip()
+    if not (mid.isascii() and mid.isdigit()):
+        return None
+
+    meal_i = 3  # default to Dinner for legacy entries
+    if len(parts) == 3:
+        meal = parts[2].strip()
+        if meal not in ('1', '2', '3'):
+            return None
+        meal_i = int(meal)
+    return d, int(mid), meal_i
+
 
 def parse_generated_menu(gen_str):
     """
@@ -110,36 +422,63 @@ def parse_generated_menu(gen_str):
     if not gen_str:
         return {}
 
-    # date, id, optional meal (1,2,3)
-    pairs = re.findall(r'\[\s*(\d{4}-\d{2}-\d{2})\s*,\s*([0-9]+)\s*(?:,\s*([123])\s*)?\]', gen_str)
     out = {}
-    for d, mid, meal in pairs:
-        try:
-            itm_id = int(mid)
-            meal_i = int(meal) if meal else 3  # default to Dinner for legacy entries
-            out.setdefault(d, []).append({'itm_id': itm_id, 'meal': meal_i})
-        except ValueError:
+    # Every entry ends at a ']', so each fragment holds at most one entry
+    for frag in gen_str.split(']')[:-1]:
+        entry = _parse_entry(frag)
+        if entry is None:
             continue
+        d, itm_id, meal_i = entry
+        out.setdefault(d, []).append({'itm_id': itm_id, 'meal': meal_i})
     return out
 
-def palette_for_item_ids(item_ids):
+@lru_cache(maxsize=128)
+def _parse_generated_menu_cached(gen_str):
+    """
+    Memoized `parse_generated_menu` for the request hot paths (a plan string only
+    changes when the user regenerates it, so repeat renders skip the scan).
+    Args:
+        gen_str (str): The serialized generated-menu string.
+    Returns:
+        dict: Shared parse result; callers must treat it as read-only.
+    """
+    return parse_generated_menu(gen_str)
+
+@app.template_filter("item_hue")
+def item_hue(iid):
     """
-    Generate a deterministic, pleasant color palette for item IDs.
+    Map an item ID to its palette hue (the calendar dots render it via CSS hsl()).
     Args:
-        item_ids (Iterable[int]): The menu item IDs to colorize.
+        iid (int): The menu item ID.
     Returns:
-        dict: Mapping itm_id -> hex color string (e.g., '#a1b2c3').
-    """
-    import colorsys
-    def hsl_to_hex(h, s, l):
-        r, g, b = colorsys.hls_to_rgb(h/360.0, l/100.0, s/100.0)
-        return '#%02x%02x%02x' % (int(r*255), int(g*255), int(b*255))
-    palette = {}
-    for iid in item_ids:
-        seed = (iid * 9301 + 49297) % 233280
-        hue = seed % 360
-        palette[iid] = hsl_to_hex(hue, 65, 52)
-    return palette
+        int: Hue in degrees, 0-359.
+    """
+    return (iid * 9301 + 49297) % 233280 % 360
+
+_HOURS_DAY_ORDER = ("M", "T", "W", "Th", "F", "Sa", "Su")
+_HOURS_DAY_NAMES = {"M": "Mon", "T": "Tue", "W": "Wed", "Th": "Thu", "F": "Fri", "Sa": "Sat", "Su": "Sun"}
+
+
+def _hhmm_to_time(v) -> str:
+    """
+    Format an HHMM integer as a 12-hour clock string.
+    Args:
+        v (int): Time as HHMM (e.g., 1700).
+    Returns:
+        str: Formatted time (e.g., '5:00 PM').
+    """
+    h = v // 100
+    m = v % 100
+    ampm = "AM"
+    if h >= 12: ampm = "PM"
+    if h > 12: h -= 12
+    if h == 0: h = 12
+    return f"{h}:{m:02d} {ampm}"
+
+
+# HHMM -> '5:00 PM' for every valid clock value (2400 included for "closes at midnight")
+_TIME_STR = {h * 100 + m: _hhmm_to_time(h * 100 + m) for h in range(25) for m in range(60)}
+
 
 def fetch_menu_items_by_ids(ids):
     """
@@ -150,45 +489,34 @@ def fetch_menu_items_by_ids(ids):
         dict: Mapping itm_id -> dict with fields like name, price, calories, allergens,
             and restaurant info (name, address, hours, phone).
     """
+    ids = tuple(ids)
     if not ids:
         return {}
-    conn = create_connection(db_file)
-    try:
-        qmarks = ",".join(["?"] * len(ids))
-        sql = f"""
-          SELECT m.itm_id, m.rtr_id, m.name, m.description, m.price, m.calories,
-                 m.allergens, r.name AS restaurant_name, r.address, r.city, r.state, r.zip,
-                 r.hours, r.phone
-          FROM MenuItem m
-          JOIN Restaurant r ON r.rtr_id = m.rtr_id
-          WHERE m.itm_id IN ({qmarks})
-        """
-        rows = fetch_all(conn, sql, tuple(ids))
-    finally:
-        close_connection(conn)
-
-    def _addr(a, c, s, z) -> str:
-        parts_raw = [a, c, s, z]
-        parts = []
-        for p in parts_raw:
-            if p is None:
-                continue
-            sp = str(p).strip()
-            if sp:
-                parts.append(sp)
-        return ", ".join(parts)
+    # Per-request cache so repeated lookups (calendar cells + today_menu) share rows
+    cache = g.setdefault("menu_items_by_id", {})
+    missing = [i for i in ids if i not in cache]
+    if not missing:
+        return {i: cache[i] for i in ids}
+    conn = get_db()
+    qmarks, params = _in_placeholders(missing)
+    sql = f"""
+      SELECT m.itm_id, m.rtr_id, m.name, m.description, m.price, m.calories,
+             m.allergens, r.name AS restaurant_name, r.address_full,
+             r.hours, r.phone
+      FROM MenuItem m
+      JOIN Restaurant r ON r.rtr_id = m.rtr_id
+      WHERE m.itm_id IN ({qmarks})
+    """
+    rows = fetch_all(conn, sql, params)
 
     def _fmt_hours(h_str) -> str:
         """Parses the JSON hours string into a readable format server-side."""
         if not h_str: return ""
         try:
             # Load JSON
-            h_obj = json.loads(h_str)
-            day_map = {"M": "Mon", "T": "Tue", "W": "Wed", "Th": "Thu", "F": "Fri", "Sa": "Sat", "Su": "Sun"}
-            order = ["M", "T", "W", "Th", "F", "Sa", "Su"]
-            
+            h_obj = _json_loads(h_str)
             lines = []
-            for k in order:
+            for k in _HOURS_DAY_ORDER:
                 times = h_obj.get(k)
                 if times and len(times) >= 2:
                     # Convert 1700 -> 5:00 PM
@@ -196,28 +524,19 @@ def fetch_menu_items_by_ids(ids):
                     for i in range(0, len(times), 2):
                         if i+1 < len(times):
                             start, end = times[i], times[i+1]
-                            
-                            def to_time(v):
-                                h = v // 100
-                                m = v % 100
-                                ampm = "AM"
-                                if h >= 12: ampm = "PM"
-                                if h > 12: h -= 12
-                                if h == 0: h = 12
-                                return f"{h}:{m:02d} {ampm}"
-                            
-                            ranges.append(f"{to_time(start)}–{to_time(end)}")
+                            s_str = _TIME_STR.get(start) or _hhmm_to_time(start)
+                            e_str = _TIME_STR.get(end) or _hhmm_to_time(end)
+                            ranges.append(f"{s_str}–{e_str}")
                     
                     if ranges:
-                        lines.append(f"{day_map.get(k, k)}: {', '.join(ranges)}")
+                        lines.append(f"{_HOURS_DAY_NAMES.get(k, k)}: {', '.join(ranges)}")
             return " · ".join(lines)
         except Exception:
             # Fallback if not JSON
             return str(h_str)
 
-    out = {}
     for r in rows:
-        out[r[0]] = {
+        cache[r[0]] = {
             "itm_id": r[0],
             "rtr_id": r[1],
             "name": r[2],
@@ -226,11 +545,94 @@ def fetch_menu_items_by_ids(ids):
             "calories": r[5],
             "allergens": r[6],
             "restaurant_name": r[7],
-            "restaurant_address": _addr(r[8], r[9], r[10], r[11]),
-            "restaurant_hours": _fmt_hours(r[12]), # <--- NOW FORMATTED IN PYTHON
-            "restaurant_phone": r[13] or "",
+            "restaurant_address": r[8] or "",
+            "restaurant_hours": _fmt_hours(r[9]), # <--- NOW FORMATTED IN PYTHON
+            "restaurant_phone": r[10] or "",
         }
-    return out
+    return {i: cache[i] for i in ids if i in cache}
+
+
+# Restaurant/MenuItem rows are only edited by admin tooling, never by the app's
+# own routes, so the browse pages share a short-lived snapshot of them
+_CATALOG_TTL_SECONDS = 60
+_catalog_cache = {}
+
+# Template-ready browse data: full restaurant dicts (/restaurants), the address-only
+# projection (/orders) and in-stock item dicts (both). Shared read-only across requests.
+# `version` is a content hash, so it only changes when the catalog data does.
+Catalog = namedtuple("Catalog", ["restaurants", "order_restaurants", "items", "version"])
+
+
+def _catalog_snapshot(conn):
+    """
+    Return the restaurants and in-stock menu items used by the browse pages, already
+    shaped for the templates. Built once per _CATALOG_TTL_SECONDS per database file.
+    Args:
+        conn (sqlite3.Connection): Active database connection (used on a cache miss).
+    Returns:
+        Catalog: Tuples of dicts; callers must not mutate them.
+    """
+    now = time.monotonic()
+    hit = _catalog_cache.get(db_file)
+    if hit and hit[0] > now:
+        return hit[1]
+
+    restaurant_rows = fetch_all(conn, '''
+        SELECT rtr_id, name, description, phone, email, address, city, state, zip, hours, status,
+               address_full
+        FROM "Restaurant"
+    ''')
+    item_rows = fetch_all(conn, '''
+        SELECT itm_id, rtr_id, name, price, calories, allergens, description
+        FROM "MenuItem"
+        WHERE instock IS NULL OR instock = 1
+    ''')
+
+    restaurants = tuple({
+        "rtr_id": r["rtr_id"],
+        "name": r["name"],
+        "description": r["description"] or "",
+        "phone": r["phone"] or "",
+        "email": r["email"] or "",
+        "address": r["address"] or "",
+        "city": r["city"] or "",
+        "state": r["state"] or "",
+        "zip": r["zip"] if r["zip"] is not None else "",
+        "hours": r["hours"] or "",
+        "status": r["status"] or "",
+        "address_full": r["address_full"] or "",
+    } for r in restaurant_rows)
+    order_restaurants = tuple({
+        k: r[k] for k in ("rtr_id", "name", "address", "city", "state", "zip", "address_full")
+    } for r in restaurants)
+    items = tuple({
+        "itm_id":      m["itm_id"],
+        "rtr_id":      m["rtr_id"],
+        "name":        m["name"],
+        "price_cents": m["price"] or 0,
+        "calories":    m["calories"] or 0,
+        "allergens":   m["allergens"] or "",
+        "description": m["description"] or "",
+    } for m in item_rows)
+
+    version = hashlib.sha1(_json_dumps([restaurants, items]).encode()).hexdigest()[:16]
+    catalog = Catalog(restaurants, order_restaurants, items, version)
+    _catalog_cache[db_file] = (now + _CATALOG_TTL_SECONDS, catalog)
+    return catalog
+
+
+@lru_cache(maxsize=256)
+def _month_weeks(year, month):
+    """
+    Sunday-start week rows for a month (0 marks days outside the month).
+    Args:
+        year (int): The calendar year.
+        month (int): The calendar month (1–12).
+    Returns:
+        tuple: Tuple of 7-tuples of day numbers.
+    """
+    cal = calendar.Calendar(firstweekday=6)  # Sunday start
+    return tuple(tuple(week) for week in cal.monthdayscalendar(year, month))
 
 
 def build_calendar_cells(gen_map, year, month, items_by_id):
@@ -244,36 +646,28 @@ def build_calendar_cells(gen_map, year, month, items_by_id):
     Returns:
         list: A flat list of calendar cell dicts with day number and a 'meals' list.
     """
-    def meal_sort_key(e):
-        # Breakfast(1) first, then Lunch(2), then Dinner(3)
-        return e.get('meal', 3)
-
-    palette = palette_for_item_ids(items_by_id.keys())
-    cal = calendar.Calendar(firstweekday=6)  # Sunday start
     cells = []
 
-    for week in cal.monthdayscalendar(year, month):
+    for week in _month_weeks(year, month):
         for d in week:
             if d == 0:
                 cells.append({"day": 0})
                 continue
 
             iso = f"{year:04d}-{month:02d}-{d:02d}"
-            entries = sorted(gen_map.get(iso, []), key=meal_sort_key)
+            # Breakfast(1) first, then Lunch(2), then Dinner(3)
+            entries = sorted(gen_map.get(iso, ()), key=lambda e: e.get('meal', 3))
 
             meals = []
             for e in entries:
                 itm = items_by_id.get(e['itm_id'])
                 if not itm:
                     continue
-                meals.append({
-                    "meal": e.get('meal', 3),
-                    "item": itm,
-                    "color": palette.get(itm['itm_id'], "#7aa2f7"),
-                })
+                meals.append({"meal": e.get('meal', 3), "item": itm})
 
             cells.append({"day": d, "meals": meals})
 
+    # Meal colors are derived from itm_id in the template/CSS (see index.html)
     return cells
 
 
@@ -304,35 +698,34 @@ def index(year, month):
     if not year or not month:
         year, month = today.year, today.month
 
-    # Load current user's generated_menu
-    conn = create_connection(db_file)
-    try:
-        user = fetch_one(conn, 'SELECT * FROM "User" WHERE email = ?', (session.get("Email"),))
-    finally:
-        close_connection(conn)
+    # Load current user's generated_menu (cached until the next write to "User")
+    user = _current_user_row()
 
     if not user:
         return redirect(url_for("logout"))
 
-    gen_str = user[9] if len(user) > 9 else ""
-    gen_map = parse_generated_menu(gen_str)
+    gen_str = user["generated_menu"] or ""
+    gen_map = _parse_generated_menu_cached(gen_str)
+
+    today_iso = f"{today.year:04d}-{today.month:02d}-{today.day:02d}"
 
-    # All item ids referenced (for the whole plan)
-    all_item_ids = sorted({e['itm_id'] for entries in gen_map.values() for e in entries})
+    # Only item ids referenced in the visible month (plus today, which may lie outside it)
+    month_prefix = f"{year:04d}-{month:02d}-"
+    all_item_ids = {e['itm_id'] for d, entries in gen_map.items()
+                    if d.startswith(month_prefix) or d == today_iso for e in entries}
     items_by_id = fetch_menu_items_by_ids(all_item_ids)
 
     # Build cells for the month
     cells = build_calendar_cells(gen_map, year, month, items_by_id)
 
     # Build "today_menu" (Breakfast, Lunch, Dinner if present)
-    today_iso = f"{today.year:04d}-{today.month:02d}-{today.day:02d}"
     today_entries = sorted(gen_map.get(today_iso, []), key=lambda e: e.get('meal', 3))
     today_menu = []
     for e in today_entries:
         item = items_by_id.get(e['itm_id'])
         if item:
             # expose 'meal' and the full item dict to the template
-            today_menu.append(type("TodayEntry", (), {"meal": e['meal'], "item": item}))
+            today_menu.append(TodayEntry(meal=e['meal'], item=item))
 
     # prev/next month nav (unchanged)
     cur = date(year, month, 15)
@@ -370,24 +763,30 @@ def login():
         email = (request.form.get("email") or "").strip().lower()
         password = request.form.get("password") or ""
 
-        conn = create_connection(db_file)
-        try:
-            user = fetch_one(conn, 'SELECT * FROM "User" WHERE email = ?', (email,))
-        finally:
-            close_connection(conn)
-
-        if user and check_password_hash(user[5], password):
-            session["usr_id"] = user[0] 
-            session["Fname"] = user[1]
-            session["Lname"] = user[2]
-            session["Username"] = user[1] + " " + user[2]
+        conn = get_db()
+        user = fetch_one(conn, '''
+            SELECT usr_id, first_name, last_name, phone, password_HS, wallet,
+                   preferences, allergies, generated_menu, is_admin
+            FROM "User" WHERE email = ?
+        ''', (email,))
+
+        if user and check_password_hash(user["password_HS"], password):
+            # Lazily upgrade legacy (e.g. PBKDF2) hashes while we have the plaintext
+            if not user["password_HS"].startswith(_PASSWORD_HASH_METHOD.split(":")[0] + ":"):
+                execute_write(conn, 'UPDATE "User" SET password_HS = ? WHERE usr_id = ?',
+                              (generate_password_hash(password, method=_PASSWORD_HASH_METHOD), user["usr_id"]))
+                _bump_user_generation()
+            session["usr_id"] = user["usr_id"]
+            session["Fname"] = user["first_name"]
+            session["Lname"] = user["last_name"]
+            session["Username"] = user["first_name"] + " " + user["last_name"]
             session["Email"] = email
-            session["Phone"] = user[4]
-            session["Wallet"] = user[6]
-            session["Preferences"] = user[7] if len(user) > 7 else ""
-            session["Allergies"] = user[8] if len(user) > 8 else ""
-            session["GeneratedMenu"] = user[9] if len(user) > 9 else ""
-            session["is_admin"] = bool(user[10]) if len(user) > 10 else False
+            session["Phone"] = user["phone"]
+            session["Wallet"] = user["wallet"]
+            session["Preferences"] = user["preferences"]
+            session["Allergies"] = user["allergies"]
+            session["GeneratedMenu"] = user["generated_menu"]
+            session["is_admin"] = bool(user["is_admin"])
             session.permanent = True
             app.permanent_session_lifetime = timedelta(minutes=30)
             return redirect(url_for("index"))
@@ -404,8 +803,7 @@ def logout():
     Returns:
         Response: Redirect to the login route.
     """
-    for k in ["Username","Fname","Lname","Email","Phone","Wallet","Preferences","Allergies","GeneratedMenu","is_admin","usr_id"]:
-        session.pop(k, None)
+    session.clear()
     return redirect(url_for("login"))
 
 # Registration route
@@ -431,27 +829,27 @@ def register():
         # Basic validations
         if not fname or not lname:
             return render_template('register.html', error="First and last name are required")
-        if not email or not re.match(r"^[^@]+@[^@]+\.[^@]+$", email):
+        if not email or not _EMAIL_RE.match(email):
             return render_template('register.html', error="Please enter a valid email address")
         if password != confirm_password:
             return render_template('register.html', error="Passwords do not match")
         if len(password) < 6:
             return render_template('register.html', error="Password must be at least 6 characters")
 
-        digits_only = re.sub(r"\D+", "", phone)
+        digits_only = _NONDIGIT_RE.sub("", phone)
         if len(digits_only) < 7:
             return render_template('register.html', error="Please enter a valid phone number")
 
-        conn = create_connection(db_file)
+        conn = get_db()
         try:
             exists = fetch_one(conn, 'SELECT 1 FROM "User" WHERE email = ?', (email,))
             if exists:
                 return render_template('register.html', error="Email already registered")
 
-            password_hashed = generate_password_hash(password)
+            password_hashed = generate_password_hash(password, method=_PASSWORD_HASH_METHOD)
 
             # Insert WITHOUT generated_menu (your LLM will populate it later)
-            execute_query(
+            execute_write(
                 conn,
                 """
                 INSERT INTO "User"
@@ -461,10 +859,9 @@ def register():
                 """,
                 (fname, lname, email, digits_only, password_hashed, 0, preferences, allergies)
             )
+            _bump_user_generation()
         except IntegrityError:
             return render_template('register.html', error="Email already registered")
-        finally:
-            close_connection(conn)
 
         return redirect(url_for('login'))
 
@@ -489,7 +886,6 @@ def profile():
     if not email:
         return redirect(url_for('logout'))
 
-    import json
     from datetime import datetime
 
     def _fmt_date(iso_str: str) -> str:
@@ -508,114 +904,113 @@ def profile():
         except Exception:
             return ""
 
-    conn = create_connection(db_file)
-    try:
-        row = fetch_one(conn, 'SELECT usr_id,first_name,last_name,email,phone,password_HS,wallet,preferences,allergies FROM "User" WHERE email = ?', (email,))
-        if not row:
-            return redirect(url_for('logout'))
-
-        user = {
-            "usr_id":        row[0],
-            "first_name":    row[1],
-            "last_name":     row[2],
-            "email":         row[3],
-            "phone":         row[4],
-            "password_HS":   row[5],
-            "wallet":        (row[6] or 0) / 100.0,
-            "preferences":   row[7] or "",
-            "allergies":     row[8] or "",
-        }
+    conn = get_db()
+    row = fetch_one(conn, 'SELECT usr_id,first_name,last_name,email,phone,password_HS,wallet,preferences,allergies FROM "User" WHERE email = ?', (email,))
+    if not row:
+        return redirect(url_for('logout'))
 
-        session['usr_id'] = user["usr_id"]
+    user = {
+        "usr_id":        row["usr_id"],
+        "first_name":    row["first_name"],
+        "last_name":     row["last_name"],
+        "email":         row["email"],
+        "phone":         row["phone"],
+        "password_HS":   row["password_HS"],
+        "wallet":        (row["wallet"] or 0) / 100.0,
+        "preferences":   row["preferences"] or "",
+        "allergies":     row["allergies"] or "",
+    }
 
-        # Pull orders for this user; details is JSON we will parse
-        order_rows = fetch_all(
-            conn,
-            '''
-            SELECT o.ord_id, o.details, o.status, r.name, r.rtr_id
-            FROM "Order" o
-            JOIN "Restaurant" r ON o.rtr_id = r.rtr_id
-            WHERE o.usr_id = ?
-            ORDER BY o.ord_id DESC
-            ''',
-            (user["usr_id"],)
-        )
+    session['usr_id'] = user["usr_id"]
+
+    # Pull orders for this user. placed_at/total_cents are written at insert time;
+    # rows predating those columns fall back to extracting the fields from details
+    # (malformed JSON yields NULLs instead of failing the query)
+    order_rows = fetch_all(
+        conn,
+        '''
+        SELECT o.ord_id, o.status, r.name, r.rtr_id,
+               COALESCE(o.placed_at, CASE WHEN json_valid(o.details) THEN
+                   COALESCE(NULLIF(json_extract(o.details, '$.placed_at'), ''),
+                            json_extract(o.details, '$.time'))
+               END) AS placed_at,
+               COALESCE(o.total_cents / 100.0, CASE WHEN json_valid(o.details) THEN
+                   COALESCE(NULLIF(json_extract(o.details, '$.charges.total'), 0),
+                            NULLIF(json_extract(o.details, '$.charges.grand_total'), 0),
+                            json_extract(o.details, '$.charges.amount'))
+               END) AS total
+        FROM "Order" o
+        JOIN "Restaurant" r ON o.rtr_id = r.rtr_id
+        WHERE o.usr_id = ?
+        ORDER BY o.ord_id DESC
+        ''',
+        (user["usr_id"],)
+    )
 
-        # Fetch all existing restaurant reviews for this user in one go
-        reviewed_restaurant_rows = fetch_all(conn, 'SELECT DISTINCT rtr_id FROM "Review" WHERE usr_id = ?', (user["usr_id"],))
-        reviewed_rtr_ids = {r[0] for r in reviewed_restaurant_rows}
-
-        orders = []
-        for ord_id, details, status, r_name, rtr_id in order_rows:
-            placed = ""
-            total = ""
-            if details:
-                try:
-                    j = json.loads(details)
-                    placed = _fmt_date(j.get("placed_at") or j.get("time"))
-                    charges = j.get("charges") or {}
-                    total_val = charges.get("total") or charges.get("grand_total") or charges.get("amount")
-                    total = _fmt_total(total_val) if total_val is not None else ""
-                except Exception:
-                    pass
-
-            # New logic to determine reviewability (Delivered AND Restaurant not yet reviewed)
-            is_delivered = (status or "").lower() == OrderStatus.ORDERED.get_lowercase()
-            is_reviewed = rtr_id in reviewed_rtr_ids
-            is_reviewable = is_delivered and not is_reviewed
-
-            # If reviewable, add the restaurant to the set so subsequent orders from it are marked as 'Reviewed'
-            if is_reviewable:
-                 reviewed_rtr_ids.add(rtr_id)
-            # Re-check the reviewed status after the potential update. This handles orders from the same restaurant correctly.
-            is_reviewed_final = rtr_id in reviewed_rtr_ids and not is_reviewable
-
-            orders.append({
-                "id": ord_id,
-                "date": placed,
-                "status": status or "",
-                "restaurant": r_name,
-                "rtr_id": rtr_id,
-                "total": total,
-                "is_reviewable": is_reviewable,
-                "is_reviewed": is_reviewed_final # <-- CORRECTED: Use the final state for display
-            })
+    # Fetch all existing restaurant reviews for this user in one go
+    reviewed_restaurant_rows = fetch_all(conn, 'SELECT DISTINCT rtr_id FROM "Review" WHERE usr_id = ?', (user["usr_id"],))
+    reviewed_rtr_ids = {r[0] for r in reviewed_restaurant_rows}
+
+    orders = []
+    for ord_id, status, r_name, rtr_id, placed_at, total_val in order_rows:
+        placed = _fmt_date(placed_at)
+        total = _fmt_total(total_val) if total_val is not None else ""
+
+        # New logic to determine reviewability (Delivered AND Restaurant not yet reviewed)
+        is_delivered = (status or "").lower() == OrderStatus.ORDERED.get_lowercase()
+        is_reviewed = rtr_id in reviewed_rtr_ids
+        is_reviewable = is_delivered and not is_reviewed
+
+        # If reviewable, add the restaurant to the set so subsequent orders from it are marked as 'Reviewed'
+        if is_reviewable:
+             reviewed_rtr_ids.add(rtr_id)
+        # Re-check the reviewed status after the potential update. This handles orders from the same restaurant correctly.
+        is_reviewed_final = rtr_id in reviewed_rtr_ids and not is_reviewable
+
+        orders.append({
+            "id": ord_id,
+            "date": placed,
+            "status": status or "",
+            "restaurant": r_name,
+            "rtr_id": rtr_id,
+            "total": total,
+            "is_reviewable": is_reviewable,
+            "is_reviewed": is_reviewed_final # <-- CORRECTED: Use the final state for display
+        })
 
-        # Fetch user's support tickets with order details
-        # Join with Order table to get order information
-        # Sort by created_at descending (newest first)
-        ticket_rows = fetch_all(
-            conn,
-            '''
-            SELECT t.ticket_id, t.ord_id, t.message, t.response, t.status, 
-                   t.created_at, t.updated_at, o.details
-            FROM Ticket t
-            JOIN "Order" o ON t.ord_id = o.ord_id
-            WHERE t.usr_id = ?
-            ORDER BY t.created_at DESC
-            ''',
-            (user["usr_id"],)
-        )
+    # Fetch user's support tickets with order details
+    # Join with Order table to get order information
+    # Sort by created_at descending (newest first)
+    ticket_rows = fetch_all(
+        conn,
+        '''
+        SELECT t.ticket_id, t.ord_id, t.message, t.response, t.status,
+               t.created_at, t.updated_at
+        FROM Ticket t
+        JOIN "Order" o ON t.ord_id = o.ord_id
+        WHERE t.usr_id = ?
+        ORDER BY t.created_at DESC
+        ''',
+        (user["usr_id"],)
+    )
 
-        # Build tickets list
-        tickets = []
-        for ticket_row in ticket_rows:
-            ticket_id, ord_id, message, response, status, created_at, updated_at, order_details = ticket_row
-            
-            # Format the created_at timestamp
-            formatted_created = _fmt_date(created_at) if created_at else ""
-            
-            tickets.append({
-                "ticket_id": ticket_id,
-                "ord_id": ord_id,
-                "message": message,
-                "response": response,
-                "status": status,
-                "created_at": formatted_created,
-                "updated_at": updated_at
-            })
-    finally:
-        close_connection(conn)
+    # Build tickets list
+    tickets = []
+    for ticket_row in ticket_rows:
+        ticket_id, ord_id, message, response, status, created_at, updated_at = ticket_row
+        
+        # Format the created_at timestamp
+        formatted_created = _fmt_date(created_at) if created_at else ""
+        
+        tickets.append({
+            "ticket_id": ticket_id,
+            "ord_id": ord_id,
+            "message": message,
+            "response": response,
+            "status": status,
+            "created_at": formatted_created,
+            "updated_at": updated_at
+        })
 
     pw_updated = request.args.get('pw_updated')
     pw_error   = request.args.get('pw_error')
@@ -646,27 +1041,24 @@ def edit_profile():
     if not usr_id:
         return redirect(url_for('logout'))
 
-    conn = create_connection(db_file)
-    try:
-        row = fetch_one(conn, '''
-            SELECT usr_id, first_name, last_name, email, phone, wallet, preferences, allergies
-            FROM "User" WHERE usr_id = ?
-        ''', (usr_id,))
-    finally:
-        close_connection(conn)
+    conn = get_db()
+    row = fetch_one(conn, '''
+        SELECT usr_id, first_name, last_name, email, phone, wallet, preferences, allergies
+        FROM "User" WHERE usr_id = ?
+    ''', (usr_id,))
 
     if not row:
         return redirect(url_for('logout'))
 
     user = {
-        "usr_id": row[0],
-        "first_name": row[1],
-        "last_name": row[2],
-        "email": row[3],
-        "phone": row[4],
-        "wallet": (row[5] or 0) / 100.0,
-        "preferences": row[6] or "",
-        "allergies": row[7] or "",
+        "usr_id": row["usr_id"],
+        "first_name": row["first_name"],
+        "last_name": row["last_name"],
+        "email": row["email"],
+        "phone": row["phone"],
+        "wallet": (row["wallet"] or 0) / 100.0,
+        "preferences": row["preferences"] or "",
+        "allergies": row["allergies"] or "",
     }
 
     # For now just render an edit form (you can build edit_profile.html)
@@ -677,15 +1069,13 @@ def edit_profile():
         new_prefs = request.form.get('preferences') or user['preferences']
         new_allergies = request.form.get('allergies') or user['allergies']
 
-        conn = create_connection(db_file)
-        try:
-            execute_query(conn, '''
-                UPDATE "User"
-                SET phone = ?, preferences = ?, allergies = ?
-                WHERE usr_id = ?
-            ''', (new_phone, new_prefs, new_allergies, usr_id))
-        finally:
-            close_connection(conn)
+        conn = get_db()
+        execute_write(conn, '''
+            UPDATE "User"
+            SET phone = ?, preferences = ?, allergies = ?
+            WHERE usr_id = ?
+        ''', (new_phone, new_prefs, new_allergies, usr_id))
+        _bump_user_generation()
 
         # Refresh session values
         session['Phone'] = new_phone
@@ -715,15 +1105,11 @@ def change_password():
         email = session.get('Email')
         if not email:
             return redirect(url_for('logout'))
-        conn = create_connection(db_file)
-        try:
-            row = fetch_one(conn, 'SELECT usr_id FROM "User" WHERE email = ?', (email,))
-            if not row:
-                return redirect(url_for('logout'))
-            usr_id = row[0]
-            session['usr_id'] = usr_id
-        finally:
-            close_connection(conn)
+        row = _current_user_row()
+        if not row:
+            return redirect(url_for('logout'))
+        usr_id = row[0]
+        session['usr_id'] = usr_id
 
     # Read form fields
     current_password = (request.form.get('current_password') or '').strip()
@@ -741,23 +1127,21 @@ def change_password():
         return redirect(url_for('profile', pw_error='same_as_current'))
 
     # Verify current hash & update to new hash
-    conn = create_connection(db_file)
-    try:
-        row = fetch_one(conn, 'SELECT password_HS FROM "User" WHERE usr_id = ?', (usr_id,))
-        if not row:
-            return redirect(url_for('logout'))
+    conn = get_db()
+    row = fetch_one(conn, 'SELECT password_HS FROM "User" WHERE usr_id = ?', (usr_id,))
+    if not row:
+        return redirect(url_for('logout'))
 
-        stored_hash = row[0]
-        if not check_password_hash(stored_hash, current_password):
-            # wrong current password
-            return redirect(url_for('profile', pw_error='incorrect_current'))
+    stored_hash = row[0]
+    if not check_password_hash(stored_hash, current_password):
+        # wrong current password
+        return redirect(url_for('profile', pw_error='incorrect_current'))
 
-        # All good → update
-        new_hash = generate_password_hash(new_password)
-        execute_query(conn, 'UPDATE "User" SET password_HS = ? WHERE usr_id = ?', (new_hash, usr_id))
+    # All good → update
+    new_hash = generate_password_hash(new_password, method=_PASSWORD_HASH_METHOD)
+    execute_write(conn, 'UPDATE "User" SET password_HS = ? WHERE usr_id = ?', (new_hash, usr_id))
+    _bump_user_generation()
 
-    finally:
-        close_connection(conn)
 
     # Success
     return redirect(url_for('profile', pw_updated=1))
@@ -782,21 +1166,18 @@ def wallet_topup():
 
     usr_id = session['usr_id']
     
-    conn = create_connection(db_file)
-    try:
-        # Atomically update the user's wallet balance
-        success = _execute_transaction(conn, [
-            ('UPDATE "User" SET wallet = wallet + ? WHERE usr_id = ?', (amount_cents, usr_id))
-        ])
+    conn = get_db()
+    # Atomically update the user's wallet balance
+    success = _execute_transaction(conn, [
+        ('UPDATE "User" SET wallet = wallet + ? WHERE usr_id = ?', (amount_cents, usr_id))
+    ])
 
-        if success:
-            # Refresh session and redirect
-            session['Wallet'] = session['Wallet'] + amount_cents
-            return redirect(url_for('profile', wallet_updated='topup'))
-        else:
-            return redirect(url_for('profile', wallet_error='db_failed'))
-    finally:
-        close_connection(conn)
+    if success:
+        # Refresh session and redirect
+        session['Wallet'] = session['Wallet'] + amount_cents
+        return redirect(url_for('profile', wallet_updated='topup'))
+    else:
+        return redirect(url_for('profile', wallet_error='db_failed'))
 
 
 @app.route('/profile/wallet/gift', methods=['POST'])
@@ -821,38 +1202,35 @@ def wallet_gift():
     if recipient_email == session.get('Email'):
         return redirect(url_for('profile', wallet_error='self_gift'))
 
-    conn = create_connection(db_file)
-    try:
-        # 1. Get sender's current balance and recipient's ID
-        sender = fetch_one(conn, 'SELECT wallet FROM "User" WHERE usr_id = ?', (sender_id,))
-        recipient = fetch_one(conn, 'SELECT usr_id FROM "User" WHERE email = ?', (recipient_email,))
-
-        if not sender or not recipient:
-            return redirect(url_for('profile', wallet_error='recipient_not_found'))
-
-        sender_balance = sender[0] or 0
-        recipient_id = recipient[0]
-
-        if sender_balance < amount_cents:
-            return redirect(url_for('profile', wallet_error='insufficient_funds'))
-
-        # 2. Prepare the atomic transaction (two steps: debit and credit)
-        queries_and_params = [
-            # Debit sender
-            ('UPDATE "User" SET wallet = wallet - ? WHERE usr_id = ?', (amount_cents, sender_id)),
-            # Credit recipient
-            ('UPDATE "User" SET wallet = wallet + ? WHERE usr_id = ?', (amount_cents, recipient_id))
-        ]
-
-        # 3. Execute the atomic transaction
-        if _execute_transaction(conn, queries_and_params):
-            # Refresh sender's session wallet value
-            session['Wallet'] = session['Wallet'] - amount_cents
-            return redirect(url_for('profile', wallet_updated='gift'))
-        else:
-            return redirect(url_for('profile', wallet_error='db_failed'))
-    finally:
-        close_connection(conn)
+    conn = get_db()
+    # 1. Get sender's current balance and recipient's ID
+    sender = fetch_one(conn, 'SELECT wallet FROM "User" WHERE usr_id = ?', (sender_id,))
+    recipient = fetch_one(conn, 'SELECT usr_id FROM "User" WHERE email = ?', (recipient_email,))
+
+    if not sender or not recipient:
+        return redirect(url_for('profile', wallet_error='recipient_not_found'))
+
+    sender_balance = sender[0] or 0
+    recipient_id = recipient[0]
+
+    if sender_balance < amount_cents:
+        return redirect(url_for('profile', wallet_error='insufficient_funds'))
+
+    # 2. Prepare the atomic transaction (two steps: debit and credit)
+    queries_and_params = [
+        # Debit sender
+        ('UPDATE "User" SET wallet = wallet - ? WHERE usr_id = ?', (amount_cents, sender_id)),
+        # Credit recipient
+        ('UPDATE "User" SET wallet = wallet + ? WHERE usr_id = ?', (amount_cents, recipient_id))
+    ]
+
+    # 3. Execute the atomic transaction
+    if _execute_transaction(conn, queries_and_params):
+        # Refresh sender's session wallet value
+        session['Wallet'] = session['Wallet'] - amount_cents
+        return redirect(url_for('profile', wallet_updated='gift'))
+    else:
+        return redirect(url_for('profile', wallet_error='db_failed'))
 
 # Review Submission Route (Restaurant-Level)
 @app.route('/review/submit', methods=['POST'])
@@ -861,7 +1239,7 @@ def submit_review():
     if session.get('usr_id') is None:
         return jsonify({"ok": False, "error": "Unauthorized"}), 401
 
-    conn = create_connection(db_file)
+    conn = get_db()
     try:
         data = request.get_json()
         usr_id = session['usr_id']
@@ -884,7 +1262,7 @@ def submit_review():
             return jsonify({"ok": False, "error": "Restaurant already reviewed"}), 409
 
         # 3. Insert the review into the existing Review table structure
-        execute_query(
+        execute_write(
             conn,
             '''
             INSERT INTO "Review" (rtr_id, usr_id, title, rating, description)
@@ -897,8 +1275,6 @@ def submit_review():
     except Exception as e:
         print(f"Review Submission Error: {e}")
         return jsonify({"ok": False, "error": "Server error during submission"}), 500
-    finally:
-        close_connection(conn)
 
 # Order route (Calendar "Order" button target)
 @app.route('/order', methods=['GET', 'POST'])
@@ -917,15 +1293,11 @@ def order():
     # Resolve usr_id strictly
     usr_id = session.get("usr_id")
     if not usr_id:
-        conn = create_connection(db_file)
-        try:
-            row = fetch_one(conn, 'SELECT usr_id FROM "User" WHERE email = ?', (session.get('Email'),))
-            if not row:
-                return redirect(url_for("logout"))
-            usr_id = row[0]
-            session["usr_id"] = usr_id
-        finally:
-            close_connection(conn)
+        row = _current_user_row()
+        if not row:
+            return redirect(url_for("logout"))
+        usr_id = row["usr_id"]
+        session["usr_id"] = usr_id
 
     # ---- POST JSON: place a single order containing ALL items in the restaurant group ----
     if request.method == 'POST' and request.is_json:
@@ -951,17 +1323,14 @@ def order():
         if not itm_ids:
             return jsonify({"ok": False, "error": "no_items"}), 400
 
-        conn = create_connection(db_file)
-        try:
-            qmarks = ",".join(["?"] * len(itm_ids))
-            rows = fetch_all(conn, f'''
-                SELECT m.itm_id, m.rtr_id, m.name, m.price, r.name
-                FROM "MenuItem" m
-                JOIN "Restaurant" r ON r.rtr_id = m.rtr_id
-                WHERE m.itm_id IN ({qmarks})
-            ''', tuple(itm_ids))
-        finally:
-            close_connection(conn)
+        conn = get_db()
+        qmarks, params = _in_placeholders(itm_ids)
+        rows = fetch_all(conn, f'''
+            SELECT m.itm_id, m.rtr_id, m.name, m.price, r.name
+            FROM "MenuItem" m
+            JOIN "Restaurant" r ON r.rtr_id = m.rtr_id
+            WHERE m.itm_id IN ({qmarks})
+        ''', params)
 
         # Validate that all items belong to the same restaurant
         if not rows:
@@ -977,43 +1346,32 @@ def order():
 
         # Build items array for details; compute charges
         detail_items = []
-        subtotal = 0.0
+        subtotal_cents = 0
         for it in items_in:
             iid = int(it.get("itm_id"))
             qty = int(it.get("qty") or 1)
             if qty <= 0: qty = 1
             meta = dbmap[iid]
-            unit_price = _cents_to_dollars(meta["price_cents"])
-            line_total = _money(unit_price * qty)
-            subtotal = _money(subtotal + line_total)
+            line_cents = int(meta["price_cents"]) * qty
+            subtotal_cents += line_cents
             detail_items.append({
                 "itm_id": iid,
                 "name": meta["name"],
                 "qty": qty,
-                "unit_price": unit_price,
-                "line_total": line_total,
+                "unit_price": meta["price_cents"] / 100,
+                "line_total": line_cents / 100,
                 **({"notes": (it.get("notes") or "")} if it.get("notes") else {})
             })
 
-        tax = _money(subtotal * 0.0725)
-        delivery_fee = 3.99 if delivery_type == "delivery" else 0.00
-        service_fee = 1.49
-        total = _money(subtotal + tax + delivery_fee + service_fee + tip_dollars)
+        charges, total_cents = _order_charges(subtotal_cents, delivery_type, tip_dollars)
 
-        placed_iso = datetime.now().astimezone().isoformat()
+        placed_iso = _local_now().isoformat(timespec="seconds")
 
         details = {
             "placed_at": placed_iso,
             "restaurant_id": int(rtr_id),
             "items": detail_items,
-            "charges": {
-                "subtotal": subtotal,
-                "tax": tax,
-                "delivery_fee": delivery_fee,
-                "service_fee": service_fee,
-                "tip": tip_dollars,
-                "total": total
-            },
+            "charges": charges,
             "delivery_type": delivery_type,
             "eta_minutes": int(eta_minutes),
             "date": iso_date,
@@ -1021,7 +1379,6 @@ def order():
         }
 
         # Handle amount being debited from user's wallet
-        total_cents = _dollars_to_cents(total)
         user_wallet_cents = session.get('Wallet', 0)
 
         # Quick check based on session to prevent unnecessary transaction attempt
@@ -1029,7 +1386,7 @@ def order():
             return jsonify({"ok": False, "error": "insufficient_funds"}), 402
 
         # Insert the single order row with status "Ordered" AND debit the wallet atomically
-        conn = create_connection(db_file)
+        # (same connection that validated the items above)
         new_ord_id = None
         try:
             # 1. Prepare queries for atomic transaction: Debit wallet AND Insert order
@@ -1037,14 +1394,15 @@ def order():
                 # Debit the wallet, using the WHERE clause as an optimistic check against race conditions
                 ('UPDATE "User" SET wallet = wallet - ? WHERE usr_id = ? AND wallet >= ?', (total_cents, usr_id, total_cents)),
                 # Insert the new order
-                ('INSERT INTO "Order" (rtr_id, usr_id, details, status) VALUES (?, ?, ?, ?)', (rtr_id, usr_id, json.dumps(details), OrderStatus.ORDERED.value))
+                ('INSERT INTO "Order" (rtr_id, usr_id, details, status, placed_at, total_cents) VALUES (?, ?, ?, ?, ?, ?)',
+                 (rtr_id, usr_id, _json_dumps(details), OrderStatus.ORDERED.value, placed_iso, total_cents))
             ]
 
-            if _execute_transaction(conn, queries_and_params):
+            cur = _execute_transaction(conn, queries_and_params)
+            if cur is not None:
                 # Transaction succeeded. Wallet debited and order inserted.
-                # Get the order ID.
-                row = fetch_one(conn, 'SELECT ord_id FROM "Order" WHERE usr_id = ? ORDER BY ord_id DESC LIMIT 1', (usr_id,))
-                new_ord_id = row[0] if row else None
+                # The INSERT ran last, so the cursor holds the new order ID.
+                new_ord_id = cur.lastrowid
 
                 # Update session wallet to reflect the debit
                 session['Wallet'] = user_wallet_cents - total_cents
@@ -1065,28 +1423,12 @@ def order():
             print(f"Order Placement Error: {e}")
             return jsonify({"ok": False, "error": "server_error"}), 500
 
-        finally:
-            close_connection(conn)
 
         if new_ord_id is None:
              return jsonify({"ok": False, "error": "order_id_missing"}), 500
         
         return jsonify({"ok": True, "ord_id": new_ord_id})
 
-        # Insert the single order row with status "Ordered"
-        conn = create_connection(db_file)
-        try:
-            execute_query(conn, '''
-                INSERT INTO "Order" (rtr_id, usr_id, details, status)
-                VALUES (?, ?, ?, ?)
-            ''', (rtr_id, usr_id, json.dumps(details), OrderStatus.ORDERED.value))
-            row = fetch_one(conn, 'SELECT last_insert_rowid()')
-            new_ord_id = row[0] if row else None
-        finally:
-            close_connection(conn)
-
-        return jsonify({"ok": True, "ord_id": new_ord_id})
-
     # ---- (optional) legacy GET single-item path, kept for compatibility ----
     # If you don't need this anymore, you can remove the whole GET section.
     # Expect query: itm_id, qty, notes, delivery, tip, eta, date, meal
@@ -1117,63 +1459,45 @@ def order():
     notes = (request.args.get("notes") or "").strip()
 
     # Look up item & restaurant strictly
-    conn = create_connection(db_file)
-    try:
-        mi = fetch_one(conn, '''
-            SELECT m.itm_id, m.rtr_id, m.name, m.price, r.name
-            FROM "MenuItem" m
-            JOIN "Restaurant" r ON r.rtr_id = m.rtr_id
-            WHERE m.itm_id = ?
-        ''', (itm_id,))
-    finally:
-        close_connection(conn)
+    conn = get_db()
+    mi = fetch_one(conn, '''
+        SELECT m.itm_id, m.rtr_id, m.name, m.price, r.name
+        FROM "MenuItem" m
+        JOIN "Restaurant" r ON r.rtr_id = m.rtr_id
+        WHERE m.itm_id = ?
+    ''', (itm_id,))
     if not mi:
         return redirect(url_for("orders"))
 
     item_id, rtr_id, item_name, price_cents, restaurant_name = mi
-    unit_price = _cents_to_dollars(price_cents)
-    line_total = _money(unit_price * qty)
+    line_cents = int(price_cents or 0) * qty
+    charges, total_cents = _order_charges(line_cents, delivery_type, tip_dollars)
 
-    tax = _money(line_total * 0.0725)
-    delivery_fee = 3.99 if delivery_type == "delivery" else 0.00
-    service_fee = 1.49
-    total = _money(line_total + tax + delivery_fee + service_fee + tip_dollars)
+    placed_iso = _local_now().isoformat(timespec="seconds")
 
     details = {
-        "placed_at": datetime.now().astimezone().isoformat(),
+        "placed_at": placed_iso,
         "restaurant_id": int(rtr_id),
         "items": [{
             "itm_id": int(item_id),
             "name": item_name,
             "qty": int(qty),
-            "unit_price": unit_price,
-            "line_total": line_total,
+            "unit_price": (price_cents or 0) / 100,
+            "line_total": line_cents / 100,
             **({"notes": notes} if notes else {})
         }],
-        "charges": {
-            "subtotal": line_total,
-            "tax": tax,
-            "delivery_fee": delivery_fee,
-            "service_fee": service_fee,
-            "tip": tip_dollars,
-            "total": total
-        },
+        "charges": charges,
         "delivery_type": delivery_type,
         "eta_minutes": int(eta_minutes),
         "date": iso_date,
         "meal": meal
     }
 
-    conn = create_connection(db_file)
-    try:
-        execute_query(conn, '''
-            INSERT INTO "Order" (rtr_id, usr_id, details, status)
-            VALUES (?, ?, ?, ?)
-        ''', (rtr_id, usr_id, json.dumps(details), OrderStatus.ORDERED.value))
-        row = fetch_one(conn, 'SELECT last_insert_rowid()')
-        new_ord_id = row[0] if row else None
-    finally:
-        close_connection(conn)
+    cur = execute_write(conn, '''
+        INSERT INTO "Order" (rtr_id, usr_id, details, status, placed_at, total_cents)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (rtr_id, usr_id, _json_dumps(details), OrderStatus.ORDERED.value, placed_iso, total_cents))
+    new_ord_id = cur.lastrowid if cur is not None else None
 
     return redirect(url_for("profile") + (f"?ordered={new_ord_id}" if new_ord_id else ""))
 
@@ -1190,61 +1514,19 @@ def orders():
     if session.get('Username') is None:
         return redirect(url_for('login'))
 
-    conn = create_connection(db_file)
-    try:
-        # Pull address fields too
-        restaurants = fetch_all(conn, 'SELECT rtr_id, name, address, city, state, zip FROM "Restaurant"')
-        menu_items = fetch_all(conn, '''
-            SELECT itm_id, rtr_id, name, price, calories, allergens, description
-            FROM "MenuItem"
-            WHERE instock IS NULL OR instock = 1
-        ''')
-    finally:
-        close_connection(conn)
-
-    def _addr(a, c, s, z) -> str:
-        """
-        Safely join address parts that might be None/ints.
-        Args:
-            a (Any): Street address.
-            c (Any): City.
-            s (Any): State/region.
-            z (Any): Zip/postal code.
-        Returns:
-            str: A single formatted address string.
-        """
-        parts_raw = [a, c, s, z]
-        parts = []
-        for p in parts_raw:
-            if p is None:
-                continue
-            # Coerce to string and strip
-            sp = str(p).strip()
-            if sp:
-                parts.append(sp)
-        return ", ".join(parts)
+    catalog = _catalog_snapshot(get_db())
 
-    rest_list = [{
-        "rtr_id": r[0],
-        "name": r[1],
-        "address": r[2] or "",
-        "city": r[3] or "",
-        "state": r[4] or "",
-        "zip": r[5] if r[5] is not None else "",
-        "address_full": _addr(r[2], r[3], r[4], r[5]),
-    } for r in restaurants]
-
-    item_list = [{
-        "itm_id":      m[0],
-        "rtr_id":      m[1],
-        "name":        m[2],
-        "price_cents": m[3] or 0,
-        "calories":    m[4] or 0,
-        "allergens":   m[5] or "",
-        "description": m[6] or "",
-    } for m in menu_items]
-
-    return render_template("orders.html", restaurants=rest_list, items=item_list)
+    # The page depends only on the catalog and the admin nav link, so browsers can
+    # revalidate it with If-None-Match and skip the render entirely on a match
+    etag = f"orders-{catalog.version}-{1 if session.get('is_admin') else 0}"
+    if request.if_none_match.contains(etag):
+        resp = app.response_class(status=304)
+    else:
+        resp = make_response(render_template("orders.html", restaurants=catalog.order_restaurants, items=catalog.items))
+    resp.set_etag(etag)
+    resp.cache_control.private = True
+    resp.cache_control.no_cache = True
+    return resp
 
 # Restaurants browse route
 @app.route('/restaurants')
@@ -1259,75 +1541,51 @@ def restaurants():
     if session.get('Username') is None:
         return redirect(url_for('login'))
 
-    conn = create_connection(db_file)
-    try:
-        restaurants = fetch_all(conn, 'SELECT rtr_id, name, description, phone, email, address, city, state, zip, hours, status FROM "Restaurant"')
-        menu_items = fetch_all(conn, '''
-            SELECT itm_id, rtr_id, name, price, calories, allergens, description
-            FROM "MenuItem"
-            WHERE instock IS NULL OR instock = 1
-        ''')
-        # Fetch all reviews, including the user's name for display
-        review_rows = fetch_all(conn, '''
-            SELECT 
-                r.rtr_id, r.rating, r.title, r.description, u.first_name, u.last_name
-            FROM "Review" r
-            JOIN "User" u ON r.usr_id = u.usr_id
-            ORDER BY r.rev_id DESC
-        ''')
-
-        reviews_by_rtr = defaultdict(lambda: {'total_rating': 0, 'count': 0, 'list': []})
-        for rtr_id, rating, title, description, first_name, last_name in review_rows:
-            reviews_by_rtr[rtr_id]['total_rating'] += rating
-            reviews_by_rtr[rtr_id]['count'] += 1
-            reviews_by_rtr[rtr_id]['list'].append({
-                "rating": rating,
-                "title": title,
-                "description": description,
-                "user_name": f"{first_name} {last_name}",
-            })
-    finally:
-        close_connection(conn)
-
-    def _addr(a, c, s, z) -> str:
-        parts_raw = [a, c, s, z]
-        parts = []
-        for p in parts_raw:
-            if p is None:
-                continue
-            sp = str(p).strip()
-            if sp:
-                parts.append(sp)
-        return ", ".join(parts)
+    conn = get_db()
+    catalog = _catalog_snapshot(conn)
+    # Fetch all reviews, including the user's name for display
+    review_rows = fetch_all(conn, '''
+        SELECT 
+            r.rtr_id, r.rating, r.title, r.description, u.first_name, u.last_name
+        FROM "Review" r
+        JOIN "User" u ON r.usr_id = u.usr_id
+        ORDER BY r.rev_id DESC
+    ''')
+
+    reviews_by_rtr = defaultdict(lambda: {'total_rating': 0, 'count': 0, 'list': []})
+    for rtr_id, rating, title, description, first_name, last_name in review_rows:
+        reviews_by_rtr[rtr_id]['total_rating'] += rating
+        reviews_by_rtr[rtr_id]['count'] += 1
+        reviews_by_rtr[rtr_id]['list'].append({
+            "rating": rating,
+            "title": title,
+            "description": description,
+            "user_name": f"{first_name} {last_name}",
+        })
 
+    # Reviews change per request, so they are merged onto copies of the cached dicts
     rest_list = [{
-        "rtr_id": r[0],
-        "name": r[1],
-        "description": r[2] or "",
-        "phone": r[3] or "",
-        "email": r[4] or "",
-        "address": r[5] or "",
-        "city": r[6] or "",
-        "state": r[7] or "",
-        "zip": r[8] if r[8] is not None else "",
-        "hours": r[9] or "",
-        "status": r[10] or "",
-        "address_full": _addr(r[5], r[6], r[7], r[8]),
-        # ADDED: Include the calculated review data in the list passed to the template
-        "reviews": reviews_by_rtr.get(r[0], {'total_rating': 0, 'count': 0, 'list': []})
-    } for r in restaurants]
-
-    item_list = [{
-        "itm_id":      m[0],
-        "rtr_id":      m[1],
-        "name":        m[2],
-        "price_cents": m[3] or 0,
-        "calories":    m[4] or 0,
-        "allergens":   m[5] or "",
-        "description": m[6] or "",
-    } for m in menu_items]
-
-    return render_template("restaurants.html", restaurants=rest_list, items=item_list)
+        **r,
+        "reviews": reviews_by_rtr.get(r["rtr_id"], {'total_rating': 0, 'count': 0, 'list': []})
+    } for r in catalog.restaurants]
+
+    return render_template("restaurants.html", restaurants=rest_list, items=catalog.items)
+
+# Every column the receipt prints; a change to any of them changes the cache key
+_SQL_RECEIPT_SOURCE = '''
+    SELECT o.usr_id, o.rtr_id, o.details, o.status,
+           u.first_name, u.last_name, u.email, u.phone,
+           r.name, r.address, r.city, r.state, r.zip, r.phone
+    FROM "Order" o
+    LEFT JOIN "User" u ON u.usr_id = o.usr_id
+    LEFT JOIN "Restaurant" r ON r.rtr_id = o.rtr_id
+    WHERE o.ord_id = ?
+'''
+
+# Rendered receipts keyed by (db path, ord_id, content hash), least recently used evicted
+_RECEIPT_CACHE_SIZE = 64
+_receipt_cache = OrderedDict()
+_receipt_lock = threading.Lock()
 
 # Order receipt PDF route
 @app.route('/orders/<int:ord_id>/receipt.pdf')
@@ -1343,33 +1601,56 @@ def order_receipt(ord_id: int):
     if session.get('Username') is None:
         return redirect(url_for('login'))
 
-    # Ensure the order belongs to the logged-in user
-    conn = create_connection(db_file)
-    try:
-        row = fetch_one(conn, 'SELECT usr_id FROM "Order" WHERE ord_id = ?', (ord_id,))
-        if not row:
-            abort(404)
-        if session.get('usr_id') and row[0] != session['usr_id']:
-            abort(403)
-        # If usr_id not in session (older sessions), compare via email
-        if not session.get('usr_id'):
-            # Resolve current user's usr_id by email
-            urow = fetch_one(conn, 'SELECT usr_id FROM "User" WHERE email = ?', (session.get('Email'),))
-            if not urow or urow[0] != row[0]:
-                abort(403)
-
-        pdf_bytes = generate_order_receipt_pdf(db_file, ord_id)  # returns bytes
-    finally:
-        close_connection(conn)
+    # Ensure the order belongs to the logged-in user; the same row (with everything
+    # else the receipt prints) also fingerprints the PDF for caching
+    conn = get_db()
+    row = fetch_one(conn, _SQL_RECEIPT_SOURCE, (ord_id,))
+    if not row:
+        abort(404)
+    # Older sessions lack usr_id; _session_usr_id falls back to the cached email lookup
+    if _session_usr_id() != row[0]:
+        abort(403)
+
+    version = hashlib.sha1(repr(tuple(row)).encode()).hexdigest()[:16]
+    etag = f"receipt-{ord_id}-{version}"
+    if request.if_none_match.contains(etag):
+        resp = app.response_class(status=304)
+        resp.set_etag(etag)
+        return resp
+
+    key = (db_file, ord_id, version)
+    with _receipt_lock:
+        pdf_bytes = _receipt_cache.get(key)
+        if pdf_bytes is not None:
+            _receipt_cache.move_to_end(key)
+    if pdf_bytes is None:
+        # Reuse this request's connection rather than opening another one
+        pdf_bytes = generate_order_receipt_pdf(conn, ord_id)  # returns bytes
+        with _receipt_lock:
+            _receipt_cache[key] = pdf_bytes
+            if len(_receipt_cache) > _RECEIPT_CACHE_SIZE:
+                _receipt_cache.popitem(last=False)
 
     return send_file(
         BytesIO(pdf_bytes),
         mimetype='application/pdf',
         as_attachment=True,
-        download_name=f'order_{ord_id}_receipt.pdf'
+        download_name=f'order_{ord_id}_receipt.pdf',
+        etag=etag,
     )
 
 # Database viewer route (uses helpers only)
+# Tables browsable at /db, with their (count, page) SQL built once so
+# every request reuses the same statement text
+_DB_VIEW_TABLES = sorted({'User', 'Restaurant', 'MenuItem', 'Order', 'Review'})
+_DB_VIEW_SQL = {
+    t: (
+        f'SELECT COUNT(*) FROM "{t}"',
+        f'SELECT * FROM "{t}" LIMIT ? OFFSET ?',
+    )
+    for t in _DB_VIEW_TABLES
+}
+
 @app.route('/db')
 def db_view():
     """
@@ -1382,10 +1663,10 @@ def db_view():
     if session.get('Username') is None:
         return redirect(url_for('login'))
 
-    allowed_tables = {'User', 'Restaurant', 'MenuItem', 'Order', 'Review'}
     table = request.args.get('t', 'User')
-    if table not in allowed_tables:
+    if table not in _DB_VIEW_SQL:
         table = 'User'
+    count_sql, page_sql = _DB_VIEW_SQL[table]
 
     try:
         page = int(request.args.get('page', 1))
@@ -1394,21 +1675,19 @@ def db_view():
     page = max(page, 1)
     per_page = 10
 
-    conn = create_connection(db_file)
-    try:
-        total_row = fetch_one(conn, f'SELECT COUNT(*) FROM "{table}"')
-        total = (total_row[0] if total_row else 0) or 0
-
-        pages = max(math.ceil(total / per_page), 1)
-        page = min(page, pages)
-        offset = (page - 1) * per_page
+    conn = get_db()
+    total_row = fetch_one(conn, count_sql)
+    total = (total_row[0] if total_row else 0) or 0
 
-        col_rows = fetch_all(conn, f'PRAGMA table_info("{table}")')
-        columns = [r[1] for r in col_rows] if col_rows else []
+    pages = max(math.ceil(total / per_page), 1)
+    page = min(page, pages)
+    offset = (page - 1) * per_page
 
-        rows = fetch_all(conn, f'SELECT * FROM "{table}" LIMIT ? OFFSET ?', (per_page, offset))
-    finally:
-        close_connection(conn)
+    # Column names come from the page query's own cursor (set even when no rows match),
+    # so no separate PRAGMA table_info round-trip is needed
+    cur = execute_read(conn, page_sql, (per_page, offset))
+    columns = [d[0] for d in cur.description] if cur else []
+    rows = cur.fetchall() if cur else []
 
     start = 0 if total == 0 else offset + 1
     end = min(offset + per_page, total)
@@ -1416,7 +1695,7 @@ def db_view():
     return render_template(
         'db_view.html',
         table=table,
-        allowed=sorted(allowed_tables),
+        allowed=_DB_VIEW_TABLES,
         columns=columns,
         rows=rows,
         page=page,
@@ -1438,7 +1717,7 @@ def generate_plan():
         return jsonify({"ok": False, "error": "Unauthorized"}), 401
 
     # 1. Fetch User Metadata (Preferences & Allergies)
-    conn = create_connection(db_file)
+    conn = get_db()
     try:
         user = fetch_one(conn, 'SELECT preferences, allergies, generated_menu FROM "User" WHERE email = ?', (session.get("Email"),))
         if not user:
@@ -1456,7 +1735,7 @@ def generate_plan():
         # 4. Generate Menu
         # We pass the stored 'prefs' directly. The MenuGenerator will filter items 
         # and prompt the LLM based on these existing tags.
-        new_menu_str = gen.update_menu(
+        new_menu_str = gen.plan_week(
             menu=current_menu, 
             preferences=prefs, 
             allergens=allergies, 
@@ -1466,7 +1745,8 @@ def generate_plan():
         )
 
         # 5. Save & Update Session
-        execute_query(conn, 'UPDATE "User" SET generated_menu = ? WHERE email = ?', (new_menu_str, session.get("Email")))
+        execute_write(conn, 'UPDATE "User" SET generated_menu = ? WHERE email = ?', (new_menu_str, session.get("Email")))
+        _bump_user_generation()
         session["GeneratedMenu"] = new_menu_str
         
         return jsonify({"ok": True})
@@ -1474,16 +1754,15 @@ def generate_plan():
     except Exception as e:
         print(f"Generation Error: {e}")
         return jsonify({"ok": False, "error": str(e)}), 500
-    finally:
-        close_connection(conn)
 
 @app.route('/admin/update_status', methods=['POST'])
 def admin_update_status():
     """
     Update the status of an order through the admin dashboard.
     
-    This endpoint validates the order exists, checks that the new status is valid,
-    and ensures the status transition follows the defined workflow rules.
+    This endpoint checks that the new status is valid, then applies it with a single
+    UPDATE whose WHERE clause enforces the workflow rules, so the transition check
+    and the write cannot race.
     
     Args:
         None (expects JSON body with ord_id and new_status)
@@ -1543,26 +1822,30 @@ def admin_update_status():
     if not OrderStatus.is_valid_status(new_status):
         return jsonify({"ok": False, "error": f"Invalid status: {new_status}"}), 400
     
-    # Fetch order and validate it exists
-    conn = create_connection(db_file)
+    # Update only if the order's current status may move to new_status
+    # (a missing status counts as "Ordered")
+    conn = get_db()
     try:
-        order_row = fetch_one(conn, 'SELECT ord_id, status FROM "Order" WHERE ord_id = ?', (ord_id,))
-        
-        if not order_row:
-            return jsonify({"ok": False, "error": "Order not found"}), 404
-        
-        current_status = order_row[1] or "Ordered"
+        qmarks, prev_params = _in_placeholders(OrderStatus.previous_statuses(new_status) or (None,))
+        cur = execute_write(conn, f'''
+            UPDATE "Order" SET status = ?
+            WHERE ord_id = ? AND COALESCE(status, 'Ordered') IN ({qmarks})
+            RETURNING ord_id
+        ''', (new_status, ord_id, *prev_params))
         
-        # Validate status transition
-        if not OrderStatus.is_valid_transition(current_status, new_status):
+        if cur is None or cur.fetchone() is None:
+            # Nothing updated: tell a missing order apart from a disallowed transition
+            order_row = fetch_one(conn, 'SELECT status FROM "Order" WHERE ord_id = ?', (ord_id,))
+            if not order_row:
+                return jsonify({"ok": False, "error": "Order not found"}), 404
+            if cur is None:
+                return jsonify({"ok": False, "error": "Internal server error"}), 500
+            current_status = order_row[0] or "Ordered"
             return jsonify({
                 "ok": False, 
                 "error": f"Invalid transition from {current_status} to {new_status}"
             }), 400
         
-        # Update order status
-        execute_query(conn, 'UPDATE "Order" SET status = ? WHERE ord_id = ?', (new_status, ord_id))
-        
         return jsonify({
             "ok": True,
             "ord_id": ord_id,
@@ -1572,8 +1855,6 @@ def admin_update_status():
     except Exception as e:
         print(f"Error updating order status: {e}")
         return jsonify({"ok": False, "error": "Internal server error"}), 500
-    finally:
-        close_connection(conn)
 
 @app.route('/admin')
 def admin_dashboard():
@@ -1602,8 +1883,6 @@ def admin_dashboard():
                              error="Access Denied", 
                              message="You do not have permission to access the admin dashboard."), 403
     
-    from datetime import datetime, timedelta
-    
     # Get page number from query parameter, default to 1
     try:
         page = int(request.args.get('page', 1))
@@ -1616,158 +1895,131 @@ def admin_dashboard():
     tickets_per_page = 20
     offset = (page - 1) * tickets_per_page
     
-    conn = create_connection(db_file)
-    try:
-        # Calculate date 7 days ago for filtering
-        seven_days_ago = (datetime.now() - timedelta(days=7)).isoformat()
+    conn = get_db()
+    # Calculate date 7 days ago for filtering
+    seven_days_ago = (datetime.now() - timedelta(days=7)).isoformat()
+    
+    # Fetch orders from the last 7 days with user and restaurant information.
+    # The window is applied in SQL against the indexed placed_at column, and the
+    # display timestamp and total come from the order summary columns. Orders
+    # without a placed_at/time are kept with a blank date, but not ones whose
+    # details are invalid JSON (json_valid is only evaluated for those rows).
+    order_rows = fetch_all(conn, '''
+        SELECT 
+            o.ord_id,
+            o.status,
+            u.first_name,
+            u.last_name,
+            r.name as restaurant_name,
+            COALESCE(replace(substr(o.placed_at, 1, 16), 'T', ' '), '') as placed_at_display,
+            o.total_cents / 100.0 as total
+        FROM "Order" o
+        JOIN "User" u ON o.usr_id = u.usr_id
+        JOIN "Restaurant" r ON o.rtr_id = r.rtr_id
+        WHERE o.placed_at >= ?
+           OR (o.placed_at IS NULL AND (o.details IS NULL OR json_valid(o.details)))
+        ORDER BY o.ord_id DESC
+    ''', (seven_days_ago,))
+    
+    # Group orders by status
+    orders_by_status = {
+        'Ordered': [],
+        'Preparing': [],
+        'Delivering': [],
+        'Delivered': []
+    }
+    
+    for row in order_rows:
+        ord_id, status, first_name, last_name, restaurant_name, placed_at_display, total = row
         
-        # Fetch all orders from last 7 days with user and restaurant information
-        # Parse the details JSON to get placed_at timestamp for filtering
-        order_rows = fetch_all(conn, '''
-            SELECT 
-                o.ord_id,
-                o.rtr_id,
-                o.usr_id,
-                o.details,
-                o.status,
-                u.first_name,
-                u.last_name,
-                r.name as restaurant_name
-            FROM "Order" o
-            JOIN "User" u ON o.usr_id = u.usr_id
-            JOIN "Restaurant" r ON o.rtr_id = r.rtr_id
-            ORDER BY o.ord_id DESC
-        ''')
+        # Default status if missing
+        if not status:
+            status = 'Ordered'
         
-        # Process orders and filter by date
-        orders_by_status = {
-            'Ordered': [],
-            'Preparing': [],
-            'Delivering': [],
-            'Delivered': []
+        # Build order object
+        order = {
+            'ord_id': ord_id,
+            'customer_name': f"{first_name} {last_name}",
+            'restaurant_name': restaurant_name,
+            'total': f"${total:.2f}" if total else "N/A",
+            'placed_at': placed_at_display,
+            'status': status
         }
         
-        for row in order_rows:
-            ord_id, rtr_id, usr_id, details_json, status, first_name, last_name, restaurant_name = row
-            
-            # Parse details to get placed_at and total
-            placed_at = None
-            total = None
-            placed_at_display = ""
-            
-            if details_json:
-                try:
-                    details = json.loads(details_json)
-                    placed_at = details.get("placed_at") or details.get("time")
-                    
-                    # Filter by date (last 7 days)
-                    if placed_at:
-                        order_dt = datetime.fromisoformat(placed_at)
-                        if order_dt.isoformat() < seven_days_ago:
-                            continue  # Skip orders older than 7 days
-                        
-                        # Format for display
-                        placed_at_display = order_dt.strftime("%Y-%m-%d %H:%M")
-                    
-                    # Get total from charges
-                    charges = details.get("charges", {})
-                    total = charges.get("total") or charges.get("grand_total")
-                    
-                except Exception as e:
-                    print(f"Error parsing order details: {e}")
-                    continue
-            
-            # Default status if missing
-            if not status:
-                status = 'Ordered'
-            
-            # Build order object
-            order = {
-                'ord_id': ord_id,
-                'customer_name': f"{first_name} {last_name}",
-                'restaurant_name': restaurant_name,
-                'total': f"${total:.2f}" if total else "N/A",
-                'placed_at': placed_at_display,
-                'status': status
-            }
-            
-            # Add to appropriate status group
-            if status in orders_by_status:
-                orders_by_status[status].append(order)
-        
-        # Sort orders within each status group by ord_id descending (already sorted from query)
-        # But let's ensure it's explicit
-        for status in orders_by_status:
-            orders_by_status[status].sort(key=lambda x: x['ord_id'], reverse=True)
-        
-        # Get total count of tickets for pagination
-        total_tickets_row = fetch_one(conn, 'SELECT COUNT(*) FROM Ticket')
-        total_tickets = total_tickets_row[0] if total_tickets_row else 0
-        
-        # Calculate total pages
-        total_pages = (total_tickets + tickets_per_page - 1) // tickets_per_page
-        if total_pages < 1:
-            total_pages = 1
-        
-        # Ensure current page doesn't exceed total pages
-        if page > total_pages:
-            page = total_pages
-        
-        # Fetch paginated support tickets with user and order information
-        ticket_rows = fetch_all(conn, '''
-            SELECT 
-                t.ticket_id,
-                t.usr_id,
-                t.ord_id,
-                t.message,
-                t.response,
-                t.status,
-                t.created_at,
-                t.updated_at,
-                u.first_name,
-                u.last_name
-            FROM Ticket t
-            JOIN "User" u ON t.usr_id = u.usr_id
-            ORDER BY 
-                CASE 
-                    WHEN t.status = 'Open' THEN 0
-                    WHEN t.status = 'In Progress' THEN 1
-                    WHEN t.status = 'Resolved' THEN 2
-                    WHEN t.status = 'Closed' THEN 3
-                    ELSE 4
-                END,
-                t.created_at DESC
-            LIMIT ? OFFSET ?
-        ''', (tickets_per_page, offset))
+        # Add to appropriate status group
+        if status in orders_by_status:
+            orders_by_status[status].append(order)
+    
+    # Sort orders within each status group by ord_id descending (already sorted from query)
+    # But let's ensure it's explicit
+    for status in orders_by_status:
+        orders_by_status[status].sort(key=lambda x: x['ord_id'], reverse=True)
+    
+    # Fetch one page of support tickets together with the overall ticket count.
+    # The count is an uncorrelated scalar subquery (evaluated once), so the page
+    # can still be read in idx_ticket_priority_created order; a COUNT(*) OVER ()
+    # window would force every ticket to be materialized and sorted instead.
+    ticket_rows = fetch_all(conn, '''
+        SELECT 
+            t.ticket_id,
+            t.usr_id,
+            t.ord_id,
+            t.message,
+            t.response,
+            t.status,
+            replace(substr(t.created_at, 1, 16), 'T', ' ') AS created_at_display,
+            t.updated_at,
+            u.first_name,
+            u.last_name,
+            (SELECT COUNT(*) FROM Ticket) AS total_tickets
+        FROM Ticket t
+        JOIN "User" u ON t.usr_id = u.usr_id
+        ORDER BY 
+            CASE t.status
+                WHEN 'Open' THEN 0
+                WHEN 'In Progress' THEN 1
+                WHEN 'Resolved' THEN 2
+                WHEN 'Closed' THEN 3
+                ELSE 4
+            END,
+            t.created_at DESC
+        LIMIT ? OFFSET ?
+    ''', (tickets_per_page, offset))
+    
+    if ticket_rows:
+        total_tickets = ticket_rows[0]["total_tickets"]
+    elif page > 1:
+        # Past the last page: the page came back empty, so count separately to clamp
+        total_tickets = count_all_tickets(conn)
+    else:
+        total_tickets = 0
+    
+    # Calculate total pages
+    total_pages = (total_tickets + tickets_per_page - 1) // tickets_per_page
+    if total_pages < 1:
+        total_pages = 1
+    
+    # Ensure current page doesn't exceed total pages
+    if page > total_pages:
+        page = total_pages
+    
+    # Process tickets
+    tickets = []
+    for row in ticket_rows:
+        ticket_id, usr_id, ord_id, message, response, status, created_at_display, updated_at, first_name, last_name, _total = row
         
-        # Process tickets
-        tickets = []
-        for row in ticket_rows:
-            ticket_id, usr_id, ord_id, message, response, status, created_at, updated_at, first_name, last_name = row
-            
-            # Format created_at for display
-            created_at_display = ""
-            if created_at:
-                try:
-                    dt = datetime.fromisoformat(created_at)
-                    created_at_display = dt.strftime("%Y-%m-%d %H:%M")
-                except Exception:
-                    created_at_display = str(created_at)
-            
-            ticket = {
-                'ticket_id': ticket_id,
-                'customer_name': f"{first_name} {last_name}",
-                'ord_id': ord_id,
-                'message': message,
-                'response': response,
-                'status': status,
-                'created_at': created_at_display
-            }
-            
-            tickets.append(ticket)
+        ticket = {
+            'ticket_id': ticket_id,
+            'customer_name': f"{first_name} {last_name}",
+            'ord_id': ord_id,
+            'message': message,
+            'response': response,
+            'status': status,
+            'created_at': created_at_display or ""
+        }
         
-    finally:
-        close_connection(conn)
+        tickets.append(ticket)
+    
     
     return render_template(
         'admin.html',
@@ -1783,9 +2035,9 @@ def admin_update_ticket_status():
     """
     Update the status of a support ticket and optionally add a response.
     
-    This endpoint validates the ticket exists, checks that the new status is valid,
-    and automatically updates the status to "In Progress" when a response is added
-    to an "Open" ticket.
+    This endpoint checks that the new status is valid and applies it with a single
+    UPDATE ... RETURNING, which also sets the status to "In Progress" when a response
+    is added to an "Open" ticket.
     
     Args:
         None (expects JSON body with ticket_id, new_status, and optional response)
@@ -1846,40 +2098,25 @@ def admin_update_ticket_status():
     if new_status not in VALID_TICKET_STATUSES:
         return jsonify({"ok": False, "error": f"Invalid status: {new_status}"}), 400
     
-    # Fetch ticket and validate it exists
-    conn = create_connection(db_file)
+    conn = get_db()
     try:
-        ticket_row = fetch_one(conn, 'SELECT ticket_id, status FROM Ticket WHERE ticket_id = ?', (ticket_id,))
+        # If a response is provided and the ticket is "Open", automatically set it to
+        # "In Progress"; the response column is only overwritten when one is given
+        cur = execute_write(conn, '''
+            UPDATE Ticket
+            SET status = CASE WHEN ? AND COALESCE(status, 'Open') = 'Open' THEN 'In Progress' ELSE ? END,
+                response = COALESCE(?, response),
+                updated_at = CURRENT_TIMESTAMP
+            WHERE ticket_id = ?
+            RETURNING status
+        ''', (1 if response_text else 0, new_status, response_text or None, ticket_id))
         
+        if cur is None:
+            return jsonify({"ok": False, "error": "Internal server error"}), 500
+        ticket_row = cur.fetchone()
         if not ticket_row:
             return jsonify({"ok": False, "error": "Ticket not found"}), 404
-        
-        current_status = ticket_row[1] or "Open"
-        
-        # Determine final status based on response logic
-        # If response is provided and current status is "Open", automatically set to "In Progress"
-        if response_text and current_status == "Open":
-            final_status = "In Progress"
-        else:
-            final_status = new_status
-        
-        # Update ticket status and response
-        if response_text:
-            # Update both status and response
-            execute_query(
-                conn, 
-                'UPDATE Ticket SET status = ?, response = ? WHERE ticket_id = ?', 
-                (final_status, response_text, ticket_id)
-            )
-        else:
-            # Update only status
-            execute_query(
-                conn, 
-                'UPDATE Ticket SET status = ? WHERE ticket_id = ?', 
-                (final_status, ticket_id)
-            )
-        
-        # Note: updated_at timestamp is automatically updated by the database trigger
+        final_status = ticket_row[0]
         
         return jsonify({
             "ok": True,
@@ -1890,8 +2127,6 @@ def admin_update_ticket_status():
     except Exception as e:
         print(f"Error updating ticket status: {e}")
         return jsonify({"ok": False, "error": "Internal server error"}), 500
-    finally:
-        close_connection(conn)
 
 @app.route('/support/submit', methods=['POST'])
 def support_submit():
@@ -1920,19 +2155,13 @@ def support_submit():
     usr_id = session.get('usr_id')
     if not usr_id:
         # Fallback: resolve via email
-        email = session.get('Email')
-        if not email:
+        if not session.get('Email'):
             return redirect(url_for('logout'))
         
-        conn = create_connection(db_file)
-        try:
-            row = fetch_one(conn, 'SELECT usr_id FROM "User" WHERE email = ?', (email,))
-            if not row:
-                return redirect(url_for('logout'))
-            usr_id = row[0]
-            session['usr_id'] = usr_id
-        finally:
-            close_connection(conn)
+        usr_id = _session_usr_id()
+        if not usr_id:
+            return redirect(url_for('logout'))
+        session['usr_id'] = usr_id
     
     # Parse form data
     try:
@@ -1952,7 +2181,7 @@ def support_submit():
         return redirect(url_for('profile') + f'?ticket_error=message_too_short&ord_id={ord_id}&message={message}')
     
     # Validate order exists and belongs to current user
-    conn = create_connection(db_file)
+    conn = get_db()
     try:
         order_row = fetch_one(conn, 'SELECT ord_id, usr_id FROM "Order" WHERE ord_id = ?', (ord_id,))
         
@@ -1965,7 +2194,7 @@ def support_submit():
         
         # Create new Ticket record with status "Open"
         # created_at and updated_at are set automatically by database defaults
-        execute_query(
+        cur = execute_write(
             conn,
             '''
             INSERT INTO Ticket (usr_id, ord_id, message, status)
@@ -1973,10 +2202,11 @@ def support_submit():
             ''',
             (usr_id, ord_id, message)
         )
+        if cur is None:
+            return redirect(url_for('profile') + '?ticket_error=database_error')
         
-        # Get the newly created ticket ID
-        ticket_row = fetch_one(conn, 'SELECT last_insert_rowid()')
-        new_ticket_id = ticket_row[0] if ticket_row else None
+        # The insert's own cursor carries the new ticket ID (no extra round-trip)
+        new_ticket_id = cur.lastrowid
         
         # Redirect to profile with success message
         return redirect(url_for('profile') + f'?ticket_success=1&ticket_id={new_ticket_id}')
@@ -1989,8 +2219,6 @@ def support_submit():
         print(f"Error creating ticket: {e}")
         return redirect(url_for('profile') + '?ticket_error=server_error')
         
-    finally:
-        close_connection(conn)
 
 @app.route('/insights')
 def insights():
@@ -2001,6 +2229,21 @@ def insights():
         return redirect(url_for("login"))
     return render_template("insights.html")
 
+# The logged-in user's orders with their restaurant name; details is NULL unless it is valid JSON.
+# placed_hour/placed_weekday/delivery_type are generated columns (add_order_insights_columns.py)
+_SQL_INSIGHTS_ORDERS = '''
+    WITH user_orders AS (
+        SELECT o.ord_id, r.name AS rtr_name, o.placed_at, o.placed_hour, o.placed_weekday,
+               o.delivery_type, CASE WHEN json_valid(o.details) THEN o.details END AS details
+        FROM "Order" o
+        JOIN "Restaurant" r ON o.rtr_id = r.rtr_id
+        WHERE o.usr_id = ?
+    )
+'''
+
+# strftime('%w') day numbers (0 = Sunday) to the names the charts use
+_WEEKDAY_NAMES = ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+
 @app.route('/api/insights_data')
 def insights_data():
     """
@@ -2010,118 +2253,89 @@ def insights_data():
     if session.get("Username") is None:
         return jsonify({"error": "Unauthorized"}), 401
 
-    conn = create_connection(db_file)
+    conn = get_db()
     try:
         # 1. Fetch User & Generated Menu
-        user_row = fetch_one(conn, 'SELECT usr_id, generated_menu FROM "User" WHERE email = ?', (session.get("Email"),))
+        user_row = _current_user_row()
         if not user_row:
             return jsonify({"error": "User not found"}), 404
-        usr_id, gen_menu_str = user_row
-
-        # 2. Fetch All Orders
-        order_rows = fetch_all(conn, '''
-            SELECT o.ord_id, o.details, o.status, r.name
-            FROM "Order" o
-            JOIN "Restaurant" r ON o.rtr_id = r.rtr_id
-            WHERE o.usr_id = ?
-            ORDER BY o.ord_id ASC
+        usr_id = user_row[0]
+
+        # 2. Aggregate the user's orders in SQL (rows with unparseable details only count as orders;
+        #    json_extract of their NULL details adds nothing to the sums)
+        totals = fetch_one(conn, _SQL_INSIGHTS_ORDERS + '''
+            SELECT COUNT(*),
+                   COALESCE(SUM(json_extract(details, '$.charges.total')), 0),
+                   COALESCE(SUM(json_extract(details, '$.charges.subtotal')), 0),
+                   COALESCE(SUM(json_extract(details, '$.charges.tax')), 0),
+                   COALESCE(SUM(COALESCE(json_extract(details, '$.charges.delivery_fee'), 0)
+                              + COALESCE(json_extract(details, '$.charges.service_fee'), 0)), 0),
+                   COALESCE(SUM(json_extract(details, '$.charges.tip')), 0),
+                   COUNT(CASE delivery_type WHEN 'delivery' THEN 1 END),
+                   COUNT(CASE delivery_type WHEN 'pickup' THEN 1 END)
+            FROM user_orders
         ''', (usr_id,))
 
         # --- DATA PROCESSING ---
-        
-        # A. Order History Parsing
-        orders_data = []
-        item_frequencies = Counter()
-        restaurant_spend = defaultdict(float)
-        restaurant_freq = Counter()
+
+        # A. Order History Aggregates
+        total_orders, total_spend, food, tax, fees, tip, delivery, pickup = totals or (0, 0.0, 0.0, 0.0, 0.0, 0.0, 0, 0)
+        spending_breakdown = {"food": float(food), "tax": float(tax), "fees": float(fees), "tip": float(tip)}
+        delivery_vs_pickup = {"delivery": delivery, "pickup": pickup}
+        total_spend = float(total_spend)
+
+        # Ties keep first-ordered restaurant first, as Counter.most_common did
+        top_rest = [tuple(r) for r in fetch_all(conn, _SQL_INSIGHTS_ORDERS + '''
+            SELECT rtr_name, COUNT(*)
+            FROM user_orders
+            WHERE details IS NOT NULL
+            GROUP BY rtr_name
+            ORDER BY COUNT(*) DESC, MIN(ord_id)
+            LIMIT 5
+        ''', (usr_id,))]
+
+        # placed_hour/placed_weekday hold placed_at's local hour and day (0 = Sunday)
         hourly_activity = defaultdict(int)
         weekday_activity = defaultdict(int)
-        
-        total_spend = 0.0
-        total_calories = 0
-        total_items = 0
-        
-        spending_breakdown = {"food": 0.0, "tax": 0.0, "fees": 0.0, "tip": 0.0}
-        delivery_vs_pickup = {"delivery": 0, "pickup": 0}
-        
-        # For "Value Analysis" (Scatter plot)
-        value_scatter = [] # {x: calories, y: price, label: name}
-
-        for oid, details_json, status, r_name in order_rows:
-            if not details_json: continue
-            try:
-                d = json.loads(details_json)
-                
-                # timestamps
-                placed_at = d.get("placed_at") or d.get("time")
-                if placed_at:
-                    dt = datetime.fromisoformat(placed_at)
-                    hourly_activity[dt.hour] += 1
-                    weekday_activity[dt.strftime("%A")] += 1
-                
-                # financials
-                charges = d.get("charges", {})
-                subtotal = float(charges.get("subtotal", 0))
-                tax = float(charges.get("tax", 0))
-                fee = float(charges.get("delivery_fee", 0)) + float(charges.get("service_fee", 0))
-                tip = float(charges.get("tip", 0))
-                total = float(charges.get("total", 0))
-                
-                total_spend += total
-                spending_breakdown["food"] += subtotal
-                spending_breakdown["tax"] += tax
-                spending_breakdown["fees"] += fee
-                spending_breakdown["tip"] += tip
-                
-                restaurant_spend[r_name] += total
-                restaurant_freq[r_name] += 1
-                
-                dtype = d.get("delivery_type", "delivery")
-                delivery_vs_pickup[dtype] += 1
-
-                # Items (we need to fetch calorie data if not in JSON, but let's assume JSON has it or we skip)
-                # Actually, Order details JSON usually stores name/price. Calories might be missing.
-                # We will just count frequencies here.
-                for item in d.get("items", []):
-                    item_frequencies[item.get("name")] += item.get("qty", 1)
-                    
-                    # For scatter plot, we try to estimate unit price
-                    u_price = float(item.get("unit_price", 0))
-                    # Note: We assume calories aren't always in order JSON. 
-                    # If you want calories, we'd need to query MenuItem table.
-                    # Let's do a bulk query for Item Metadata later.
-
-            except Exception as e:
-                continue
-
-        # B. Planned vs Actual (Generated Menu)
-        gen_map = parse_generated_menu(gen_menu_str)
-        # We need to fetch metadata for all items in Generated Plan AND Orders to do calorie math
-        
-        # 3. Fetch Metadata for Deep Analysis
-        # Get all item IDs from generated menu
-        gen_item_ids = set()
-        for day_list in gen_map.values():
-            for e in day_list:
-                gen_item_ids.add(e['itm_id'])
-        
-        # We also want to find "Healthy Alternatives". 
-        # Let's fetch ALL menu items for the restaurants the user visited.
-        visited_rtr_ids = fetch_all(conn, 'SELECT DISTINCT rtr_id FROM "Order" WHERE usr_id = ?', (usr_id,))
-        visited_ids = [r[0] for r in visited_rtr_ids]
-        
-        alternatives_data = {} # rtr_id -> [items sorted by calories]
-        if visited_ids:
-            q = ",".join(["?"]*len(visited_ids))
-            all_rtr_items = fetch_all(conn, f'SELECT rtr_id, name, price, calories FROM MenuItem WHERE rtr_id IN ({q})', tuple(visited_ids))
-            for rid, name, price, cal in all_rtr_items:
-                if rid not in alternatives_data: alternatives_data[rid] = []
-                alternatives_data[rid].append({"name": name, "price": price, "calories": cal})
+        for hour, weekday, count in fetch_all(conn, _SQL_INSIGHTS_ORDERS + '''
+            SELECT placed_hour, placed_weekday, COUNT(*)
+            FROM user_orders
+            WHERE details IS NOT NULL AND placed_at IS NOT NULL AND placed_at <> ''
+            GROUP BY placed_hour, placed_weekday
+        ''', (usr_id,)):
+            hourly_activity[hour] += count
+            if weekday is not None:
+                weekday_activity[_WEEKDAY_NAMES[weekday]] += count
+
+        # Top 5 items by quantity; json_each expands each order's variable-length items array.
+        # Ties keep the item first ordered first, as Counter.most_common did
+        top_items = [tuple(r) for r in fetch_all(conn, _SQL_INSIGHTS_ORDERS + '''
+            SELECT json_extract(i.value, '$.name') AS name,
+                   SUM(COALESCE(json_extract(i.value, '$.qty'), 1)) AS qty
+            FROM user_orders, json_each(user_orders.details, '$.items') AS i
+            WHERE details IS NOT NULL AND i.type = 'object'
+            GROUP BY name
+            ORDER BY qty DESC, MIN(ord_id)
+            LIMIT 5
+        ''', (usr_id,))]
+
+        # B. "Healthy Alternatives": every menu item at the restaurants the user visited,
+        # lowest calories first. Not charted yet, so only built on ?include=alternatives
+        alternatives_data = None
+        if request.args.get("include") == "alternatives":
+            all_rtr_items = fetch_all(conn, '''
+                SELECT rtr_id, name, price, calories FROM MenuItem
+                WHERE rtr_id IN (SELECT DISTINCT rtr_id FROM "Order" WHERE usr_id = ?)
+                ORDER BY rtr_id, calories
+            ''', (usr_id,))
+            alternatives_data = {
+                str(rid): [{"name": name, "price": price, "calories": cal} for _rid, name, price, cal in rows]
+                for rid, rows in groupby(all_rtr_items, key=lambda r: r[0])
+            }
         
         # 4. Construct Datasets
         
-        # Chart 1: Top 5 Restaurants (Freq)
-        top_rest = restaurant_freq.most_common(5)
+        # Chart 1: Top 5 Restaurants (Freq) - computed above
         
         # Chart 2: Meal Time Distribution (Pie)
         # Using hour buckets: Breakfast (5-11), Lunch (11-15), Dinner (15-23), Late Night (23-5)
@@ -2145,7 +2359,7 @@ def insights_data():
         fav_rest = top_rest[0][0] if top_rest else "None"
         insights_text.append(f"Loyalist: Your favorite spot is {fav_rest}.")
 
-        return jsonify({
+        payload = {
             "charts": {
                 "top_restaurants": {
                     "labels": [r[0] for r in top_rest],
@@ -2173,23 +2387,25 @@ def insights_data():
                     "data": [delivery_vs_pickup["delivery"], delivery_vs_pickup["pickup"]]
                 },
                 "top_items": {
-                    "labels": [i[0] for i in item_frequencies.most_common(5)],
-                    "data": [i[1] for i in item_frequencies.most_common(5)]
+                    "labels": [i[0] for i in top_items],
+                    "data": [i[1] for i in top_items]
                 }
             },
             "insights": insights_text,
             "stats": {
-                "total_orders": len(order_rows),
+                "total_orders": total_orders,
                 "total_spend": total_spend,
-                "avg_order": (total_spend / len(order_rows)) if order_rows else 0
+                "avg_order": (total_spend / total_orders) if total_orders else 0
             }
-        })
+        }
+        if alternatives_data is not None:
+            payload["alternatives"] = alternatives_data
+
+        return _json_response(payload)
 
     except Exception as e:
         print(f"Insights Error: {e}")
         return jsonify({"error": str(e)}), 500
-    finally:
-        close_connection(conn)
 
 if __name__ == '__main__':
     """
@@ -2202,4 +2418,14 @@ if __name__ == '__main__':
     User: usr_id,first_name,last_name,email,phone,password_HS,wallet,preferences,allergies,generated_menu
     """
     args = parse_args()
+
+    # Refuse to start on a database that still needs migrations
+    _get_pool(db_file)
+
+    # Load the LLM in the background so the first /generate_plan request doesn't pay for it
+    # (under the debug reloader only the serving child process has WERKZEUG_RUN_MAIN set)
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        import llm_toolkit
+        threading.Thread(target=llm_toolkit.LLM.instance, kwargs={"tokens": 500}, daemon=True).start()
+
     app.run(host=args.host, port=args.port, debug=True)
\ No newline at end of file
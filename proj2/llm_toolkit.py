@@ -1,5 +1,8 @@
 import os
+import re
 import time
+import threading
+from typing import List, Tuple
 import torch
 from dotenv import load_dotenv
 
@@ -13,12 +16,39 @@ except ImportError:
 # Local model imports
 from transformers import AutoModelForCausalLM, AutoTokenizer
 
+# bitsandbytes is optional: 4-bit weights on CUDA when installed, fp16 otherwise
+try:
+    import bitsandbytes  # noqa: F401
+    from transformers import BitsAndBytesConfig
+    HAS_BITSANDBYTES = True
+except ImportError:
+    HAS_BITSANDBYTES = False
+
+# A complete number: a digit run followed by something that is not a digit
+COMPLETE_NUMBER = re.compile(r"\d+\D")
+
 class LLM:
     """
     Robust LLM class that supports both OpenAI (Cloud) and Local (HuggingFace) models.
     Defaults to OpenAI if OPENAI_API_KEY is found, otherwise falls back to local.
     """
 
+    # tokens -> shared LLM, so the model is loaded once per process
+    _instances = {}
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def instance(cls, tokens: int = 500) -> "LLM":
+        """
+        Returns the process-wide LLM for the token limit, creating (and loading the model) on first use.
+        Concurrent first callers wait for the one load instead of each loading the model.
+        """
+        with cls._instance_lock:
+            llm = cls._instances.get(tokens)
+            if llm is None:
+                llm = cls._instances[tokens] = cls(tokens=tokens)
+            return llm
+
     def __init__(self, tokens: int = 500):
         """
         Initializes the LLM. 
@@ -29,6 +59,9 @@ class LLM:
         load_dotenv() # Load environment variables from .env file
         self.tokens = tokens
         self.api_key = os.getenv("OPENAI_API_KEY")
+        # Guards the one-time local model load when OpenAI calls fall back to it
+        self._local_lock = threading.Lock()
+        self._local_ready = False
         
         # Determine Provider
         if self.api_key and HAS_OPENAI_LIB:
@@ -39,6 +72,18 @@ class LLM:
         else:
             self.provider = "local"
             self._init_local_model()
+            self._local_ready = True
+            self.model_name = self.local_model_name
+
+    def _ensure_local_model(self):
+        """
+        Loads the local model once for OpenAI calls that fall back to it.
+        Concurrent fallbacks wait for that one load instead of using a half-initialized model.
+        """
+        with self._local_lock:
+            if not self._local_ready:
+                self._init_local_model()
+                self._local_ready = True
 
     def _init_local_model(self):
         """
@@ -52,84 +97,156 @@ class LLM:
         else:
             self.device = "cpu"
             
-        self.model_name = "ibm-granite/granite-4.0-h-350M"
+        # Kept apart from model_name, which an OpenAI provider still needs after a fallback load
+        self.local_model_name = "ibm-granite/granite-4.0-h-350M"
         
-        print(f"💻 LLM Provider: Local ({self.model_name}) on {self.device.upper()}")
+        print(f"💻 LLM Provider: Local ({self.local_model_name}) on {self.device.upper()}")
 
         self.tokenizer = AutoTokenizer.from_pretrained(
-            self.model_name, 
+            self.local_model_name, 
             cache_dir=os.path.join(os.path.dirname(__file__), '.hf_cache')
         )
+        # Batched prompts are padded on the left so each one ends right where generation starts
+        self.tokenizer.padding_side = "left"
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
         
+        # Decode re-reads every weight per token, so smaller weights mean faster generation:
+        # NF4 (4-bit) weights with fp16 compute on CUDA, bf16 on CPU, fp16 on MPS
+        load_kwargs = {}
+        if self.device == "cuda" and HAS_BITSANDBYTES:
+            load_kwargs["quantization_config"] = BitsAndBytesConfig(
+                load_in_4bit=True,
+                bnb_4bit_compute_dtype=torch.float16,
+                bnb_4bit_quant_type="nf4"
+            )
+        else:
+            load_kwargs["torch_dtype"] = torch.bfloat16 if self.device == "cpu" else torch.float16
+
         # Load model with correct device mapping
         self.model = AutoModelForCausalLM.from_pretrained(
-            self.model_name, 
+            self.local_model_name, 
             device_map=self.device,
-            torch_dtype=torch.float16 if self.device != "cpu" else "auto"
+            **load_kwargs
         )
         self.model.eval()
 
-    def generate(self, context: str, prompt: str) -> str:
+        # One model serves every request thread (see instance()), and the compiled forward's
+        # CUDA graphs reuse static buffers, so generate() calls must not overlap
+        self._generate_lock = threading.Lock()
+
+        # On CUDA, compile the forward pass (CUDA graphs + fused kernels) for the decode loop.
+        # generate() calls model.forward, so compiling the module wrapper alone would be bypassed.
+        if self.device == "cuda":
+            eager_forward = self.model.forward
+            try:
+                self.model.forward = torch.compile(eager_forward, mode="reduce-overhead", fullgraph=False)
+                self._warm_up()
+            except Exception as e:
+                # e.g. quantized layers the compiler can't trace
+                self.model.forward = eager_forward
+                print(f"⚠️ torch.compile unavailable ({e}); using eager mode")
+
+    def _warm_up(self):
+        """
+        Runs one short generation so compilation happens at init rather than on the first user request.
+        """
+        start = time.time()
+        input_tokens = self.tokenizer(["Hello"], return_tensors="pt").to(self.device)
+        with torch.inference_mode():
+            self.model.generate(**input_tokens, max_new_tokens=2, pad_token_id=self.tokenizer.pad_token_id)
+        print(f"🔥 Local model compiled and warmed up in {time.time() - start:.4f} seconds")
+
+    def generate(self, context: str, prompt: str, stop_on_digit: bool = False) -> str:
         """
         Generates text using the selected provider.
+        With stop_on_digit, OpenAI output is cut off as soon as the first complete number has streamed in.
         """
         if self.provider == "openai":
-            return self._generate_openai(context, prompt)
+            return self._generate_openai(context, prompt, stop_on_digit)
         else:
             return self._generate_local(context, prompt)
 
-    def _generate_openai(self, context: str, prompt: str) -> str:
+    def generate_batch(self, requests: List[Tuple[str, str]], stop_on_digit: bool = False) -> List[str]:
+        """
+        Generates text for several (context, prompt) pairs, returning outputs in the same order.
+        The local model runs them as one padded batch; OpenAI requests are sent one at a time.
+        """
+        if not requests:
+            return []
+        if self.provider == "openai":
+            return [self._generate_openai(context, prompt, stop_on_digit) for context, prompt in requests]
+        else:
+            return self._generate_local_batch(requests)
+
+    def _generate_openai(self, context: str, prompt: str, stop_on_digit: bool = False) -> str:
         start = time.time()
         try:
-            response = self.client.chat.completions.create(
+            stream = self.client.chat.completions.create(
                 model=self.model_name,
                 messages=[
                     {"role": "system", "content": context},
                     {"role": "user", "content": prompt}
                 ],
                 max_tokens=self.tokens,
-                temperature=0.7
+                temperature=0.7,
+                stream=True
             )
-            output = response.choices[0].message.content.strip()
+            output = ""
+            try:
+                for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        output += chunk.choices[0].delta.content
+                        # Closing the stream cancels the rest of the completion
+                        if stop_on_digit and COMPLETE_NUMBER.search(output):
+                            break
+            finally:
+                stream.close()
+            output = output.strip()
             end = time.time()
             print(f"⚡ OpenAI generated in {end - start:.4f} seconds")
             return output
         except Exception as e:
             print(f"❌ OpenAI Error: {e}. Falling back to Local...")
-            # Runtime fallback: If internet drops or key fails, init local and retry
-            self.provider = "local"
-            self._init_local_model()
+            # Runtime fallback: If internet drops or key fails, answer this call locally.
+            # The provider stays OpenAI, so the next call (from any user) tries it again.
+            self._ensure_local_model()
             return self._generate_local(context, prompt)
 
     def _generate_local(self, context: str, prompt: str) -> str:
+        return self._generate_local_batch([(context, prompt)])[0]
+
+    def _generate_local_batch(self, requests: List[Tuple[str, str]]) -> List[str]:
         start = time.time()
-        
-        chat = [
-            {"role": "system", "content": context},
-            {"role": "user", "content": prompt},
-        ]
-        
-        # Apply chat template
-        try:
-            text = self.tokenizer.apply_chat_template(chat, tokenize=False, add_generation_prompt=True)
-        except Exception:
-            # Fallback for models without chat templates
-            text = f"{context}\n\nUser: {prompt}\n\nAssistant:"
 
-        input_tokens = self.tokenizer([text], return_tensors="pt").to(self.device)
+        texts = []
+        for context, prompt in requests:
+            chat = [
+                {"role": "system", "content": context},
+                {"role": "user", "content": prompt},
+            ]
+
+            # Apply chat template
+            try:
+                texts.append(self.tokenizer.apply_chat_template(chat, tokenize=False, add_generation_prompt=True))
+            except Exception:
+                # Fallback for models without chat templates
+                texts.append(f"{context}\n\nUser: {prompt}\n\nAssistant:")
+
+        input_tokens = self.tokenizer(texts, padding=True, return_tensors="pt").to(self.device)
 
-        with torch.no_grad():
+        with self._generate_lock, torch.inference_mode():
             output_ids = self.model.generate(
-                **input_tokens, 
-                max_new_tokens=self.tokens
+                **input_tokens,  # includes attention_mask, so padding is ignored
+                max_new_tokens=self.tokens,
+                use_cache=True,
+                pad_token_id=self.tokenizer.pad_token_id
             )
             
-        # Decode only the new tokens
-        output_ids = [
-            out[len(inp):] for inp, out in zip(input_tokens.input_ids, output_ids)
-        ]
-        output = self.tokenizer.batch_decode(output_ids, skip_special_tokens=True)[0]
+        # Decode only the new tokens (every prompt is padded to the same length)
+        output_ids = output_ids[:, input_tokens.input_ids.shape[1]:]
+        outputs = self.tokenizer.batch_decode(output_ids, skip_special_tokens=True)
         
         end = time.time()
-        print(f"🐢 Local Model generated in {end - start:.4f} seconds")
-        return output
\ No newline at end of file
+        print(f"🐢 Local Model generated {len(outputs)} output(s) in {end - start:.4f} seconds")
+        return outputs
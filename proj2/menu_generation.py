@@ -1,11 +1,13 @@
 import os
+import numpy as np
 import pandas as pd
 import datetime
 import time
 import json
 import random
 import re
-from typing import Tuple, List
+import functools
+from typing import Tuple, List, Dict, Optional
 
 import llm_toolkit as llm_toolkit
 from sqlQueries import *
@@ -31,8 +33,18 @@ Provide only the itm_id as output. Do not provide names or descriptions.
 CSV CONTEXT:
 {context}'''
 
+## Menu item columns shown to the LLM, in CSV CONTEXT order
+CONTEXT_COLUMNS = ["itm_id", "name", "description", "price", "calories"]
+
+## Column MenuGenerator adds to its menu items holding each item's parsed allergens
+ALLERGEN_SET_COLUMN = "_allergen_set"
+
 ## Regex used for parsing a number from LLM Output
 LLM_OUTPUT_MATCH = r"(\d+)"
+LLM_OUTPUT_PATTERN = re.compile(LLM_OUTPUT_MATCH)
+
+## Regex for one [date,itm_id,meal] entry of a generated menu string
+MENU_ENTRY_PATTERN = re.compile(r"\[([^,\]]+),(\d+),(\d+)\]")
 
 ## Preset Meal times - In the future, times will be user-provided
 BREAKFAST_TIME = 1000
@@ -76,18 +88,41 @@ def format_llm_output(output: str) -> int:
     Grabs the LLM output and extracts the item ID from it.
     Updated to be robust for both OpenAI (plain text) and Local models (tokens).
     """
-    # Find all sequences of digits
-    matches = re.findall(LLM_OUTPUT_MATCH, output)
-    if matches:
+    # Fast path: OpenAI usually sends just "22"
+    stripped = output.strip()
+    if stripped.isdecimal():
+        return int(stripped)
+
+    # Stream the sequences of digits, keeping only the last one
+    last = None
+    for last in LLM_OUTPUT_PATTERN.finditer(output):
+        pass
+    if last:
         # If multiple numbers appear, usually the last one is the ID or the one we want.
-        # OpenAI usually sends just "22", but sometimes "I chose 22".
+        # e.g. "I chose 22".
         try:
-            return int(matches[-1]) 
+            return int(last.group()) 
         except ValueError:
             return LLM_ATTRIBUTE_ERROR
             
     return LLM_ATTRIBUTE_ERROR
 
+def menu_slots(menu: str) -> set:
+    """
+    Parses a generated menu string into the set of (date, meal_number) slots it already fills
+    """
+    return {(d, int(m)) for d, _itm_id, m in MENU_ENTRY_PATTERN.findall(menu or "")}
+
+def build_prompt(preferences: str, meal: str, context: str) -> str:
+    """
+    Fills PROMPT_TEMPLATE with the customer's preferences, the meal, and the CSV context
+    """
+    prompt = PROMPT_TEMPLATE
+    prompt = prompt.replace("{preferences}", preferences)
+    prompt = prompt.replace("{context}", context)
+    prompt = prompt.replace("{meal}", meal)
+    return prompt
+
 def limit_scope(items: pd.DataFrame, num_choices: int) -> List[int]:
     """
     Limits the number of items to ITEM_CHOICES by randomly selecting items if necessary
@@ -98,56 +133,90 @@ def limit_scope(items: pd.DataFrame, num_choices: int) -> List[int]:
         choices = random.sample(choices, num_choices)
     return choices
 
+def allergen_sets(allergens: pd.Series) -> pd.Series:
+    """
+    Parses comma-separated allergen strings into lowercase frozensets (missing values become empty sets)
+    """
+    return allergens.fillna("").str.lower().str.split(',').map(lambda xs: frozenset(x.strip() for x in xs if x.strip()))
+
 def filter_allergens(menu_items: pd.DataFrame, allergens: str) -> pd.DataFrame:
     """
-    Filters out menu items that contain any of the specified allergens from the provided DataFrame
+    Filters out menu items that contain any of the specified allergens from the provided DataFrame.
+    Uses the precomputed ALLERGEN_SET_COLUMN when present instead of re-parsing the allergens strings.
     """
     if not allergens:
         return menu_items
-        
-    for index, rows in menu_items.iterrows():
-        if rows["allergens"] is not None:
-            item_allergens = [x.strip().lower() for x in rows['allergens'].split(',')]
-            user_allergens = [x.strip().lower() for x in allergens.split(',')]
-            if any (allergen in item_allergens for allergen in user_allergens):
-                menu_items.drop(index, inplace=True)
-    return menu_items
+
+    user_allergens = frozenset(x.strip().lower() for x in allergens.split(',') if x.strip())
+    if not user_allergens:
+        return menu_items
+
+    if ALLERGEN_SET_COLUMN in menu_items:
+        item_allergens = menu_items[ALLERGEN_SET_COLUMN]
+    else:
+        item_allergens = allergen_sets(menu_items["allergens"])
+    return menu_items[item_allergens.map(user_allergens.isdisjoint).astype(bool)]
+
+def parse_hours(hours_json: str) -> Optional[Dict[str, List[Tuple[int, int]]]]:
+    """
+    Parses a restaurant's hours JSON into {weekday: [(open, close), ...]}.
+    Returns None when the restaurant should be treated as always open (no hours or unparseable hours).
+    A weekday that is missing, empty, or has an odd number of times maps to no opening windows.
+    """
+    try:
+        if not hours_json or not hours_json.strip().startswith('{'):
+            return None
+        opening_times = json.loads(hours_json)
+        hours = {}
+        for weekday, times in opening_times.items():
+            if not times or len(times) % 2 == 1:
+                hours[weekday] = []
+                continue
+            if not all(isinstance(t, (int, float)) for t in times):
+                return None
+            hours[weekday] = list(zip(times[0::2], times[1::2]))
+        return hours
+    except Exception:
+        return None
+
+def build_hours_index(restaurant: pd.DataFrame) -> Dict[int, Optional[Dict[str, List[Tuple[int, int]]]]]:
+    """
+    Parses the hours of every restaurant once, keyed by rtr_id
+    """
+    unique = restaurant[["rtr_id", "hours"]].drop_duplicates("rtr_id")
+    return {rtr_id: parse_hours(hours_json) for rtr_id, hours_json in unique.itertuples(index=False)}
+
+def build_hours_windows(hours_index: Dict[int, Optional[Dict[str, List[Tuple[int, int]]]]]) -> Tuple[frozenset, Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]]]:
+    """
+    Packs the parsed hours into flat arrays so open checks are one vectorized comparison.
+    Returns the rtr_ids that have hours (the rest are always open) and, per weekday,
+    parallel (rtr_ids, opens, closes) arrays with one entry per opening window.
+    """
+    scheduled = frozenset(rtr_id for rtr_id, hours in hours_index.items() if hours is not None)
+    windows = {}
+    for weekday in DAYS_OF_WEEK:
+        entries = [(rtr_id, opening, closing)
+                   for rtr_id, hours in hours_index.items() if hours is not None
+                   for opening, closing in hours.get(weekday, ())]
+        rtr_ids, opens, closes = zip(*entries) if entries else ((), (), ())
+        windows[weekday] = (np.array(rtr_ids), np.array(opens, dtype=float), np.array(closes, dtype=float))
+    return scheduled, windows
+
+def find_closed_restaurants(hours_windows: Tuple[frozenset, Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]]], weekday: str, time: int) -> frozenset:
+    """
+    Returns the rtr_ids with hours (see build_hours_windows) that have no opening window containing the time on the weekday
+    """
+    scheduled, windows = hours_windows
+    rtr_ids, opens, closes = windows.get(weekday, (np.array([]), np.array([]), np.array([])))
+    open_ids = rtr_ids[(opens <= time) & (time <= closes)]
+    return scheduled.difference(open_ids.tolist())
 
 def filter_closed_restaurants(restaurant: pd.DataFrame, weekday: str, time: int) -> pd.DataFrame:
     """
     Filters out restaurants that are closed at the specified time on the specified weekday
     """
-    for index, rows in restaurant.iterrows():
-        try:
-            hours_json = rows["hours"]
-            if not hours_json: continue # Skip check if no hours, or assume open? Assume open.
-            
-            # Simple check if hours is JSON-like
-            if hours_json.strip().startswith('{'):
-                opening_times = json.loads(hours_json).get(weekday, [])
-                if not opening_times:
-                    # Closed today
-                    restaurant = restaurant[restaurant["rtr_id"] != rows["rtr_id"]]
-                    continue
-                    
-                if len(opening_times) % 2 == 1:
-                    # Odd opening times - cannot process, assume closed or keep?
-                    # Original code removed it.
-                    restaurant = restaurant[restaurant["rtr_id"] != rows["rtr_id"]]
-                elif len(opening_times) >= 2:
-                    is_open = False
-                    for x in range(int(len(opening_times) / 2)):
-                        if opening_times[x*2] <= time and opening_times[x*2+1] >= time:
-                            is_open = True
-                    if not is_open:
-                        restaurant = restaurant[restaurant["rtr_id"] != rows["rtr_id"]]
-                else:
-                    restaurant = restaurant[restaurant["rtr_id"] != rows["rtr_id"]]
-        except Exception as e:
-            # If hours parsing fails, safe to ignore or drop. Original dropped.
-            pass
-            
-    return restaurant
+    hours_windows = build_hours_windows(build_hours_index(restaurant))
+    return restaurant[~restaurant["rtr_id"].isin(find_closed_restaurants(hours_windows, weekday, time))]
 
 class MenuGenerator:
     """
@@ -164,34 +233,60 @@ class MenuGenerator:
         self.menu_items = pd.read_sql_query("SELECT * FROM MenuItem WHERE instock = 1 OR instock IS NULL", conn)
         self.restaurants = pd.read_sql_query("SELECT rtr_id, hours FROM Restaurant WHERE status='Open' OR status IS NULL", conn)
         close_connection(conn)
+
+        ## Typed join key and allergens parsed once, so per-pick filters are int hashing and set checks
+        self.menu_items["rtr_id"] = self.menu_items["rtr_id"].astype("int32")
+        self.restaurants["rtr_id"] = self.restaurants["rtr_id"].astype("int32")
+        self.menu_items[ALLERGEN_SET_COLUMN] = allergen_sets(self.menu_items["allergens"])
+
+        ## Hours are parsed once; the closed set per (weekday, time) is reused across retries and days
+        self._hours_windows = build_hours_windows(build_hours_index(self.restaurants))
+        self._closed_restaurants = functools.lru_cache(maxsize=None)(self._find_closed_restaurants)
+
+        ## Menu items and restaurants are static, so they are merged once; filtered pools are
+        ## cached per (allergens, weekday, order_time) since DataFrames are not hashable
+        self._combined = pd.merge(self.menu_items, self.restaurants, on="rtr_id", how="left")
+        self._pool_cache = {}
         
-        self.generator = llm_toolkit.LLM(tokens=tokens)
+        self.generator = llm_toolkit.LLM.instance(tokens=tokens)
 
-    def __get_context(self, allergens: str, weekday: str, order_time: int, num_choices: int) -> Tuple[str, List[int]]:
+    def _find_closed_restaurants(self, weekday: str, order_time: int) -> frozenset:
         """
-        Generates the context block for the LLM based on the provided allergens, date, and order time
+        Returns the rtr_ids of restaurants that are closed at the order time on the weekday
         """
-        start = time.time()
-        
-        combined = pd.merge(self.menu_items, self.restaurants, on="rtr_id", how="left")
+        return find_closed_restaurants(self._hours_windows, weekday, order_time)
 
-        ## Removes restaurants that are closed during the order time
-        combined = filter_closed_restaurants(combined, weekday, order_time)
-        
-        ## Removes items that contain allergens
-        combined = filter_allergens(combined, allergens)
+    def _filtered_pool(self, allergens: str, weekday: str, order_time: int) -> pd.DataFrame:
+        """
+        Returns the menu items available at the order time on the weekday that contain none of the allergens
+        """
+        key = (allergens, weekday, order_time)
+        pool = self._pool_cache.get(key)
+        if pool is None:
+            ## Removes restaurants that are closed during the order time
+            pool = self._combined[~self._combined["rtr_id"].isin(self._closed_restaurants(weekday, order_time))]
 
-        ## Randomly selects ITEM_CHOICES number of items to present to the LLM
-        choices = limit_scope(combined, num_choices)
+            ## Removes items that contain allergens
+            pool = filter_allergens(pool, allergens)
+            self._pool_cache[key] = pool
+        return pool
+
+    def _sample_context(self, pool: pd.DataFrame, num_choices: int) -> Tuple[str, List[int]]:
+        """
+        Generates the context block for the LLM from a random sample of the filtered pool
+        """
+        start = time.time()
+
+        ## Randomly selects ITEM_CHOICES number of items to present to the LLM (sampled and sliced in one call)
+        sample = pool.sample(n=min(num_choices, pool.shape[0]))
 
         context_data = "item_id,name,description,price,calories\n"
         
-        ## Create the context data with the chosen items
-        item_ids = []
-        for x in choices:
-            row = combined.iloc[x]
-            context_data += f"{row['itm_id']},{row['name']},{row['description']},{row['price']},{row['calories']}\n"
-            item_ids.append(row['itm_id'])
+        ## Create the context data with the chosen items, one comma-joined line per row
+        rows = sample[CONTEXT_COLUMNS].astype(str).agg(','.join, axis=1)
+        if not rows.empty:
+            context_data += "\n".join(rows) + "\n"
+        item_ids = sample['itm_id'].tolist()
 
         end = time.time()
         # print("Context block generated in %.4f seconds" % (end - start))
@@ -207,19 +302,17 @@ class MenuGenerator:
         llm_output = ""
 
         ## Tries to get output from LLM a number of times, increasing the number of options every time
+        ## Filtering does not depend on num_choices, so retries only resample the same pool
+        pool = self._filtered_pool(allergens, weekday, order_time)
+
         for x in range(MAX_LLM_TRIES):
-            context, item_ids = self.__get_context(allergens, weekday, order_time, num_choices)
+            context, item_ids = self._sample_context(pool, num_choices)
 
             ## Gets the prompt
             system = SYSTEM_TEMPLATE
-            prompt = PROMPT_TEMPLATE
+            prompt = build_prompt(preferences, meal, context)
 
-            ## Initializes variables in prompt
-            prompt = prompt.replace("{preferences}", preferences)
-            prompt = prompt.replace("{context}", context)
-            prompt = prompt.replace("{meal}", meal)
-
-            llm_output = self.generator.generate(system, prompt)
+            llm_output = self.generator.generate(system, prompt, stop_on_digit=True)
             output = format_llm_output(llm_output)
             
             # Validation: Output must be a number AND present in the provided context IDs
@@ -242,28 +335,64 @@ class MenuGenerator:
 
         next_date, current_weekday = get_weekday_and_increment(date)
         
-        # Ensure menu is a string to avoid errors
-        if not menu:
-            menu = ""
+        # Existing menu followed by new entries, joined once at the end
+        entries = [menu] if menu else []
+
+        # Slots already in the menu, e.g. [2025-10-27,123,1] -> ("2025-10-27", 1)
+        filled = menu_slots(menu)
             
         for x in range(number_of_days):
             for meal_number in meal_numbers:
-                # Regex check for existing: [2025-10-27, 123, 1]
-                pattern = fr"\[{date},\d+,{meal_number}\]"
-                if re.search(pattern, menu):
+                if (date, meal_number) in filled:
                     # Already exists
                     continue
+                filled.add((date, meal_number))
 
                 itm_id = self.__pick_menu_item(preferences, allergens, current_weekday, meal_number)
                 
-                # Append to menu string
-                new_entry = f"[{date},{itm_id},{meal_number}]"
-                if len(menu) > 0:
-                    menu = f"{menu},{new_entry}"
-                else:
-                    menu = new_entry
+                # Append to menu entries
+                entries.append(f"[{date},{itm_id},{meal_number}]")
                     
             date = next_date
             next_date, current_weekday = get_weekday_and_increment(date)
             
-        return menu
\ No newline at end of file
+        return ",".join(entries)
+
+    def plan_week(self, menu: str, preferences: str, allergens: str, date: str, meal_numbers: List[int], number_of_days: int = 7, goal: str = "") -> str:
+        """
+        Fills the menu like update_menu, but sends the prompts for every missing (date, meal) to the LLM
+        as a single batch. Entries whose output is not one of the offered item ids are retried one at a time.
+        """
+        if goal:
+            preferences = f"GOAL: {goal}. {preferences}"
+
+        entries = [menu] if menu else []
+
+        ## Builds one prompt per (date, meal) that isn't already in the menu
+        slots = []
+        requests = []
+        filled = menu_slots(menu)
+        for x in range(number_of_days):
+            next_date, current_weekday = get_weekday_and_increment(date)
+            for meal_number in meal_numbers:
+                if (date, meal_number) in filled:
+                    continue
+                filled.add((date, meal_number))
+
+                meal, order_time = get_meal_and_order_time(meal_number)
+                pool = self._filtered_pool(allergens, current_weekday, order_time)
+                context, item_ids = self._sample_context(pool, ITEM_CHOICES)
+                slots.append((date, current_weekday, meal_number, item_ids))
+                requests.append((SYSTEM_TEMPLATE, build_prompt(preferences, meal, context)))
+            date = next_date
+
+        outputs = self.generator.generate_batch(requests, stop_on_digit=True)
+
+        for (slot_date, weekday, meal_number, item_ids), llm_output in zip(slots, outputs):
+            itm_id = format_llm_output(llm_output)
+            if not (itm_id > 0 and itm_id in item_ids):
+                itm_id = self.__pick_menu_item(preferences, allergens, weekday, meal_number)
+
+            entries.append(f"[{slot_date},{itm_id},{meal_number}]")
+
+        return ",".join(entries)
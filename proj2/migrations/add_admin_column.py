@@ -12,6 +12,8 @@ import os
 import sys
 from werkzeug.security import generate_password_hash
 
+from migration_utils import optimize_and_close
+
 
 def get_db_path():
     """Get the path to the database file."""
@@ -19,16 +21,18 @@ def get_db_path():
     return os.path.abspath(db_file)
 
 
+def column_exists(conn, table, column):
+    """Check whether a table has a column, filtering in SQL rather than in Python."""
+    row = conn.execute("SELECT 1 FROM pragma_table_info(?) WHERE name = ?", (table, column)).fetchone()
+    return row is not None
+
+
 def add_admin_column(conn):
     """Add is_admin column to User table."""
     cursor = conn.cursor()
     
     # Check if column already exists
-    cursor.execute("PRAGMA table_info(User)")
-    columns = cursor.fetchall()
-    column_names = [col[1] for col in columns]
-    
-    if 'is_admin' in column_names:
+    if column_exists(conn, 'User', 'is_admin'):
         print("⚠ is_admin column already exists. Skipping column creation.")
         return False
     
@@ -96,11 +100,7 @@ def verify_migration(conn):
     cursor = conn.cursor()
     
     # Verify column exists
-    cursor.execute("PRAGMA table_info(User)")
-    columns = cursor.fetchall()
-    column_names = [col[1] for col in columns]
-    
-    if 'is_admin' not in column_names:
+    if not column_exists(conn, 'User', 'is_admin'):
         raise Exception("is_admin column was not added successfully")
     
     print("\n✓ Migration verification:")
@@ -116,9 +116,9 @@ def verify_migration(conn):
     if not admin_users:
         raise Exception("No admin users found after migration")
     
-    print(f"  Admin users ({len(admin_users)}):")
-    for admin in admin_users:
-        print(f"    - ID: {admin[0]}, Name: {admin[1]} {admin[2]}, Email: {admin[3]}")
+    print("\n".join([f"  Admin users ({len(admin_users)}):"] + [
+        f"    - ID: {admin[0]}, Name: {admin[1]} {admin[2]}, Email: {admin[3]}" for admin in admin_users
+    ]))
     
     # Check total users
     cursor.execute("SELECT COUNT(*) FROM User")
@@ -143,6 +143,10 @@ def migrate():
         conn = sqlite3.connect(db_file)
         print("✓ Connected to database")
         
+        # One transaction for the whole migration (a single commit/fsync). Python's sqlite3 does
+        # not open a transaction before DDL, so without this the ALTER TABLE commits on its own
+        conn.execute("BEGIN IMMEDIATE")
+
         # Run migration steps
         add_admin_column(conn)
         create_admin_user(conn)
@@ -174,8 +178,7 @@ def migrate():
         
     finally:
         if conn:
-            conn.close()
-            print("✓ Database connection closed")
+            optimize_and_close(conn)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,144 @@
+"""
+Migration script to add computed insight columns to the Order table.
+
+This migration adds:
+- placed_hour column to Order table (INTEGER, VIRTUAL generated column) with the
+  local hour of placed_at
+- placed_weekday column to Order table (INTEGER, VIRTUAL generated column) with the
+  day of week of placed_at (0 = Sunday)
+- delivery_type column to Order table (TEXT, VIRTUAL generated column) with the
+  details JSON's delivery_type ('delivery' when missing, NULL for invalid JSON)
+- idx_order_summary index on Order(usr_id, placed_hour, placed_weekday) so a user's
+  activity breakdown is read from the index alone
+
+Requires the placed_at column from add_order_summary_columns.py.
+"""
+
+import sqlite3
+import os
+import sys
+
+from migration_utils import optimize_and_close
+
+
+def get_db_path():
+    """Get the path to the database file."""
+    db_file = os.path.join(os.path.dirname(__file__), '..', 'CSC510_DB.db')
+    return os.path.abspath(db_file)
+
+
+# column name -> generated column definition. placed_at is local ISO-8601 text, so the
+# hour and date are read with substr (strftime on the full value would convert to UTC)
+INSIGHT_COLUMNS = {
+    "placed_hour": "INTEGER GENERATED ALWAYS AS (CAST(substr(placed_at, 12, 2) AS INTEGER)) VIRTUAL",
+    "placed_weekday": "INTEGER GENERATED ALWAYS AS (CAST(strftime('%w', substr(placed_at, 1, 10)) AS INTEGER)) VIRTUAL",
+    "delivery_type": """TEXT GENERATED ALWAYS AS (CASE WHEN json_valid(details)
+        THEN COALESCE(json_extract(details, '$.delivery_type'), 'delivery') END) VIRTUAL""",
+}
+
+
+def add_insight_columns(conn):
+    """Add the generated placed_hour, placed_weekday and delivery_type columns to the Order table."""
+    cursor = conn.cursor()
+
+    # Check which columns already exist (table_xinfo also lists generated columns)
+    cursor.execute('PRAGMA table_xinfo("Order")')
+    column_names = [col[1] for col in cursor.fetchall()]
+
+    if 'placed_at' not in column_names:
+        raise Exception("placed_at column not found. Run add_order_summary_columns.py first")
+
+    added = False
+    for name, definition in INSIGHT_COLUMNS.items():
+        if name in column_names:
+            print(f"⚠ {name} column already exists. Skipping column creation.")
+            continue
+        # SQLite only allows VIRTUAL (not STORED) generated columns via ALTER TABLE
+        cursor.execute(f'ALTER TABLE "Order" ADD COLUMN {name} {definition}')
+        print(f"✓ {name} column added to Order table")
+        added = True
+    return added
+
+
+def create_insights_index(conn):
+    """Index a user's orders by hour and weekday for the insights activity charts."""
+    cursor = conn.cursor()
+
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_order_summary ON "Order"(usr_id, placed_hour, placed_weekday)')
+    print("✓ Index created: idx_order_summary")
+
+
+def verify_migration(conn):
+    """Verify that the migration was successful."""
+    cursor = conn.cursor()
+
+    cursor.execute('PRAGMA table_xinfo("Order")')
+    column_names = [col[1] for col in cursor.fetchall()]
+
+    for name in INSIGHT_COLUMNS:
+        if name not in column_names:
+            raise Exception(f"{name} column was not added successfully")
+
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='index' AND name='idx_order_summary'")
+    if not cursor.fetchone():
+        raise Exception("idx_order_summary was not created successfully")
+
+    print("\n✓ Migration verification:")
+
+    cursor.execute('SELECT placed_at, placed_hour, placed_weekday, delivery_type FROM "Order" LIMIT 3')
+    for placed_at, hour, weekday, delivery_type in cursor.fetchall():
+        print(f"    - {placed_at}: hour {hour}, weekday {weekday}, {delivery_type}")
+
+
+def migrate():
+    """Run the complete migration."""
+    db_file = get_db_path()
+
+    print(f"Starting order insights migration for database: {db_file}")
+    print("=" * 60)
+
+    if not os.path.exists(db_file):
+        print(f"Error: Database file not found at {db_file}")
+        sys.exit(1)
+
+    conn = None
+    try:
+        # Connect to database
+        conn = sqlite3.connect(db_file)
+        print("✓ Connected to database")
+
+        # Run migration steps
+        add_insight_columns(conn)
+        create_insights_index(conn)
+
+        # Commit all changes
+        conn.commit()
+        print("\n✓ All changes committed")
+
+        # Verify the migration
+        verify_migration(conn)
+
+        print("\n" + "=" * 60)
+        print("Migration completed successfully! ✓")
+
+    except sqlite3.Error as e:
+        print(f"\n✗ Database error: {e}")
+        if conn:
+            conn.rollback()
+            print("✓ Changes rolled back")
+        sys.exit(1)
+
+    except Exception as e:
+        print(f"\n✗ Error: {e}")
+        if conn:
+            conn.rollback()
+            print("✓ Changes rolled back")
+        sys.exit(1)
+
+    finally:
+        if conn:
+            optimize_and_close(conn)
+
+
+if __name__ == '__main__':
+    migrate()
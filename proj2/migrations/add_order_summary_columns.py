@@ -0,0 +1,189 @@
+"""
+Migration script to add order summary columns to the Order table.
+
+This migration adds:
+- placed_at column to Order table (TEXT, ISO-8601 timestamp)
+- total_cents column to Order table (INTEGER, order total in cents)
+- Backfills both columns from each order's details JSON
+- order_fill_summary trigger that fills both columns for orders inserted
+  with only a details JSON
+- idx_order_placed_at index on Order(placed_at) for date-window queries
+"""
+
+import sqlite3
+import os
+import sys
+
+from migration_utils import optimize_and_close
+
+
+def get_db_path():
+    """Get the path to the database file."""
+    db_file = os.path.join(os.path.dirname(__file__), '..', 'CSC510_DB.db')
+    return os.path.abspath(db_file)
+
+
+# column name -> column definition
+SUMMARY_COLUMNS = {
+    "placed_at": "TEXT",
+    "total_cents": "INTEGER",
+}
+
+# Expressions that derive each summary column from an order's details JSON
+PLACED_AT_FROM_DETAILS = """COALESCE(NULLIF(json_extract(details, '$.placed_at'), ''),
+                                 json_extract(details, '$.time'))"""
+TOTAL_CENTS_FROM_DETAILS = """CAST(ROUND(
+                COALESCE(NULLIF(json_extract(details, '$.charges.total'), 0),
+                         NULLIF(json_extract(details, '$.charges.grand_total'), 0),
+                         json_extract(details, '$.charges.amount')) * 100) AS INTEGER)"""
+
+
+def add_summary_columns(conn):
+    """Add placed_at and total_cents columns to the Order table."""
+    cursor = conn.cursor()
+
+    # Check which columns already exist
+    cursor.execute('PRAGMA table_info("Order")')
+    column_names = [col[1] for col in cursor.fetchall()]
+
+    added = False
+    for name, col_type in SUMMARY_COLUMNS.items():
+        if name in column_names:
+            print(f"⚠ {name} column already exists. Skipping column creation.")
+            continue
+        cursor.execute(f'ALTER TABLE "Order" ADD COLUMN {name} {col_type}')
+        print(f"✓ {name} column added to Order table")
+        added = True
+    return added
+
+
+def backfill_summary_columns(conn):
+    """Populate placed_at and total_cents from details for rows missing them."""
+    cursor = conn.cursor()
+
+    cursor.execute(f'''
+        UPDATE "Order"
+        SET placed_at = {PLACED_AT_FROM_DETAILS}
+        WHERE placed_at IS NULL AND json_valid(details)
+    ''')
+    print(f"✓ Backfilled placed_at for {cursor.rowcount} order(s)")
+
+    cursor.execute(f'''
+        UPDATE "Order"
+        SET total_cents = {TOTAL_CENTS_FROM_DETAILS}
+        WHERE total_cents IS NULL AND json_valid(details)
+    ''')
+    print(f"✓ Backfilled total_cents for {cursor.rowcount} order(s)")
+
+
+def create_summary_trigger(conn):
+    """Fill placed_at/total_cents from details for orders inserted without them."""
+    cursor = conn.cursor()
+
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS order_fill_summary
+        AFTER INSERT ON "Order"
+        FOR EACH ROW
+        WHEN (NEW.placed_at IS NULL OR NEW.total_cents IS NULL) AND json_valid(NEW.details)
+        BEGIN
+            UPDATE "Order"
+            SET placed_at = COALESCE(placed_at, {PLACED_AT_FROM_DETAILS}),
+                total_cents = COALESCE(total_cents, {TOTAL_CENTS_FROM_DETAILS})
+            WHERE ord_id = NEW.ord_id;
+        END
+    ''')
+    print("✓ Trigger created: order_fill_summary")
+
+
+def create_summary_index(conn):
+    """Index placed_at so date-window queries (e.g. the admin dashboard) can seek."""
+    cursor = conn.cursor()
+
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_order_placed_at ON "Order"(placed_at)')
+    print("✓ Index created: idx_order_placed_at")
+
+
+def verify_migration(conn):
+    """Verify that the migration was successful."""
+    cursor = conn.cursor()
+
+    # Verify columns exist
+    cursor.execute('PRAGMA table_info("Order")')
+    column_names = [col[1] for col in cursor.fetchall()]
+
+    for name in SUMMARY_COLUMNS:
+        if name not in column_names:
+            raise Exception(f"{name} column was not added successfully")
+
+    cursor.execute("""
+        SELECT name FROM sqlite_master
+        WHERE name IN ('order_fill_summary', 'idx_order_placed_at')
+    """)
+    existing = {row[0] for row in cursor.fetchall()}
+    for name in ('order_fill_summary', 'idx_order_placed_at'):
+        if name not in existing:
+            raise Exception(f"{name} was not created successfully")
+
+    print("\n✓ Migration verification:")
+
+    cursor.execute('SELECT COUNT(*), COUNT(placed_at), COUNT(total_cents) FROM "Order"')
+    total, with_placed, with_total = cursor.fetchone()
+    print(f"  Total orders: {total}")
+    print(f"  Orders with placed_at: {with_placed}")
+    print(f"  Orders with total_cents: {with_total}")
+
+
+def migrate():
+    """Run the complete migration."""
+    db_file = get_db_path()
+
+    print(f"Starting order summary migration for database: {db_file}")
+    print("=" * 60)
+
+    if not os.path.exists(db_file):
+        print(f"Error: Database file not found at {db_file}")
+        sys.exit(1)
+
+    conn = None
+    try:
+        # Connect to database
+        conn = sqlite3.connect(db_file)
+        print("✓ Connected to database")
+
+        # Run migration steps
+        add_summary_columns(conn)
+        backfill_summary_columns(conn)
+        create_summary_trigger(conn)
+        create_summary_index(conn)
+
+        # Commit all changes
+        conn.commit()
+        print("\n✓ All changes committed")
+
+        # Verify the migration
+        verify_migration(conn)
+
+        print("\n" + "=" * 60)
+        print("Migration completed successfully! ✓")
+
+    except sqlite3.Error as e:
+        print(f"\n✗ Database error: {e}")
+        if conn:
+            conn.rollback()
+            print("✓ Changes rolled back")
+        sys.exit(1)
+
+    except Exception as e:
+        print(f"\n✗ Error: {e}")
+        if conn:
+            conn.rollback()
+            print("✓ Changes rolled back")
+        sys.exit(1)
+
+    finally:
+        if conn:
+            optimize_and_close(conn)
+
+
+if __name__ == '__main__':
+    migrate()
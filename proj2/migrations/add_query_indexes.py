@@ -0,0 +1,141 @@
+"""
+Migration script to add indexes for the application's hot lookup queries.
+
+This migration adds:
+- idx_menuitem_rtr on MenuItem(rtr_id) for restaurant -> menu item lookups
+- idx_menuitem_instock on MenuItem(instock, rtr_id, ...) covering the browse
+  pages' in-stock item list, so it is read without touching the table
+- idx_order_usr_rtr on Order(usr_id, rtr_id) for a user's order history and the
+  restaurants they ordered from (replaces idx_order_usr on Order(usr_id), which is
+  a prefix of it and is dropped)
+- idx_ticket_usr_created on Ticket(usr_id, created_at DESC) for a user's tickets,
+  newest first (requires the Ticket table from add_ticket_table.py)
+- idx_ticket_priority_created on Ticket(<status priority>, created_at DESC) so the
+  admin dashboard's ticket page is read in display order (Open first, newest first)
+- Drops idx_ticket_usr_id on Ticket(usr_id), a prefix of idx_ticket_usr_created
+- Drops idx_ticket_status on Ticket(status): no query filters on status alone, and
+  the dashboard's status ordering uses idx_ticket_priority_created
+"""
+
+import sqlite3
+import os
+import sys
+
+from migration_utils import optimize_and_close
+
+
+def get_db_path():
+    """Get the path to the database file."""
+    db_file = os.path.join(os.path.dirname(__file__), '..', 'CSC510_DB.db')
+    return os.path.abspath(db_file)
+
+
+# (index name, CREATE statement) for every index this migration owns
+INDEXES = [
+    ("idx_menuitem_rtr",
+     "CREATE INDEX IF NOT EXISTS idx_menuitem_rtr ON MenuItem(rtr_id)"),
+    ("idx_menuitem_instock",
+     "CREATE INDEX IF NOT EXISTS idx_menuitem_instock ON MenuItem("
+     "instock, rtr_id, itm_id, name, price, calories, allergens, description)"),
+    ("idx_order_usr_rtr",
+     'CREATE INDEX IF NOT EXISTS idx_order_usr_rtr ON "Order"(usr_id, rtr_id)'),
+    ("idx_ticket_usr_created",
+     "CREATE INDEX IF NOT EXISTS idx_ticket_usr_created ON Ticket(usr_id, created_at DESC)"),
+    # The CASE must match admin_dashboard's ORDER BY text for the planner to use it
+    ("idx_ticket_priority_created",
+     "CREATE INDEX IF NOT EXISTS idx_ticket_priority_created ON Ticket("
+     "(CASE status WHEN 'Open' THEN 0 WHEN 'In Progress' THEN 1 "
+     "WHEN 'Resolved' THEN 2 WHEN 'Closed' THEN 3 ELSE 4 END), created_at DESC)"),
+]
+
+# Indexes made redundant by one in INDEXES (their columns are its leading columns),
+# or that no query uses but every write still maintains
+SUPERSEDED_INDEXES = ["idx_order_usr", "idx_ticket_usr_id", "idx_ticket_status"]
+
+
+def create_indexes(conn):
+    """Create the query indexes (idempotent via IF NOT EXISTS)."""
+    cursor = conn.cursor()
+
+    for name, ddl in INDEXES:
+        cursor.execute(ddl)
+        print(f"✓ Index created: {name}")
+
+
+def drop_superseded_indexes(conn):
+    """Drop indexes covered by a wider index in INDEXES (idempotent via IF EXISTS)."""
+    cursor = conn.cursor()
+
+    for name in SUPERSEDED_INDEXES:
+        cursor.execute(f"DROP INDEX IF EXISTS {name}")
+        print(f"✓ Index dropped: {name}")
+
+
+def verify_indexes(conn):
+    """Verify that every index in INDEXES exists."""
+    cursor = conn.cursor()
+
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='index'")
+    existing = {row[0] for row in cursor.fetchall()}
+
+    missing = [name for name, _ddl in INDEXES if name not in existing]
+    if missing:
+        raise Exception(f"Missing indexes: {', '.join(missing)}")
+
+    print("\n✓ Index verification:")
+    for name, _ddl in INDEXES:
+        print(f"    - {name}")
+
+
+def migrate():
+    """Run the complete migration."""
+    db_file = get_db_path()
+
+    print(f"Starting index migration for database: {db_file}")
+    print("=" * 60)
+
+    if not os.path.exists(db_file):
+        print(f"Error: Database file not found at {db_file}")
+        sys.exit(1)
+
+    conn = None
+    try:
+        # Connect to database
+        conn = sqlite3.connect(db_file)
+        print("✓ Connected to database")
+
+        # Run migration steps
+        create_indexes(conn)
+        drop_superseded_indexes(conn)
+
+        # Commit all changes
+        conn.commit()
+        print("\n✓ All changes committed")
+
+        # Verify the migration
+        verify_indexes(conn)
+
+        print("\n" + "=" * 60)
+        print("Migration completed successfully! ✓")
+
+    except sqlite3.Error as e:
+        print(f"\n✗ Database error: {e}")
+        if conn:
+            conn.rollback()
+            print("✓ Changes rolled back")
+        sys.exit(1)
+
+    except Exception as e:
+        print(f"\n✗ Error: {e}")
+        if conn:
+            conn.rollback()
+            print("✓ Changes rolled back")
+        sys.exit(1)
+
+    finally:
+        if conn:
+            optimize_and_close(conn)
+
+
+if __name__ == '__main__':
+    migrate()
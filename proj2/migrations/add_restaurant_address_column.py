@@ -0,0 +1,119 @@
+"""
+Migration script to add a computed full-address column to the Restaurant table.
+
+This migration adds:
+- address_full column to Restaurant table (TEXT, VIRTUAL generated column) that
+  joins the non-empty, trimmed address/city/state/zip parts with ", "
+"""
+
+import sqlite3
+import os
+import sys
+
+from migration_utils import optimize_and_close
+
+
+def get_db_path():
+    """Get the path to the database file."""
+    db_file = os.path.join(os.path.dirname(__file__), '..', 'CSC510_DB.db')
+    return os.path.abspath(db_file)
+
+
+# Every part is prefixed with ', ' when present; substr(..., 3) drops the leading one
+ADDRESS_FULL_EXPR = """substr(
+    CASE WHEN trim(COALESCE(address, '')) <> '' THEN ', ' || trim(address) ELSE '' END ||
+    CASE WHEN trim(COALESCE(city, '')) <> '' THEN ', ' || trim(city) ELSE '' END ||
+    CASE WHEN trim(COALESCE(state, '')) <> '' THEN ', ' || trim(state) ELSE '' END ||
+    CASE WHEN trim(COALESCE(zip, '')) <> '' THEN ', ' || trim(zip) ELSE '' END,
+    3)"""
+
+
+def add_address_full_column(conn):
+    """Add the generated address_full column to the Restaurant table."""
+    cursor = conn.cursor()
+
+    # Check if column already exists (table_xinfo also lists generated columns)
+    cursor.execute('PRAGMA table_xinfo("Restaurant")')
+    column_names = [col[1] for col in cursor.fetchall()]
+
+    if 'address_full' in column_names:
+        print("⚠ address_full column already exists. Skipping column creation.")
+        return False
+
+    # SQLite only allows VIRTUAL (not STORED) generated columns via ALTER TABLE
+    cursor.execute(f'''
+        ALTER TABLE "Restaurant"
+        ADD COLUMN address_full TEXT GENERATED ALWAYS AS ({ADDRESS_FULL_EXPR}) VIRTUAL
+    ''')
+    print("✓ address_full column added to Restaurant table")
+    return True
+
+
+def verify_migration(conn):
+    """Verify that the migration was successful."""
+    cursor = conn.cursor()
+
+    cursor.execute('PRAGMA table_xinfo("Restaurant")')
+    column_names = [col[1] for col in cursor.fetchall()]
+
+    if 'address_full' not in column_names:
+        raise Exception("address_full column was not added successfully")
+
+    print("\n✓ Migration verification:")
+
+    cursor.execute('SELECT name, address_full FROM "Restaurant" LIMIT 3')
+    for name, address_full in cursor.fetchall():
+        print(f"    - {name}: {address_full}")
+
+
+def migrate():
+    """Run the complete migration."""
+    db_file = get_db_path()
+
+    print(f"Starting restaurant address migration for database: {db_file}")
+    print("=" * 60)
+
+    if not os.path.exists(db_file):
+        print(f"Error: Database file not found at {db_file}")
+        sys.exit(1)
+
+    conn = None
+    try:
+        # Connect to database
+        conn = sqlite3.connect(db_file)
+        print("✓ Connected to database")
+
+        # Run migration steps
+        add_address_full_column(conn)
+
+        # Commit all changes
+        conn.commit()
+        print("\n✓ All changes committed")
+
+        # Verify the migration
+        verify_migration(conn)
+
+        print("\n" + "=" * 60)
+        print("Migration completed successfully! ✓")
+
+    except sqlite3.Error as e:
+        print(f"\n✗ Database error: {e}")
+        if conn:
+            conn.rollback()
+            print("✓ Changes rolled back")
+        sys.exit(1)
+
+    except Exception as e:
+        print(f"\n✗ Error: {e}")
+        if conn:
+            conn.rollback()
+            print("✓ Changes rolled back")
+        sys.exit(1)
+
+    finally:
+        if conn:
+            optimize_and_close(conn)
+
+
+if __name__ == '__main__':
+    migrate()
@@ -4,14 +4,28 @@ Migration script to add Ticket table for support ticket system.
 This migration adds:
 - Ticket table with all required columns and constraints
 - Foreign key constraints for usr_id and ord_id
-- Database indexes for performance (usr_id, status, created_at)
-- Trigger for automatic updated_at timestamp updates
+- Database indexes for performance (usr_id, created_at)
+- Removes the old update_ticket_timestamp trigger (see below)
+
+updated_at contract: every UPDATE of a Ticket row must set
+updated_at = CURRENT_TIMESTAMP itself (sqlQueries.update_ticket does this).
+The previous AFTER UPDATE trigger re-updated the row it had just written,
+so each ticket update cost two row writes.
+
+Indexes are maintained on every INSERT, so a bulk load into an indexed table pays
+one B-tree insert per index per row. When the table is going to be filled right
+after it is created (a backfill or the test seeder), run with --defer-indexes,
+load the data, then build the indexes once with --create-indexes. Until then,
+ticket lookups by user/status scan the whole table.
 """
 
+import argparse
 import sqlite3
 import os
 import sys
 
+from migration_utils import optimize_and_close
+
 
 def get_db_path():
     """Get the path to the database file."""
@@ -60,7 +74,7 @@ def create_ticket_table(conn):
     # Create Ticket table
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS Ticket (
-            ticket_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ticket_id INTEGER PRIMARY KEY,
             usr_id INTEGER NOT NULL,
             ord_id INTEGER NOT NULL,
             message TEXT NOT NULL,
@@ -81,19 +95,16 @@ def create_indexes(conn):
     """Create database indexes for performance."""
     cursor = conn.cursor()
     
-    # Create index on usr_id for fast user ticket lookups
+    # Create index on (usr_id, created_at) so a user's tickets are read newest first
+    # without a sort (same definition as in add_query_indexes.py)
     cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_ticket_usr_id 
-        ON Ticket(usr_id)
+        CREATE INDEX IF NOT EXISTS idx_ticket_usr_created 
+        ON Ticket(usr_id, created_at DESC)
     ''')
-    print("✓ Index created: idx_ticket_usr_id")
+    print("✓ Index created: idx_ticket_usr_created")
     
-    # Create index on status for fast status-based queries
-    cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_ticket_status 
-        ON Ticket(status)
-    ''')
-    print("✓ Index created: idx_ticket_status")
+    # No plain index on status: no query filters on it, and the admin dashboard's
+    # status-priority ordering is served by idx_ticket_priority_created (add_query_indexes.py)
     
     # Create index on created_at for sorting by date (descending)
     cursor.execute('''
@@ -103,27 +114,15 @@ def create_indexes(conn):
     print("✓ Index created: idx_ticket_created_at")
 
 
-def create_trigger(conn):
-    """Create trigger for automatic updated_at timestamp updates."""
+def drop_timestamp_trigger(conn):
+    """Drop the old updated_at trigger; writers now set updated_at in their UPDATE."""
     cursor = conn.cursor()
     
-    # Drop trigger if it exists (for idempotency)
     cursor.execute('''
         DROP TRIGGER IF EXISTS update_ticket_timestamp
     ''')
     
-    # Create trigger to automatically update updated_at on any UPDATE
-    cursor.execute('''
-        CREATE TRIGGER update_ticket_timestamp 
-        AFTER UPDATE ON Ticket
-        FOR EACH ROW
-        BEGIN
-            UPDATE Ticket SET updated_at = CURRENT_TIMESTAMP
-            WHERE ticket_id = NEW.ticket_id;
-        END
-    ''')
-    
-    print("✓ Trigger created: update_ticket_timestamp")
+    print("✓ Trigger dropped (if present): update_ticket_timestamp")
 
 
 def verify_table_structure(conn):
@@ -150,19 +149,16 @@ def verify_table_structure(conn):
         'updated_at': 'TIMESTAMP'
     }
     
-    for col in columns:
-        col_name = col[1]
-        col_type = col[2]
-        is_pk = col[5] == 1
-        pk_marker = " (PRIMARY KEY)" if is_pk else ""
-        print(f"    - {col_name}: {col_type}{pk_marker}")
-        
-        # Verify expected columns
-        if col_name in expected_columns:
-            del expected_columns[col_name]
+    # (cid, name, type, notnull, dflt_value, pk); print all rows with one write
+    print("\n".join(
+        f"    - {col[1]}: {col[2]}{' (PRIMARY KEY)' if col[5] == 1 else ''}" for col in columns
+    ))
     
-    if expected_columns:
-        raise Exception(f"Missing columns: {', '.join(expected_columns.keys())}")
+    # Verify expected columns
+    present_columns = {col[1] for col in columns}
+    missing_columns = [name for name in expected_columns if name not in present_columns]
+    if missing_columns:
+        raise Exception(f"Missing columns: {', '.join(missing_columns)}")
     
     # Verify foreign keys
     cursor.execute("PRAGMA foreign_key_list(Ticket)")
@@ -172,37 +168,32 @@ def verify_table_structure(conn):
     if len(foreign_keys) < 2:
         raise Exception("Expected 2 foreign keys, found fewer")
     
-    for fk in foreign_keys:
-        print(f"    - {fk[3]} -> {fk[2]}({fk[4]})")
-    
-    # Verify indexes
-    cursor.execute("""
-        SELECT name FROM sqlite_master 
-        WHERE type='index' AND tbl_name='Ticket'
-    """)
-    indexes = cursor.fetchall()
-    
-    print("  Indexes:")
-    for idx in indexes:
-        print(f"    - {idx[0]}")
+    print("\n".join(f"    - {fk[3]} -> {fk[2]}({fk[4]})" for fk in foreign_keys))
     
-    # Verify trigger
+    # Verify indexes and triggers (one sqlite_master read, split by type)
     cursor.execute("""
-        SELECT name FROM sqlite_master 
-        WHERE type='trigger' AND tbl_name='Ticket'
+        SELECT type, name FROM sqlite_master 
+        WHERE type IN ('index', 'trigger') AND tbl_name='Ticket'
     """)
-    triggers = cursor.fetchall()
+    schema_objects = cursor.fetchall()
+    indexes = [name for obj_type, name in schema_objects if obj_type == 'index']
+    triggers = [name for obj_type, name in schema_objects if obj_type == 'trigger']
     
-    print("  Triggers:")
-    for trigger in triggers:
-        print(f"    - {trigger[0]}")
+    print("\n".join(["  Indexes:"] + [f"    - {idx}" for idx in indexes]))
+    print("\n".join(["  Triggers:"] + [f"    - {trigger}" for trigger in triggers]))
     
-    if not triggers:
-        raise Exception("Trigger was not created successfully")
+    if 'update_ticket_timestamp' in triggers:
+        raise Exception("update_ticket_timestamp trigger was not dropped")
 
 
-def migrate():
-    """Run the complete migration."""
+def migrate(defer_indexes=False):
+    """
+    Run the complete migration.
+
+    Args:
+        defer_indexes: Skip index creation so they can be built after a bulk load
+                       (see build_indexes / --create-indexes).
+    """
     db_file = get_db_path()
     
     print(f"Starting migration for database: {db_file}")
@@ -224,8 +215,11 @@ def migrate():
         # Run migration steps
         verify_prerequisites(conn)
         create_ticket_table(conn)
-        create_indexes(conn)
-        create_trigger(conn)
+        if defer_indexes:
+            print("⚠ Skipping index creation. Run with --create-indexes after loading data.")
+        else:
+            create_indexes(conn)
+        drop_timestamp_trigger(conn)
         
         # Commit all changes
         conn.commit()
@@ -253,9 +247,52 @@ def migrate():
         
     finally:
         if conn:
-            conn.close()
-            print("✓ Database connection closed")
+            optimize_and_close(conn)
+
+
+def build_indexes():
+    """Create the Ticket indexes on an existing (typically freshly loaded) table."""
+    db_file = get_db_path()
+
+    print(f"Creating Ticket indexes for database: {db_file}")
+    print("=" * 60)
+
+    if not os.path.exists(db_file):
+        print(f"Error: Database file not found at {db_file}")
+        sys.exit(1)
+
+    conn = None
+    try:
+        conn = sqlite3.connect(db_file)
+        print("✓ Connected to database")
+
+        create_indexes(conn)
+
+        conn.commit()
+        print("\n✓ All changes committed")
+
+    except sqlite3.Error as e:
+        print(f"\n✗ Database error: {e}")
+        if conn:
+            conn.rollback()
+            print("✓ Changes rolled back")
+        sys.exit(1)
+
+    finally:
+        if conn:
+            optimize_and_close(conn)
 
 
 if __name__ == '__main__':
-    migrate()
+    parser = argparse.ArgumentParser(description="Add the Ticket table for the support ticket system")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--defer-indexes", action="store_true",
+                       help="create the table only; build indexes later")
+    group.add_argument("--create-indexes", action="store_true",
+                       help="only create the Ticket indexes (after a deferred bulk load)")
+    args = parser.parse_args()
+
+    if args.create_indexes:
+        build_indexes()
+    else:
+        migrate(defer_indexes=args.defer_indexes)
@@ -0,0 +1,98 @@
+"""
+Migration script to switch the database to WAL journal mode.
+
+This migration:
+- Sets journal_mode=WAL, which SQLite stores in the database file itself, so
+  every later connection opens in WAL mode (readers no longer block on a writer)
+
+Connections only apply per-connection PRAGMAs (sqlQueries.DEFAULT_PRAGMAS) and
+never change the journal mode, so opening a database does not rewrite its header.
+Run this once on a deployed database; in WAL mode each connection also relaxes
+synchronous to NORMAL, which WAL keeps crash-safe.
+"""
+
+import sqlite3
+import os
+import sys
+
+from migration_utils import optimize_and_close
+
+
+def get_db_path():
+    """Get the path to the database file."""
+    db_file = os.path.join(os.path.dirname(__file__), '..', 'CSC510_DB.db')
+    return os.path.abspath(db_file)
+
+
+def enable_wal(conn):
+    """Switch the database to WAL journal mode."""
+    cursor = conn.cursor()
+
+    cursor.execute("PRAGMA journal_mode")
+    if cursor.fetchone()[0].lower() == 'wal':
+        print("⚠ Database is already in WAL mode. Skipping.")
+        return False
+
+    # Must run outside a transaction; the result is the mode actually in effect
+    cursor.execute("PRAGMA journal_mode=WAL")
+    mode = cursor.fetchone()[0]
+    if mode.lower() != 'wal':
+        raise Exception(f"WAL journal mode unavailable (still {mode}), e.g. on a network filesystem")
+    print("✓ Journal mode set to WAL")
+    return True
+
+
+def verify_migration(conn):
+    """Verify that the migration was successful."""
+    cursor = conn.cursor()
+
+    cursor.execute("PRAGMA journal_mode")
+    mode = cursor.fetchone()[0]
+    if mode.lower() != 'wal':
+        raise Exception(f"Journal mode is {mode}, expected wal")
+
+    print("\n✓ Migration verification:")
+    print(f"    - journal_mode: {mode}")
+
+
+def migrate():
+    """Run the complete migration."""
+    db_file = get_db_path()
+
+    print(f"Starting WAL migration for database: {db_file}")
+    print("=" * 60)
+
+    if not os.path.exists(db_file):
+        print(f"Error: Database file not found at {db_file}")
+        sys.exit(1)
+
+    conn = None
+    try:
+        # Autocommit connection: journal_mode cannot change inside a transaction
+        conn = sqlite3.connect(db_file, isolation_level=None)
+        print("✓ Connected to database")
+
+        # Run migration steps
+        enable_wal(conn)
+
+        # Verify the migration
+        verify_migration(conn)
+
+        print("\n" + "=" * 60)
+        print("Migration completed successfully! ✓")
+
+    except sqlite3.Error as e:
+        print(f"\n✗ Database error: {e}")
+        sys.exit(1)
+
+    except Exception as e:
+        print(f"\n✗ Error: {e}")
+        sys.exit(1)
+
+    finally:
+        if conn:
+            optimize_and_close(conn)
+
+
+if __name__ == '__main__':
+    migrate()
@@ -0,0 +1,17 @@
+"""
+Helpers shared by the migration scripts (and the test-data seeder).
+
+Not a migration itself; the scripts import it from their own directory.
+"""
+
+import sqlite3
+
+
+def optimize_and_close(conn):
+    """Refresh stale planner statistics (see README) and close the connection."""
+    try:
+        conn.execute("PRAGMA optimize(0x12)")
+    except sqlite3.Error:
+        pass
+    conn.close()
+    print("✓ Database connection closed")
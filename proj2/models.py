@@ -6,18 +6,112 @@ logic for the application's core entities.
 """
 
 
+# Order status lookup tables. These live at module level (rather than behind
+# classmethods) so a validation is one hashed membership test; OrderStatus
+# exposes them under its historical attribute names.
+_STATUS_ORDER = ('Ordered', 'Preparing', 'Delivering', 'Delivered')
+_VALID_STATUSES = frozenset(_STATUS_ORDER)
+
+# Maps current status -> set of allowed next statuses
+_TRANSITIONS = {
+    'Ordered': frozenset(('Preparing', 'Delivered')),
+    'Preparing': frozenset(('Delivering', 'Delivered')),
+    'Delivering': frozenset(('Delivered',)),
+    'Delivered': frozenset(),
+}
+
+# Every allowed (current, new) pair, so a transition check is a single hash probe
+_ALLOWED_TRANSITIONS = frozenset(
+    (current, new) for current, nexts in _TRANSITIONS.items() for new in nexts
+)
+
+# Reverse of _TRANSITIONS: new status -> statuses that may move to it (in status order)
+_PREVIOUS_STATUSES = {
+    new: tuple(status for status in _STATUS_ORDER if new in _TRANSITIONS[status])
+    for new in _STATUS_ORDER
+}
+
+
+def is_valid_status(status):
+    """
+    Check if a status value is valid.
+
+    Args:
+        status (str): The status value to validate
+
+    Returns:
+        bool: True if the status is in the allowed set, False otherwise
+
+    Example:
+        >>> is_valid_status('Ordered')
+        True
+        >>> is_valid_status('Invalid')
+        False
+    """
+    return isinstance(status, str) and status in _VALID_STATUSES
+
+
+def is_valid_transition(current_status, new_status):
+    """
+    Check if a status transition is allowed.
+
+    Validates that transitioning from current_status to new_status
+    follows the defined workflow rules.
+
+    Args:
+        current_status (str): The current order status
+        new_status (str): The proposed new status
+
+    Returns:
+        bool: True if the transition is allowed, False otherwise
+
+    Example:
+        >>> is_valid_transition('Ordered', 'Preparing')
+        True
+        >>> is_valid_transition('Delivered', 'Preparing')
+        False
+        >>> is_valid_transition('Ordered', 'Delivering')
+        False
+    """
+    if not (isinstance(current_status, str) and isinstance(new_status, str)):
+        return False
+    return (current_status, new_status) in _ALLOWED_TRANSITIONS
+
+
+def previous_statuses(new_status):
+    """
+    List the statuses an order may move to new_status from.
+
+    This is the reverse of the transition rules, used to validate a transition
+    inside the UPDATE's WHERE clause.
+
+    Args:
+        new_status (str): The proposed new status
+
+    Returns:
+        tuple: Statuses that may transition to new_status (empty if none)
+
+    Example:
+        >>> previous_statuses('Delivering')
+        ('Preparing',)
+    """
+    if not isinstance(new_status, str):
+        return ()
+    return _PREVIOUS_STATUSES.get(new_status, ())
+
+
 class OrderStatus:
     """
     Represents valid order statuses and transitions.
-    
+
     This class defines the allowed order statuses and the valid transitions
     between them, enforcing a logical workflow progression for orders.
-    
+
     Status Flow:
         Ordered -> Preparing -> Delivering -> Delivered
         Ordered -> Delivered (direct completion)
         Preparing -> Delivered (skip delivery)
-    
+
     Attributes:
         ORDERED (str): Initial order status when order is placed
         PREPARING (str): Status when restaurant is preparing the order
@@ -25,68 +119,25 @@ class OrderStatus:
         DELIVERED (str): Final status when order is completed
         VALID_STATUSES (list): List of all valid status values
         TRANSITIONS (dict): Mapping of current status to allowed next statuses
+        ALLOWED_TRANSITIONS (frozenset): Every allowed (current, new) status pair
     """
-    
+
     # Status constants
     ORDERED = 'Ordered'
     PREPARING = 'Preparing'
     DELIVERING = 'Delivering'
     DELIVERED = 'Delivered'
-    
+
     # List of all valid statuses
-    VALID_STATUSES = [ORDERED, PREPARING, DELIVERING, DELIVERED]
-    
-    # Status transition rules
-    # Maps current status -> list of allowed next statuses
-    TRANSITIONS = {
-        ORDERED: [PREPARING, DELIVERED],
-        PREPARING: [DELIVERING, DELIVERED],
-        DELIVERING: [DELIVERED],
-        DELIVERED: []
-    }
-    
-    @classmethod
-    def is_valid_status(cls, status):
-        """
-        Check if a status value is valid.
-        
-        Args:
-            status (str): The status value to validate
-            
-        Returns:
-            bool: True if the status is in the allowed set, False otherwise
-            
-        Example:
-            >>> OrderStatus.is_valid_status('Ordered')
-            True
-            >>> OrderStatus.is_valid_status('Invalid')
-            False
-        """
-        return status in cls.VALID_STATUSES
-    
-    @classmethod
-    def is_valid_transition(cls, current_status, new_status):
-        """
-        Check if a status transition is allowed.
-        
-        Validates that transitioning from current_status to new_status
-        follows the defined workflow rules.
-        
-        Args:
-            current_status (str): The current order status
-            new_status (str): The proposed new status
-            
-        Returns:
-            bool: True if the transition is allowed, False otherwise
-            
-        Example:
-            >>> OrderStatus.is_valid_transition('Ordered', 'Preparing')
-            True
-            >>> OrderStatus.is_valid_transition('Delivered', 'Preparing')
-            False
-            >>> OrderStatus.is_valid_transition('Ordered', 'Delivering')
-            False
-        """
-        if current_status not in cls.TRANSITIONS:
-            return False
-        return new_status in cls.TRANSITIONS[current_status]
+    VALID_STATUSES = list(_STATUS_ORDER)
+
+    # Status transition rules (current status -> frozenset of allowed next statuses)
+    TRANSITIONS = _TRANSITIONS
+
+    # Every allowed (current, new) status pair
+    ALLOWED_TRANSITIONS = _ALLOWED_TRANSITIONS
+
+    # Plain functions, so a call skips classmethod binding
+    is_valid_status = staticmethod(is_valid_status)
+    is_valid_transition = staticmethod(is_valid_transition)
+    previous_statuses = staticmethod(previous_statuses)
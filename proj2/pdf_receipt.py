@@ -1,5 +1,6 @@
 # pdf_receipt.py
 import json
+import sqlite3
 from io import BytesIO
 from datetime import datetime
 
@@ -10,6 +11,12 @@ from reportlab.lib import colors
 
 from sqlQueries import create_connection, close_connection, fetch_one, fetch_all
 
+# orjson is optional; fall back to the stdlib json module when it is not installed
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
 
 def _safe_str(x):
     """
@@ -52,16 +59,18 @@ def _dt_display(iso_str):
         return iso_str
 
 
-def generate_order_receipt_pdf(db_file: str, ord_id: int) -> bytes:
+def generate_order_receipt_pdf(db_file, ord_id: int) -> bytes:
     """
     Generate a PDF receipt for a given order.
     Args:
-        db_file (str): Path to the SQLite database file.
+        db_file (str | sqlite3.Connection): Path to the SQLite database file, or an
+            already-open connection to reuse (it is left open for the caller).
         ord_id (int): Order ID for which to generate the receipt.
     Returns:
         bytes: The binary PDF data as a bytes object.
     """
-    conn = create_connection(db_file)
+    owns_conn = not isinstance(db_file, sqlite3.Connection)
+    conn = create_connection(db_file) if owns_conn else db_file
     try:
         # Order: ord_id,rtr_id,usr_id,details,status
         orow = fetch_one(conn, 'SELECT ord_id, rtr_id, usr_id, details, status FROM "Order" WHERE ord_id = ?', (ord_id,))
@@ -85,7 +94,7 @@ def generate_order_receipt_pdf(db_file: str, ord_id: int) -> bytes:
         # Parse details JSON (new format)
         j = {}
         try:
-            j = json.loads(details or "{}")
+            j = _json_loads(details or "{}")
         except Exception:
             j = {}
 
@@ -226,4 +235,5 @@ def generate_order_receipt_pdf(db_file: str, ord_id: int) -> bytes:
         return pdf_bytes
 
     finally:
-        close_connection(conn)
+        if owns_conn:
+            close_connection(conn)
@@ -14,6 +14,10 @@ import json
 from datetime import datetime, timedelta
 from werkzeug.security import generate_password_hash
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'migrations'))
+from add_ticket_table import create_indexes
+from migration_utils import optimize_and_close
+
 
 def get_db_path():
     """Get the path to the database file."""
@@ -56,8 +60,8 @@ def create_orders(conn, usr_id):
     """Create 4 orders for the test user and return order IDs."""
     cursor = conn.cursor()
     
-    # Get some restaurants
-    cursor.execute("SELECT rtr_id, name FROM Restaurant LIMIT 4")
+    # Get the first restaurants by id (rtr_id is the rowid, so this reads 4 rows with no sort)
+    cursor.execute("SELECT rtr_id, name FROM Restaurant ORDER BY rtr_id LIMIT 4")
     restaurants = cursor.fetchall()
     
     if len(restaurants) < 4:
@@ -65,8 +69,9 @@ def create_orders(conn, usr_id):
         while len(restaurants) < 4:
             restaurants.append(restaurants[0])  # Duplicate if needed
     
-    order_ids = []
     statuses = ["Delivered", "Delivered", "Preparing", "Ordered"]
+    order_rows = []
+    totals = []
     
     for i, (rtr_id, rst_name) in enumerate(restaurants[:4]):
         # Create order details JSON
@@ -105,18 +110,24 @@ def create_orders(conn, usr_id):
             "notes": f"Test order {i+1}"
         }
         
-        cursor.execute('''
-            INSERT INTO "Order" (rtr_id, usr_id, details, status)
-            VALUES (?, ?, ?, ?)
-        ''', (rtr_id, usr_id, json.dumps(order_details, indent=2), statuses[i]))
-        
-        ord_id = cursor.lastrowid
-        order_ids.append(ord_id)
-        
+        order_rows.append((rtr_id, usr_id, json.dumps(order_details, separators=(',', ':')), statuses[i]))
+        totals.append(order_details['charges']['total'])
+    
+    # One multi-row INSERT. Its RETURNING rows come back in no particular order, but ids
+    # are assigned in VALUES order, so sorting lines them up
+    values = ", ".join(["(?, ?, ?, ?)"] * len(order_rows))
+    cursor.execute(f'''
+        INSERT INTO "Order" (rtr_id, usr_id, details, status)
+        VALUES {values}
+        RETURNING ord_id
+    ''', [value for row in order_rows for value in row])
+    order_ids = sorted(row[0] for row in cursor.fetchall())
+    
+    for ord_id, (_rtr_id, rst_name), status, total in zip(order_ids, restaurants, statuses, totals):
         print(f"✓ Created order #{ord_id}:")
         print(f"  - Restaurant: {rst_name}")
-        print(f"  - Status: {statuses[i]}")
-        print(f"  - Total: ${order_details['charges']['total']}")
+        print(f"  - Status: {status}")
+        print(f"  - Total: ${total}")
     
     return order_ids
 
@@ -167,27 +178,30 @@ def verify_data(conn, usr_id, order_ids, ticket_ids):
         print("✗ User not found!")
         return False
     
-    # Verify orders
-    cursor.execute('SELECT COUNT(*) FROM "Order" WHERE usr_id = ?', (usr_id,))
-    order_count = cursor.fetchone()[0]
-    print(f"✓ Orders: {order_count} orders found")
+    # Verify orders and tickets with one query: every order of the user with its tickets
+    cursor.execute('''
+        SELECT o.ord_id, o.status, t.ticket_id, t.status
+        FROM "Order" o
+        LEFT JOIN Ticket t ON t.ord_id = o.ord_id AND t.usr_id = o.usr_id
+        WHERE o.usr_id = ?
+    ''', (usr_id,))
+    order_status = {}
+    tickets = {}
+    for ord_id, ord_status, ticket_id, ticket_status in cursor.fetchall():
+        order_status[ord_id] = ord_status
+        if ticket_id is not None:
+            tickets[ticket_id] = (ord_id, ticket_status)
     
+    print(f"✓ Orders: {len(order_status)} orders found")
     for ord_id in order_ids:
-        cursor.execute('SELECT ord_id, status FROM "Order" WHERE ord_id = ?', (ord_id,))
-        order = cursor.fetchone()
-        if order:
-            print(f"  - Order #{order[0]}: {order[1]}")
-    
-    # Verify tickets
-    cursor.execute('SELECT COUNT(*) FROM Ticket WHERE usr_id = ?', (usr_id,))
-    ticket_count = cursor.fetchone()[0]
-    print(f"✓ Tickets: {ticket_count} tickets found")
+        if ord_id in order_status:
+            print(f"  - Order #{ord_id}: {order_status[ord_id]}")
     
+    print(f"✓ Tickets: {len(tickets)} tickets found")
     for ticket_id in ticket_ids:
-        cursor.execute('SELECT ticket_id, ord_id, status FROM Ticket WHERE ticket_id = ?', (ticket_id,))
-        ticket = cursor.fetchone()
-        if ticket:
-            print(f"  - Ticket #{ticket[0]} for Order #{ticket[1]}: {ticket[2]}")
+        if ticket_id in tickets:
+            ord_id, ticket_status = tickets[ticket_id]
+            print(f"  - Ticket #{ticket_id} for Order #{ord_id}: {ticket_status}")
     
     return True
 
@@ -209,21 +223,28 @@ def main():
         # Connect to database
         conn = sqlite3.connect(db_file)
         print("✓ Connected to database\n")
-        
-        # Create test user
-        usr_id = create_test_user(conn)
-        print()
-        
-        # Create orders
-        order_ids = create_orders(conn, usr_id)
-        print()
-        
-        # Create tickets
-        ticket_ids = create_tickets(conn, usr_id, order_ids)
-        
-        # Commit all changes
-        conn.commit()
+
+        # One write transaction for all inserts (a single commit/fsync); IMMEDIATE takes the
+        # write lock up front instead of failing when the user lookup's read lock upgrades.
+        # `with conn` commits it on success and rolls it back if any step raises.
+        conn.execute("BEGIN IMMEDIATE")
+        with conn:
+            # Create test user
+            usr_id = create_test_user(conn)
+            print()
+            
+            # Create orders
+            order_ids = create_orders(conn, usr_id)
+            print()
+            
+            # Create tickets
+            ticket_ids = create_tickets(conn, usr_id, order_ids)
         print("\n✓ All changes committed")
+
+        # Build the Ticket indexes after the load (a no-op unless the table was
+        # created with add_ticket_table.py --defer-indexes)
+        create_indexes(conn)
+        conn.commit()
         
         # Verify data
         verify_data(conn, usr_id, order_ids, ticket_ids)
@@ -253,8 +274,7 @@ def main():
         
     finally:
         if conn:
-            conn.close()
-            print("✓ Database connection closed")
+            optimize_and_close(conn)
 
 
 if __name__ == '__main__':
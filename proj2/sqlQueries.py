@@ -1,17 +1,53 @@
+import queue
 import sqlite3
+from contextlib import contextmanager
+from functools import lru_cache
 
 
-def create_connection(db_file: str):
+# Performance PRAGMAs applied to every new connection (busy_timeout makes a second writer wait
+# for the write lock instead of failing). These are all per-connection: journal_mode is stored
+# in the database file, so WAL is enabled by migrations/enable_wal_mode.py, not on open.
+DEFAULT_PRAGMAS = (
+    ("busy_timeout", 5000),
+    ("cache_size", -64000),
+    ("temp_store", "MEMORY"),
+    ("mmap_size", 2147483648),
+)
+
+
+def apply_pragmas(conn, pragmas):
+    """
+    Set PRAGMAs on a connection, warning when a requested journal mode could not be enabled.
+    On a WAL database, synchronous is relaxed to NORMAL (no fsync per commit), which WAL
+    keeps crash-safe; other journal modes keep the default FULL.
+    Args:
+        conn (sqlite3.Connection): Newly opened connection.
+        pragmas (Iterable[tuple[str, object]]): (name, value) pairs, set in order.
+    Returns:
+        None
+    """
+    for name, value in pragmas:
+        row = conn.execute(f"PRAGMA {name}={value}").fetchone()
+        # journal_mode reports the mode actually in effect (e.g. network filesystems refuse WAL)
+        if name == "journal_mode" and (not row or row[0].lower() != str(value).lower()):
+            print(f"Warning: {value} journal mode unavailable, using {row[0] if row else 'default'}")
+    if conn.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal":
+        conn.execute("PRAGMA synchronous=NORMAL")
+
+
+def create_connection(db_file: str, pragmas=DEFAULT_PRAGMAS):
     """
     Create and return a connection to the specified SQLite database.
     Args:
         db_file (str): Path to the SQLite database file.
+        pragmas (Iterable[tuple[str, object]], optional): (name, value) PRAGMAs set once after opening.
     Returns:
         sqlite3.Connection | None: Connection object if successful, None otherwise.
     """
     conn = None
     try:
         conn = sqlite3.connect(db_file)
+        apply_pragmas(conn, pragmas)
     except sqlite3.Error as e:
         print(e)
     return conn
@@ -49,6 +85,46 @@ def execute_query(conn, query: str, params=()):
         return None
 
 
+def execute_write(conn, query: str, params=()):
+    """
+    Execute a write query, committing only if it was not run inside the caller's transaction.
+    Args:
+        conn (sqlite3.Connection): Active database connection.
+        query (str): SQL query string to execute.
+        params (tuple, optional): Parameters to safely substitute into the query.
+    Returns:
+        sqlite3.Cursor | None: Cursor object if successful, None if an error occurred.
+    """
+    # Checked before executing: with the default isolation level the statement itself
+    # opens a transaction, which is ours to commit
+    owns_transaction = not conn.in_transaction
+    try:
+        cur = conn.execute(query, params)
+        if owns_transaction:
+            conn.commit()
+        return cur
+    except sqlite3.Error as e:
+        print(e)
+        return None
+
+
+def execute_read(conn, query: str, params=()):
+    """
+    Execute a read-only query without committing (the caller's transaction, if any, stays open).
+    Args:
+        conn (sqlite3.Connection): Active database connection.
+        query (str): SQL query string to execute.
+        params (tuple, optional): Parameters to safely substitute into the query.
+    Returns:
+        sqlite3.Cursor | None: Cursor object if successful, None if an error occurred.
+    """
+    try:
+        return conn.execute(query, params)
+    except sqlite3.Error as e:
+        print(e)
+        return None
+
+
 def fetch_all(conn, query: str, params=()):
     """
     Execute a query and return all fetched rows.
@@ -59,7 +135,7 @@ def fetch_all(conn, query: str, params=()):
     Returns:
         list: A list of result rows (each as a tuple). Empty list if no results or on failure.
     """
-    cur = execute_query(conn, query, params)
+    cur = execute_read(conn, query, params)
     if cur:
         return cur.fetchall()
     return []
@@ -75,12 +151,132 @@ def fetch_one(conn, query: str, params=()):
     Returns:
         tuple | None: The first row as a tuple, or None if no result or on failure.
     """
-    cur = execute_query(conn, query, params)
+    cur = execute_read(conn, query, params)
     if cur:
         return cur.fetchone()
     return None
 
 
+# ============================================================================
+# Connection Pooling
+# ============================================================================
+
+class ConnectionPool:
+    """
+    A small LIFO pool of reusable SQLite connections for one database file.
+
+    Reusing connections keeps SQLite's per-connection page cache warm and skips
+    the open/PRAGMA cost on every request. Connections are opened in autocommit
+    mode (isolation_level=None), so multi-statement work must issue an explicit
+    BEGIN; any transaction left open is rolled back on release, and a row_factory
+    set by the borrower is reset, so every borrower starts with plain tuples.
+
+    Example:
+        >>> pool = ConnectionPool('CSC510_DB.db', size=8)
+        >>> with pool.acquire() as conn:
+        ...     rows = fetch_all(conn, 'SELECT name FROM Restaurant')
+    """
+
+    def __init__(self, db_file: str, size: int = 8, pragmas=(), cached_statements: int = 128):
+        """
+        Args:
+            db_file (str): Path to the SQLite database file.
+            size (int): Maximum number of idle connections kept for reuse.
+            pragmas (Iterable[tuple[str, object]]): (name, value) PRAGMAs set once per new connection.
+            cached_statements (int): Prepared statements each connection keeps, keyed by SQL text.
+        """
+        self.db_file = db_file
+        self.pragmas = tuple(pragmas)
+        self.cached_statements = cached_statements
+        self._idle = queue.LifoQueue(maxsize=size)
+
+    def _open(self):
+        """
+        Open and initialize a new pooled connection.
+        Returns:
+            sqlite3.Connection | None: Connection object if successful, None otherwise.
+        """
+        try:
+            conn = sqlite3.connect(self.db_file, check_same_thread=False, isolation_level=None,
+                                   cached_statements=self.cached_statements)
+            apply_pragmas(conn, self.pragmas)
+            return conn
+        except sqlite3.Error as e:
+            print(e)
+            return None
+
+    def get(self):
+        """
+        Take an idle connection, opening a new one if none is available.
+        Returns:
+            sqlite3.Connection | None: Connection object, or None if opening failed.
+        """
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._open()
+
+    def release(self, conn):
+        """
+        Return a connection to the pool (closing it if the pool is full), rolling back
+        any open transaction and resetting row_factory.
+        Args:
+            conn (sqlite3.Connection | None): Connection obtained from `get`.
+        Returns:
+            None
+        """
+        if conn is None:
+            return
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.row_factory = None
+            self._idle.put_nowait(conn)
+        except (sqlite3.Error, queue.Full):
+            close_connection(conn)
+
+    @contextmanager
+    def acquire(self):
+        """
+        Borrow a connection for the duration of a `with` block.
+        Returns:
+            Iterator[sqlite3.Connection | None]: The borrowed connection.
+        """
+        conn = self.get()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close_all(self):
+        """
+        Close every idle connection held by the pool.
+        Returns:
+            None
+        """
+        while True:
+            try:
+                close_connection(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+@contextmanager
+def borrow(conn):
+    """
+    Use a connection, or borrow one for the block when given a ConnectionPool.
+    Args:
+        conn (sqlite3.Connection | ConnectionPool): Connection, or pool to borrow from.
+    Returns:
+        Iterator[sqlite3.Connection | None]: The connection to use inside the block.
+    """
+    if isinstance(conn, ConnectionPool):
+        with conn.acquire() as pooled:
+            yield pooled
+    else:
+        yield conn
+
+
 # ============================================================================
 # Ticket Management Functions
 # ============================================================================
@@ -90,7 +286,7 @@ def create_ticket(conn, usr_id: int, ord_id: int, message: str):
     Create a new support ticket in the database.
     
     Args:
-        conn (sqlite3.Connection): Active database connection.
+        conn (sqlite3.Connection | ConnectionPool): Active connection, or pool to borrow one from.
         usr_id (int): User ID who is submitting the ticket.
         ord_id (int): Order ID related to the ticket.
         message (str): The issue description (must be at least 10 characters).
@@ -107,12 +303,58 @@ def create_ticket(conn, usr_id: int, ord_id: int, message: str):
         INSERT INTO Ticket (usr_id, ord_id, message, status)
         VALUES (?, ?, ?, 'Open')
     """
-    cur = execute_query(conn, query, (usr_id, ord_id, message))
-    if cur:
-        return cur.lastrowid
+    with borrow(conn) as db:
+        cur = execute_write(db, query, (usr_id, ord_id, message))
+        if cur:
+            return cur.lastrowid
     return None
 
 
+def bulk_insert_tickets(conn, rows):
+    """
+    Insert many support tickets with one executemany in a single transaction.
+    
+    One commit for the whole batch instead of one per ticket. Inside the caller's
+    transaction the batch runs in a savepoint instead: it is neither committed nor,
+    on failure, allowed to roll back the caller's earlier work.
+    
+    Args:
+        conn (sqlite3.Connection | ConnectionPool): Active connection, or pool to borrow one from.
+        rows (Iterable[tuple]): (usr_id, ord_id, message, status, created_at) per ticket.
+    
+    Returns:
+        int | None: Number of tickets inserted, or None if the batch failed (nothing is inserted).
+    
+    Example:
+        >>> conn = create_connection('CSC510_DB.db')
+        >>> bulk_insert_tickets(conn, [(1, 123, "Food was cold", "Open", "2025-12-05 10:00:00")])
+        1
+        >>> close_connection(conn)
+    """
+    query = """
+        INSERT INTO Ticket (usr_id, ord_id, message, status, created_at)
+        VALUES (?, ?, ?, ?, ?)
+    """
+    with borrow(conn) as db:
+        nested = db.in_transaction
+        try:
+            db.execute("SAVEPOINT bulk_insert_tickets" if nested else "BEGIN")
+            cur = db.executemany(query, rows)
+            if nested:
+                db.execute("RELEASE bulk_insert_tickets")
+            else:
+                db.commit()
+            return cur.rowcount
+        except sqlite3.Error as e:
+            print(e)
+            if nested:
+                db.execute("ROLLBACK TO bulk_insert_tickets")
+                db.execute("RELEASE bulk_insert_tickets")
+            elif db.in_transaction:
+                db.rollback()
+            return None
+
+
 def get_tickets_by_user(conn, usr_id: int):
     """
     Fetch all support tickets for a specific user.
@@ -121,7 +363,7 @@ def get_tickets_by_user(conn, usr_id: int):
     (newest first).
     
     Args:
-        conn (sqlite3.Connection): Active database connection.
+        conn (sqlite3.Connection | ConnectionPool): Active connection, or pool to borrow one from.
         usr_id (int): User ID to fetch tickets for.
     
     Returns:
@@ -151,18 +393,23 @@ def get_tickets_by_user(conn, usr_id: int):
         WHERE t.usr_id = ?
         ORDER BY t.created_at DESC
     """
-    return fetch_all(conn, query, (usr_id,))
+    with borrow(conn) as db:
+        return fetch_all(db, query, (usr_id,))
 
 
-def get_all_tickets(conn):
+def get_all_tickets(conn, limit: int = None, offset: int = 0):
     """
     Fetch all support tickets for the admin dashboard.
     
     Retrieves all tickets with associated user and order information,
     sorted by status priority (Open first) and then by creation date.
+    The ORDER BY matches idx_ticket_priority_created (add_query_indexes.py),
+    so tickets are read in index order with no sort and a page stops early.
     
     Args:
-        conn (sqlite3.Connection): Active database connection.
+        conn (sqlite3.Connection | ConnectionPool): Active connection, or pool to borrow one from.
+        limit (int, optional): Maximum number of tickets to return (all when None).
+        offset (int, optional): Number of tickets to skip, for paging.
     
     Returns:
         list: List of all ticket rows with user and order details. Each row contains:
@@ -193,15 +440,88 @@ def get_all_tickets(conn):
         LEFT JOIN "Order" o ON t.ord_id = o.ord_id
         ORDER BY 
             CASE t.status
-                WHEN 'Open' THEN 1
-                WHEN 'In Progress' THEN 2
-                WHEN 'Resolved' THEN 3
-                WHEN 'Closed' THEN 4
-                ELSE 5
+                WHEN 'Open' THEN 0
+                WHEN 'In Progress' THEN 1
+                WHEN 'Resolved' THEN 2
+                WHEN 'Closed' THEN 3
+                ELSE 4
             END,
             t.created_at DESC
+        LIMIT ? OFFSET ?
+    """
+    # LIMIT -1 means no limit, so paged and unpaged calls share one cached statement
+    with borrow(conn) as db:
+        return fetch_all(db, query, (-1 if limit is None else limit, offset))
+
+
+def count_all_tickets(conn):
+    """
+    Count all support tickets (the total behind the admin dashboard's pagination).
+    
+    Args:
+        conn (sqlite3.Connection | ConnectionPool): Active connection, or pool to borrow one from.
+    
+    Returns:
+        int: Number of tickets, or 0 on failure.
+    
+    Example:
+        >>> conn = create_connection('CSC510_DB.db')
+        >>> total = count_all_tickets(conn)
+        >>> close_connection(conn)
+    """
+    with borrow(conn) as db:
+        row = fetch_one(db, "SELECT COUNT(*) FROM Ticket")
+    return row[0] if row else 0
+
+
+# Ticket columns update_ticket may set (keyword names are spliced into the SQL)
+TICKET_UPDATABLE_COLUMNS = frozenset(("message", "response", "status"))
+
+
+@lru_cache(maxsize=32)
+def _update_ticket_sql(columns):
+    """
+    Build (once per column combination) the UPDATE statement used by update_ticket.
+    Args:
+        columns (tuple[str, ...]): Column names to assign, in keyword order.
+    Returns:
+        str | None: The SQL text, or None if a column is not in TICKET_UPDATABLE_COLUMNS.
+    """
+    if not TICKET_UPDATABLE_COLUMNS.issuperset(columns):
+        return None
+    assignments = "".join(f"{name} = ?, " for name in columns)
+    return f"UPDATE Ticket SET {assignments}updated_at = CURRENT_TIMESTAMP WHERE ticket_id = ?"
+
+
+def update_ticket(conn, ticket_id: int, **fields):
+    """
+    Update columns of a support ticket and stamp updated_at in the same write.
+    
+    Every UPDATE of a Ticket row must set updated_at itself (there is no trigger
+    for it); this helper always appends updated_at = CURRENT_TIMESTAMP.
+    
+    Args:
+        conn (sqlite3.Connection | ConnectionPool): Active connection, or pool to borrow one from.
+        ticket_id (int): ID of the ticket to update.
+        **fields: Column values to set; names must be in TICKET_UPDATABLE_COLUMNS.
+    
+    Returns:
+        bool: True if update was successful, False otherwise.
+    
+    Example:
+        >>> conn = create_connection('CSC510_DB.db')
+        >>> success = update_ticket(conn, ticket_id=45, status='Resolved')
+        >>> close_connection(conn)
     """
-    return fetch_all(conn, query)
+    # Same text for the same columns, so pooled connections hit their statement cache
+    query = _update_ticket_sql(tuple(fields))
+    if query is None:
+        unknown = set(fields) - TICKET_UPDATABLE_COLUMNS
+        print(f"Cannot update Ticket column(s): {', '.join(sorted(unknown))}")
+        return False
+    with borrow(conn) as db:
+        cur = execute_write(db, query, (*fields.values(), ticket_id))
+    return cur is not None
 
 
 def update_ticket_status(conn, ticket_id: int, new_status: str):
@@ -209,10 +529,10 @@ def update_ticket_status(conn, ticket_id: int, new_status: str):
     Update the status of a support ticket.
     
     Valid statuses are: 'Open', 'In Progress', 'Resolved', 'Closed'.
-    The updated_at timestamp is automatically updated by database trigger.
+    The updated_at timestamp is set in the same UPDATE (see update_ticket).
     
     Args:
-        conn (sqlite3.Connection): Active database connection.
+        conn (sqlite3.Connection | ConnectionPool): Active connection, or pool to borrow one from.
         ticket_id (int): ID of the ticket to update.
         new_status (str): New status value.
     
@@ -224,13 +544,7 @@ def update_ticket_status(conn, ticket_id: int, new_status: str):
         >>> success = update_ticket_status(conn, ticket_id=45, new_status='In Progress')
         >>> close_connection(conn)
     """
-    query = """
-        UPDATE Ticket
-        SET status = ?
-        WHERE ticket_id = ?
-    """
-    cur = execute_query(conn, query, (new_status, ticket_id))
-    return cur is not None
+    return update_ticket(conn, ticket_id, status=new_status)
 
 
 def update_ticket_response(conn, ticket_id: int, response: str, auto_update_status: bool = True):
@@ -238,10 +552,10 @@ def update_ticket_response(conn, ticket_id: int, response: str, auto_update_stat
     Update the response field of a support ticket.
     
     Optionally automatically updates status to 'In Progress' if current status is 'Open'.
-    The updated_at timestamp is automatically updated by database trigger.
+    The updated_at timestamp is set in the same UPDATE (see update_ticket).
     
     Args:
-        conn (sqlite3.Connection): Active database connection.
+        conn (sqlite3.Connection | ConnectionPool): Active connection, or pool to borrow one from.
         ticket_id (int): ID of the ticket to update.
         response (str): Administrator's response text.
         auto_update_status (bool): If True, automatically set status to 'In Progress' 
@@ -256,23 +570,19 @@ def update_ticket_response(conn, ticket_id: int, response: str, auto_update_stat
         ...                                  response="We're looking into this...")
         >>> close_connection(conn)
     """
-    if auto_update_status:
-        # Check current status and update if it's 'Open'
-        query = """
-            UPDATE Ticket
-            SET response = ?,
-                status = CASE 
-                    WHEN status = 'Open' THEN 'In Progress'
-                    ELSE status
-                END
-            WHERE ticket_id = ?
-        """
-    else:
-        query = """
-            UPDATE Ticket
-            SET response = ?
-            WHERE ticket_id = ?
-        """
+    # One statement for both modes (the flag is a bind parameter), so every call
+    # reuses the same cached prepared statement
+    query = """
+        UPDATE Ticket
+        SET response = ?,
+            status = CASE
+                WHEN ? = 1 AND status = 'Open' THEN 'In Progress'
+                ELSE status
+            END,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE ticket_id = ?
+    """
     
-    cur = execute_query(conn, query, (response, ticket_id))
+    with borrow(conn) as db:
+        cur = execute_write(db, query, (response, 1 if auto_update_status else 0, ticket_id))
     return cur is not None
@@ -17,6 +17,14 @@ import Flask_app as Flask_app
 # Import your DB helpers
 from sqlQueries import create_connection, close_connection, execute_query, fetch_one, fetch_all
 
+# Migration modules: their schema steps are applied to the test DB (see `app`)
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "..", "migrations")
+if MIGRATIONS_DIR not in sys.path:
+    sys.path.insert(0, MIGRATIONS_DIR)
+import add_order_insights_columns
+import add_order_summary_columns
+import add_restaurant_address_column
+
 from typing import Any, Optional, Sequence, Tuple
 
 def expect_one(row: Optional[Sequence[Any]], err: str) -> Any:
@@ -25,7 +33,7 @@ def expect_one(row: Optional[Sequence[Any]], err: str) -> Any:
         raise AssertionError(err)
     return row[0]
 
-# ---- SCHEMA (from your __main__ docstring) ----
+# ---- SCHEMA (from your __main__ docstring; migrated columns are added by the migrations) ----
 SCHEMA_SQL = """
 CREATE TABLE IF NOT EXISTS "User" (
   usr_id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -57,7 +65,7 @@ CREATE TABLE IF NOT EXISTS "Review" (
 );
 
 CREATE TABLE IF NOT EXISTS "Ticket" (
-  ticket_id INTEGER PRIMARY KEY AUTOINCREMENT,
+  ticket_id INTEGER PRIMARY KEY,
   usr_id INTEGER NOT NULL,
   ord_id INTEGER NOT NULL,
   message TEXT NOT NULL,
@@ -91,12 +99,26 @@ def app(temp_db_path):
         conn = sqlite3.connect(temp_db_path)
     try:
         conn.executescript(SCHEMA_SQL)    # <-- executes all CREATE TABLEs
+        # Same DDL as the migrations, so the test schema can't drift from them
+        add_order_summary_columns.add_summary_columns(conn)
+        add_order_summary_columns.create_summary_trigger(conn)
+        add_order_summary_columns.create_summary_index(conn)
+        add_restaurant_address_column.add_address_full_column(conn)
+        add_order_insights_columns.add_insight_columns(conn)
+        add_order_insights_columns.create_insights_index(conn)
         conn.commit()
     finally:
         close_connection(conn)
 
     return Flask_app.app
 
+@pytest.fixture(scope="session")
+def db_pool(app, temp_db_path):
+    """The app's connection pool for the test DB, so setup code reuses warm connections."""
+    pool = Flask_app._get_pool(temp_db_path)
+    yield pool
+    pool.close_all()
+
 @pytest.fixture()
 def client(app):
     with app.test_client() as c:
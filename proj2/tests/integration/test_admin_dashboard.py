@@ -6,7 +6,7 @@ and support tickets sorted by priority.
 """
 import json
 from datetime import datetime, timedelta
-from sqlQueries import create_connection, close_connection, execute_query, fetch_one
+from sqlQueries import bulk_insert_tickets, execute_query, fetch_one
 
 
 def test_admin_dashboard_renders(client, seed_minimal_data, admin_session):
@@ -15,11 +15,10 @@ def test_admin_dashboard_renders(client, seed_minimal_data, admin_session):
     assert response.status_code == 200
 
 
-def test_admin_dashboard_with_orders(client, seed_minimal_data, admin_session, temp_db_path):
+def test_admin_dashboard_with_orders(client, seed_minimal_data, admin_session, db_pool):
     """Test that admin dashboard displays orders grouped by status."""
     # Create some test orders
-    conn = create_connection(temp_db_path)
-    try:
+    with db_pool.acquire() as conn:
         usr_id = seed_minimal_data["usr_id"]
         rtr_id = seed_minimal_data["rtr_id"]
         
@@ -56,9 +55,6 @@ def test_admin_dashboard_with_orders(client, seed_minimal_data, admin_session, t
             INSERT INTO "Order" (rtr_id, usr_id, details, status)
             VALUES (?, ?, ?, ?)
         ''', (rtr_id, usr_id, details3, "Delivered"))
-        
-    finally:
-        close_connection(conn)
     
     # Get admin dashboard
     response = client.get("/admin")
@@ -72,11 +68,10 @@ def test_admin_dashboard_with_orders(client, seed_minimal_data, admin_session, t
     assert b"$15.00" not in response.data
 
 
-def test_admin_dashboard_with_tickets(client, seed_minimal_data, admin_session, temp_db_path):
+def test_admin_dashboard_with_tickets(client, seed_minimal_data, admin_session, db_pool):
     """Test that admin dashboard displays support tickets sorted by status."""
     # Create some test tickets
-    conn = create_connection(temp_db_path)
-    try:
+    with db_pool.acquire() as conn:
         usr_id = seed_minimal_data["usr_id"]
         rtr_id = seed_minimal_data["rtr_id"]
         
@@ -96,28 +91,12 @@ def test_admin_dashboard_with_tickets(client, seed_minimal_data, admin_session,
         # Create tickets with different statuses in reverse order to test sorting
         # Insert in order: Resolved, Closed, In Progress, Open
         # Expected display order: Open, In Progress, Resolved, Closed
-        execute_query(conn, '''
-            INSERT INTO Ticket (usr_id, ord_id, message, status, created_at)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (usr_id, ord_id, "Wrong order", "Resolved", "2025-12-05 10:00:00"))
-        
-        execute_query(conn, '''
-            INSERT INTO Ticket (usr_id, ord_id, message, status, created_at)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (usr_id, ord_id, "Issue closed", "Closed", "2025-12-05 11:00:00"))
-        
-        execute_query(conn, '''
-            INSERT INTO Ticket (usr_id, ord_id, message, status, created_at)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (usr_id, ord_id, "Missing item", "In Progress", "2025-12-05 12:00:00"))
-        
-        execute_query(conn, '''
-            INSERT INTO Ticket (usr_id, ord_id, message, status, created_at)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (usr_id, ord_id, "Food was cold", "Open", "2025-12-05 13:00:00"))
-        
-    finally:
-        close_connection(conn)
+        assert bulk_insert_tickets(conn, [
+            (usr_id, ord_id, "Wrong order", "Resolved", "2025-12-05 10:00:00"),
+            (usr_id, ord_id, "Issue closed", "Closed", "2025-12-05 11:00:00"),
+            (usr_id, ord_id, "Missing item", "In Progress", "2025-12-05 12:00:00"),
+            (usr_id, ord_id, "Food was cold", "Open", "2025-12-05 13:00:00"),
+        ]) == 4
     
     # Get admin dashboard
     response = client.get("/admin")
@@ -149,10 +128,9 @@ def test_admin_dashboard_empty_state(client, seed_minimal_data, admin_session):
     # Should render without errors even with no data
 
 
-def test_admin_dashboard_tickets_sorted_by_created_at_within_status(client, seed_minimal_data, admin_session, temp_db_path):
+def test_admin_dashboard_tickets_sorted_by_created_at_within_status(client, seed_minimal_data, admin_session, db_pool):
     """Test that tickets within the same status are sorted by created_at DESC (newest first)."""
-    conn = create_connection(temp_db_path)
-    try:
+    with db_pool.acquire() as conn:
         usr_id = seed_minimal_data["usr_id"]
         rtr_id = seed_minimal_data["rtr_id"]
         
@@ -171,23 +149,11 @@ def test_admin_dashboard_tickets_sorted_by_created_at_within_status(client, seed
         
         # Create multiple tickets with the same status but different timestamps
         # Insert in chronological order, but expect reverse order in display
-        execute_query(conn, '''
-            INSERT INTO Ticket (usr_id, ord_id, message, status, created_at)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (usr_id, ord_id, "Oldest open ticket", "Open", "2025-12-05 10:00:00"))
-        
-        execute_query(conn, '''
-            INSERT INTO Ticket (usr_id, ord_id, message, status, created_at)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (usr_id, ord_id, "Middle open ticket", "Open", "2025-12-05 11:00:00"))
-        
-        execute_query(conn, '''
-            INSERT INTO Ticket (usr_id, ord_id, message, status, created_at)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (usr_id, ord_id, "Newest open ticket", "Open", "2025-12-05 12:00:00"))
-        
-    finally:
-        close_connection(conn)
+        assert bulk_insert_tickets(conn, [
+            (usr_id, ord_id, "Oldest open ticket", "Open", "2025-12-05 10:00:00"),
+            (usr_id, ord_id, "Middle open ticket", "Open", "2025-12-05 11:00:00"),
+            (usr_id, ord_id, "Newest open ticket", "Open", "2025-12-05 12:00:00"),
+        ]) == 3
     
     # Get admin dashboard
     response = client.get("/admin")
@@ -204,10 +170,9 @@ def test_admin_dashboard_tickets_sorted_by_created_at_within_status(client, seed
     assert middle_pos < oldest_pos, "Middle ticket should appear before oldest ticket"
 
 
-def test_admin_dashboard_ticket_pagination(client, seed_minimal_data, admin_session, temp_db_path):
+def test_admin_dashboard_ticket_pagination(client, seed_minimal_data, admin_session, db_pool):
     """Test that admin dashboard paginates tickets correctly (20 per page)."""
-    conn = create_connection(temp_db_path)
-    try:
+    with db_pool.acquire() as conn:
         # Delete all existing tickets to ensure clean state
         execute_query(conn, 'DELETE FROM Ticket')
         
@@ -228,14 +193,9 @@ def test_admin_dashboard_ticket_pagination(client, seed_minimal_data, admin_sess
         ord_id = ord_row[0]
         
         # Create 25 tickets to test pagination (should span 2 pages)
-        for i in range(25):
-            execute_query(conn, '''
-                INSERT INTO Ticket (usr_id, ord_id, message, status, created_at)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (usr_id, ord_id, f"Test ticket {i+1}", "Open", f"2025-12-05 {10+i//10}:{i%10}:00"))
-        
-    finally:
-        close_connection(conn)
+        rows = [(usr_id, ord_id, f"Test ticket {i+1}", "Open", f"2025-12-05 {10+i//10}:{i%10}:00")
+                for i in range(25)]
+        assert bulk_insert_tickets(conn, rows) == 25
     
     # Test page 1 (should show 20 tickets)
     response = client.get("/admin?page=1")
@@ -270,10 +230,9 @@ def test_admin_dashboard_ticket_pagination(client, seed_minimal_data, admin_sess
     assert response.status_code == 200
 
 
-def test_admin_dashboard_pagination_preserves_url(client, seed_minimal_data, admin_session, temp_db_path):
+def test_admin_dashboard_pagination_preserves_url(client, seed_minimal_data, admin_session, db_pool):
     """Test that pagination controls preserve the page parameter in URLs."""
-    conn = create_connection(temp_db_path)
-    try:
+    with db_pool.acquire() as conn:
         # Delete all existing tickets to ensure clean state
         execute_query(conn, 'DELETE FROM Ticket')
         
@@ -294,14 +253,9 @@ def test_admin_dashboard_pagination_preserves_url(client, seed_minimal_data, adm
         ord_id = ord_row[0]
         
         # Create 45 tickets to ensure 3 pages (20 + 20 + 5)
-        for i in range(45):
-            execute_query(conn, '''
-                INSERT INTO Ticket (usr_id, ord_id, message, status, created_at)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (usr_id, ord_id, f"Ticket {i+1}", "Open", f"2025-12-05 10:00:{i:02d}"))
-        
-    finally:
-        close_connection(conn)
+        rows = [(usr_id, ord_id, f"Ticket {i+1}", "Open", f"2025-12-05 10:00:{i:02d}")
+                for i in range(45)]
+        assert bulk_insert_tickets(conn, rows) == 45
     
     # Get page 2
     response = client.get("/admin?page=2")
@@ -314,11 +268,10 @@ def test_admin_dashboard_pagination_preserves_url(client, seed_minimal_data, adm
     assert 'Showing page 2 of' in html  # Current page indicator
 
 
-def test_admin_dashboard_no_pagination_with_few_tickets(client, seed_minimal_data, admin_session, temp_db_path):
+def test_admin_dashboard_no_pagination_with_few_tickets(client, seed_minimal_data, admin_session, db_pool):
     """Test that pagination controls are not shown when there are 20 or fewer tickets."""
     # First, clear any existing tickets to ensure clean state
-    conn = create_connection(temp_db_path)
-    try:
+    with db_pool.acquire() as conn:
         # Delete all existing tickets
         execute_query(conn, 'DELETE FROM Ticket')
         
@@ -339,14 +292,9 @@ def test_admin_dashboard_no_pagination_with_few_tickets(client, seed_minimal_dat
         ord_id = ord_row[0]
         
         # Create only 10 tickets (less than 20, so only 1 page)
-        for i in range(10):
-            execute_query(conn, '''
-                INSERT INTO Ticket (usr_id, ord_id, message, status, created_at)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (usr_id, ord_id, f"Ticket {i+1}", "Open", f"2025-12-05 10:00:{i:02d}"))
-        
-    finally:
-        close_connection(conn)
+        rows = [(usr_id, ord_id, f"Ticket {i+1}", "Open", f"2025-12-05 10:00:{i:02d}")
+                for i in range(10)]
+        assert bulk_insert_tickets(conn, rows) == 10
     
     # Get admin dashboard
     response = client.get("/admin")
@@ -1,5 +1,7 @@
 # tests/unit/test_helpers_parse_calendar_extra.py
 import calendar as _calendar
+import re as _re
+import sqlite3
 from datetime import date as _date
 
 import Flask_app as Flask_app
@@ -24,18 +26,31 @@ def test_parse_generated_menu_spaces_and_legacy():
     assert meals == [1, 3]
 
 
-def test_palette_for_item_ids_empty():
-    assert Flask_app.palette_for_item_ids([]) == {}
-
-
-def test_palette_deterministic_for_same_ids():
-    p1 = Flask_app.palette_for_item_ids([1, 2, 3])
-    p2 = Flask_app.palette_for_item_ids([1, 2, 3])
-    assert p1 == p2
-    assert all(
-        isinstance(c, str) and len(c) == 7 and c.startswith("#")
-        for c in p1.values()
+def test_parse_generated_menu_matches_regex_reference():
+    # The split-based scanner must accept exactly what the old regex accepted
+    ref_re = _re.compile(
+        r"\[\s*(\d{4}-\d{2}-\d{2})\s*,\s*([0-9]+)\s*(?:,\s*([123])\s*)?\]"
     )
+    samples = [
+        "[2025-10-27,5,2][2025-10-27,6]",
+        "[[2025-10-27,5]",
+        "[2025-10-27,5[2025-10-28,6,1]",
+        "[2025-10-27,5,4] [2025-10-27,5,] [2025-10-27,+5] [2025-10-27,1_0]",
+        "[2025-10-27 , 7 , 3 ]]] [2025-1-27,8] [2025-10-27,9,1,2]",
+    ]
+    for s in samples:
+        expected = {}
+        for d, mid, meal in ref_re.findall(s):
+            expected.setdefault(d, []).append(
+                {"itm_id": int(mid), "meal": int(meal) if meal else 3}
+            )
+        assert Flask_app.parse_generated_menu(s) == expected
+
+
+def test_item_hue_deterministic_degrees():
+    hues = [Flask_app.item_hue(iid) for iid in (1, 2, 3, 500)]
+    assert hues == [Flask_app.item_hue(iid) for iid in (1, 2, 3, 500)]
+    assert all(0 <= h < 360 for h in hues)
 
 
 def test_build_calendar_cells_empty_month_structure():
@@ -76,3 +91,20 @@ def test_money_and_cents_helpers_extra_cases():
 def test_fetch_menu_items_by_ids_empty_returns_empty():
     # Guard that an empty list input returns an empty dict
     assert Flask_app.fetch_menu_items_by_ids([]) == {}
+
+
+def test_check_schema_names_missing_migrations():
+    conn = sqlite3.connect(":memory:")
+    try:
+        conn.execute('CREATE TABLE "Order"(ord_id INTEGER PRIMARY KEY, placed_at TEXT, total_cents INTEGER)')
+        try:
+            Flask_app._check_schema(conn, "old.db")
+        except RuntimeError as e:
+            message = str(e)
+        else:
+            raise AssertionError("expected RuntimeError")
+        assert "add_ticket_table.py" in message
+        assert "add_order_insights_columns.py" in message
+        assert "add_order_summary_columns.py" not in message
+    finally:
+        conn.close()
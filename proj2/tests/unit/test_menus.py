@@ -1,4 +1,8 @@
+import re
+import sqlite3
 import pandas as pd
+import llm_toolkit
+import menu_generation
 from menu_generation import format_llm_output, filter_allergens, filter_closed_restaurants
 
 def test_llm_output_parsing_simple():
@@ -52,4 +56,92 @@ def test_menu_parsing_regex_safety():
     from Flask_app import parse_generated_menu
     assert parse_generated_menu(None) == {}
     assert parse_generated_menu("") == {}
-    assert parse_generated_menu("[bad data]") == {}
\ No newline at end of file
+    assert parse_generated_menu("[bad data]") == {}
+
+class _FakeStream:
+    """Streams a completion in chunks, like the OpenAI client, and records whether it was closed early."""
+    def __init__(self, pieces):
+        self.pieces = pieces
+        self.closed = False
+
+    def __iter__(self):
+        for piece in self.pieces:
+            delta = type("Delta", (), {"content": piece})()
+            yield type("Chunk", (), {"choices": [type("Choice", (), {"delta": delta})()]})()
+
+    def close(self):
+        self.closed = True
+
+
+class _FakeCompletions:
+    """Answers each prompt with the first item id offered under its CSV CONTEXT (no model needed)."""
+    def __init__(self):
+        self.prompts = []
+        self.streams = []
+
+    def create(self, model, messages, max_tokens, temperature, stream):
+        prompt = messages[1]["content"]
+        self.prompts.append(prompt)
+        itm_id = re.search(r"CSV CONTEXT:\nitem_id[^\n]*\n(\d+),", prompt).group(1)
+        fake = _FakeStream(["I pick ", itm_id, "\n", "or maybe 999"])
+        self.streams.append(fake)
+        return fake
+
+
+def _fake_llm(monkeypatch):
+    """A real LLM on the OpenAI path, with the client replaced by _FakeCompletions."""
+    completions = _FakeCompletions()
+    client = type("Client", (), {"chat": type("Chat", (), {"completions": completions})()})()
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(llm_toolkit, "HAS_OPENAI_LIB", True)
+    monkeypatch.setattr(llm_toolkit, "OpenAI", lambda api_key: client, raising=False)
+    return llm_toolkit.LLM(tokens=5), completions
+
+
+def test_generate_batch_keeps_request_order(monkeypatch):
+    """Each output answers its own request, cut off after the first complete number."""
+    llm, completions = _fake_llm(monkeypatch)
+    requests = [("system", f"CSV CONTEXT:\nitem_id,name\n{i},Item\n") for i in (7, 3, 12)]
+
+    assert llm.generate_batch(requests, stop_on_digit=True) == ["I pick 7", "I pick 3", "I pick 12"]
+    assert all(stream.closed for stream in completions.streams)
+    assert llm.generate_batch([]) == []
+
+
+def test_plan_week_fills_missing_slots_from_one_batch(monkeypatch, tmp_path):
+    """plan_week prompts once per missing (date, meal) and keeps existing entries."""
+    db_path = tmp_path / "menu.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript('''
+        CREATE TABLE Restaurant (rtr_id INTEGER PRIMARY KEY, hours TEXT, status TEXT);
+        CREATE TABLE MenuItem (itm_id INTEGER PRIMARY KEY, rtr_id INTEGER, name TEXT, description TEXT,
+                               price INTEGER, calories INTEGER, instock INTEGER, allergens TEXT);
+        INSERT INTO Restaurant VALUES (1, NULL, NULL);
+        INSERT INTO MenuItem VALUES (10, 1, 'Oats', 'Warm', 500, 300, 1, '');
+        INSERT INTO MenuItem VALUES (11, 1, 'Satay', 'Spicy', 900, 600, 1, 'peanuts');
+        INSERT INTO MenuItem VALUES (12, 1, 'Salad', 'Fresh', 800, 250, 1, NULL);
+    ''')
+    conn.commit()
+    conn.close()
+
+    llm, completions = _fake_llm(monkeypatch)
+    monkeypatch.setattr(menu_generation, "db_file", str(db_path))
+    monkeypatch.setattr(llm_toolkit.LLM, "instance", classmethod(lambda cls, tokens=500: llm))
+    batches = []
+    generate_batch = llm.generate_batch
+
+    def counting_generate_batch(requests, stop_on_digit=False):
+        batches.append(len(requests))
+        return generate_batch(requests, stop_on_digit)
+    monkeypatch.setattr(llm, "generate_batch", counting_generate_batch)
+
+    generator = menu_generation.MenuGenerator()
+    menu = generator.plan_week("[2025-10-27,10,1]", "vegetarian", "Peanuts", "2025-10-27", [1, 2], number_of_days=2)
+
+    assert batches == [3]
+    assert len(completions.prompts) == 3
+    entries = menu_generation.MENU_ENTRY_PATTERN.findall(menu)
+    assert entries[0] == ("2025-10-27", "10", "1")
+    assert [(d, m) for d, _itm_id, m in entries[1:]] == [("2025-10-27", "2"), ("2025-10-28", "1"), ("2025-10-28", "2")]
+    # The peanut dish is never offered, so it is never picked
+    assert {itm_id for _d, itm_id, _m in entries} <= {"10", "12"}
@@ -40,4 +40,25 @@ def test_invalid_transitions_backward():
 def test_invalid_transition_unknown_status():
     """Test transitions involving unknown statuses."""
     assert OrderStatus.is_valid_transition('AlienStatus', OrderStatus.ORDERED) is False
-    assert OrderStatus.is_valid_transition(OrderStatus.ORDERED, 'AlienStatus') is False
\ No newline at end of file
+    assert OrderStatus.is_valid_transition(OrderStatus.ORDERED, 'AlienStatus') is False
+
+def test_previous_statuses_reverse_transitions():
+    """Test previous_statuses is the reverse of the transition table."""
+    assert OrderStatus.previous_statuses(OrderStatus.DELIVERING) == (OrderStatus.PREPARING,)
+    assert set(OrderStatus.previous_statuses(OrderStatus.DELIVERED)) == {
+        OrderStatus.ORDERED, OrderStatus.PREPARING, OrderStatus.DELIVERING
+    }
+    assert OrderStatus.previous_statuses(OrderStatus.ORDERED) == ()
+    assert OrderStatus.previous_statuses('AlienStatus') == ()
+
+def test_transition_matrix():
+    """Test every status x status pair against the documented status flow."""
+    allowed = {
+        ('Ordered', 'Preparing'), ('Ordered', 'Delivered'),
+        ('Preparing', 'Delivering'), ('Preparing', 'Delivered'),
+        ('Delivering', 'Delivered'),
+    }
+    for current in OrderStatus.VALID_STATUSES:
+        for new in OrderStatus.VALID_STATUSES:
+            assert OrderStatus.is_valid_transition(current, new) is ((current, new) in allowed)
+
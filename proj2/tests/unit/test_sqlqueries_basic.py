@@ -1,10 +1,17 @@
 # tests/unit/test_sqlqueries_basic.py
+import sqlite3
+
 from sqlQueries import (
+    ConnectionPool,
+    bulk_insert_tickets,
     create_connection,
     close_connection,
     execute_query,
+    execute_read,
+    execute_write,
     fetch_one,
     fetch_all,
+    update_ticket,
 )
 
 
@@ -15,6 +22,24 @@ def test_sql_create_and_close(tmp_path):
     close_connection(con)
 
 
+def test_create_connection_applies_pragmas(tmp_path):
+    dbp = tmp_path / "mini.sqlite"
+    con = create_connection(dbp.as_posix())
+    try:
+        # Opening a database never changes its (file-level) journal mode
+        assert fetch_one(con, 'PRAGMA journal_mode') == ("delete",)
+        assert fetch_one(con, 'PRAGMA temp_store') == (2,)
+        assert fetch_one(con, 'PRAGMA synchronous') == (2,)
+        con.execute('PRAGMA journal_mode=WAL')
+    finally:
+        close_connection(con)
+    con = create_connection(dbp.as_posix())
+    try:
+        assert fetch_one(con, 'PRAGMA synchronous') == (1,)
+    finally:
+        close_connection(con)
+
+
 def test_sql_execute_and_fetch(tmp_path):
     dbp = tmp_path / "mini.sqlite"
     con = create_connection(dbp.as_posix())
@@ -30,3 +55,112 @@ def test_sql_execute_and_fetch(tmp_path):
         assert row1 == ("y",)
     finally:
         close_connection(con)
+
+
+def test_connection_pool_reuses_connection(tmp_path):
+    dbp = tmp_path / "mini.sqlite"
+    pool = ConnectionPool(dbp.as_posix(), size=2)
+    try:
+        with pool.acquire() as con:
+            execute_query(con, 'CREATE TABLE T(a INTEGER)')
+        with pool.acquire() as con2:
+            assert con2 is con
+            assert fetch_all(con2, 'SELECT a FROM T') == []
+    finally:
+        pool.close_all()
+
+
+def test_connection_pool_rolls_back_on_release(tmp_path):
+    dbp = tmp_path / "mini.sqlite"
+    pool = ConnectionPool(dbp.as_posix(), size=1)
+    try:
+        with pool.acquire() as con:
+            execute_query(con, 'CREATE TABLE T(a INTEGER)')
+            con.execute('BEGIN')
+            con.execute('INSERT INTO T(a) VALUES (1)')
+        with pool.acquire() as con:
+            assert not con.in_transaction
+            assert fetch_one(con, 'SELECT COUNT(*) FROM T') == (0,)
+    finally:
+        pool.close_all()
+
+
+def test_connection_pool_resets_row_factory_on_release(tmp_path):
+    dbp = tmp_path / "mini.sqlite"
+    pool = ConnectionPool(dbp.as_posix(), size=1)
+    try:
+        with pool.acquire() as con:
+            con.row_factory = sqlite3.Row
+        with pool.acquire() as con:
+            assert con.row_factory is None
+            assert type(fetch_one(con, 'SELECT 1')) is tuple
+    finally:
+        pool.close_all()
+
+
+def test_fetch_does_not_commit_open_transaction(tmp_path):
+    dbp = tmp_path / "mini.sqlite"
+    pool = ConnectionPool(dbp.as_posix(), size=1)
+    try:
+        with pool.acquire() as con:
+            execute_query(con, 'CREATE TABLE T(a INTEGER)')
+            con.execute('BEGIN')
+            con.execute('INSERT INTO T(a) VALUES (1)')
+            assert fetch_one(con, 'SELECT COUNT(*) FROM T') == (1,)
+            assert con.in_transaction
+        with pool.acquire() as con:
+            assert fetch_one(con, 'SELECT COUNT(*) FROM T') == (0,)
+            assert execute_read(con, 'SELECT * FROM missing') is None
+    finally:
+        pool.close_all()
+
+
+def test_execute_write_commits_only_its_own_transaction(tmp_path):
+    dbp = tmp_path / "mini.sqlite"
+    con = create_connection(dbp.as_posix())
+    try:
+        execute_query(con, 'CREATE TABLE T(a INTEGER)')
+        assert execute_write(con, 'INSERT INTO T(a) VALUES (1)') is not None
+        assert not con.in_transaction
+        con.execute('BEGIN')
+        execute_write(con, 'INSERT INTO T(a) VALUES (2)')
+        assert con.in_transaction
+        con.rollback()
+        assert fetch_one(con, 'SELECT COUNT(*) FROM T') == (1,)
+    finally:
+        close_connection(con)
+
+
+def test_update_ticket_stamps_updated_at(tmp_path):
+    dbp = tmp_path / "mini.sqlite"
+    con = create_connection(dbp.as_posix())
+    try:
+        execute_query(con, "CREATE TABLE Ticket(ticket_id INTEGER PRIMARY KEY, message TEXT, "
+                           "response TEXT, status TEXT, updated_at TIMESTAMP)")
+        execute_query(con, "INSERT INTO Ticket(ticket_id, status, updated_at) VALUES (1, 'Open', '2000-01-01 00:00:00')")
+
+        assert update_ticket(con, 1, status='Resolved', response='Done') is True
+        status, response, updated_at = fetch_one(con, 'SELECT status, response, updated_at FROM Ticket')
+        assert (status, response) == ('Resolved', 'Done')
+        assert updated_at > '2000-01-01 00:00:00'
+
+        assert update_ticket(con, 1, usr_id=2) is False
+    finally:
+        close_connection(con)
+
+
+def test_bulk_insert_tickets_inside_caller_transaction(tmp_path):
+    dbp = tmp_path / "mini.sqlite"
+    con = create_connection(dbp.as_posix())
+    try:
+        execute_query(con, "CREATE TABLE Ticket(ticket_id INTEGER PRIMARY KEY, usr_id INTEGER NOT NULL, "
+                           "ord_id INTEGER, message TEXT, status TEXT, created_at TEXT)")
+        con.execute('BEGIN')
+        assert bulk_insert_tickets(con, [(1, 1, "first", "Open", "2025-12-05 10:00:00")]) == 1
+        # A failed batch undoes only itself, and the caller's transaction stays open
+        assert bulk_insert_tickets(con, [(None, 1, "bad", "Open", "2025-12-05 10:00:00")]) is None
+        assert con.in_transaction
+        con.commit()
+        assert fetch_one(con, 'SELECT COUNT(*) FROM Ticket') == (1,)
+    finally:
+        close_connection(con)